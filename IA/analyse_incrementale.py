@@ -0,0 +1,381 @@
+"""
+Analyse incrémentale des documents de l'éditeur
+
+Le client ouvre une session avec le texte complet, puis n'envoie que ses
+modifications au format delta de Quill ({"retain": n}, {"insert": "..."},
+{"delete": n}). Le document est découpé en segments (phrases ou lignes)
+dont l'analyse est gardée en mémoire : une modification ne ré-analyse que
+les segments qu'elle touche, et la réponse ne contient que ceux-là.
+
+Comme Quill (et JavaScript), les longueurs des deltas et les positions
+des segments sont comptées en unités UTF-16 : un caractère hors du plan
+multilingue de base (emoji...) en occupe deux.
+"""
+
+import uuid
+from collections import Counter
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cache_lru import CacheLRU
+from nlp_malagasy import nlp, NLPMalagasy, FicheToken
+from tokeniseur import SEGMENT
+
+# Un objet intégré Quill (image, formule...) occupe un caractère du document
+OBJET_INTEGRE = '￼'
+
+# Nombre de documents gardés en mémoire (les moins récemment modifiés sont oubliés)
+CAPACITE_SESSIONS = 1000
+
+
+def longueur_utf16(texte: str) -> int:
+    """Longueur d'un texte en unités UTF-16, celle que compte Quill"""
+    if texte.isascii():
+        return len(texte)
+    try:
+        return len(texte.encode('utf-16-le')) // 2
+    except UnicodeEncodeError:
+        raise ValueError("Texte invalide : demi-paire de substitution UTF-16 isolée")
+
+
+def indice_utf16(texte: str, unites: int) -> int:
+    """
+    Indice Python (en points de code) de la position `unites` (en unités UTF-16)
+
+    Raises:
+        ValueError: la position coupe un caractère hors du plan de base en deux
+    """
+    if texte.isascii():
+        return unites
+    try:
+        return len(texte.encode('utf-16-le')[:2 * unites].decode('utf-16-le'))
+    except UnicodeDecodeError:
+        raise ValueError("Le delta coupe un caractère en deux (paire de substitution UTF-16)")
+
+
+def decouper_segments(texte: str) -> List[str]:
+    """Découpe un texte en segments contigus (leur concaténation redonne le texte)"""
+    return [m.group() for m in SEGMENT.finditer(texte) if m.group()]
+
+
+class VersionPerimee(ValueError):
+    """Le delta a été calculé sur une autre version du document"""
+
+
+class SessionInconnue(LookupError):
+    """Session inconnue ou expirée"""
+
+
+class Segment:
+    """Texte d'un segment et son analyse"""
+
+    __slots__ = ('id', 'texte', 'tokens', 'fiches', 'masses', 'mots', 'mentions')
+
+    def __init__(self, id: int, texte: str, tokens: List[str], fiches: List[FicheToken],
+                 masses: np.ndarray, mots: Dict[str, List[str]], mentions: List[Dict]):
+        self.id = id
+        self.texte = texte
+        self.tokens = tokens
+        self.fiches = fiches
+        self.masses = masses      # masses de sentiment (positive, négative, neutre)
+        self.mots = mots
+        self.mentions = mentions  # entités nommées, positions dans le segment
+
+
+class DocumentAnalyse:
+    """
+    Document découpé en segments analysés
+
+    Les positions de début des segments sont rangées dans un tableau
+    NumPy : retrouver le segment d'une position est une dichotomie, et
+    décaler les segments qui suivent une modification une seule opération.
+    """
+
+    def __init__(self, pipeline: NLPMalagasy, texte: str = ''):
+        self.nlp = pipeline
+        self.version = 0
+        self.verrou = Lock()
+
+        self.segments: List[Segment] = []
+        self.debuts = np.zeros(0, np.int64)
+        self.longueur = 0
+        self._prochain_id = 0
+
+        # Agrégats du document, mis à jour segment par segment
+        self.occurrences = Counter()
+        self.distribution_pos = Counter()
+        # Masses de sentiment : somme de celles des segments
+        self.masses = np.zeros(3)
+
+        self._remplacer(0, 0, texte)
+
+    # ----- Modifications -----
+
+    def appliquer_delta(self, ops: List[Dict[str, Any]]) -> Dict:
+        """
+        Applique un delta Quill et ré-analyse les segments touchés
+
+        Returns:
+            {'version', 'modifies': annotations des nouveaux segments,
+             'supprimes': identifiants des segments disparus, 'statistiques'}
+        """
+        self._valider(ops)
+
+        position = 0
+        # Segments créés par ce delta : id -> (indice, segment)
+        nouveaux: Dict[int, Tuple[int, Segment]] = {}
+        supprimes: List[int] = []
+
+        for op in ops:
+            if 'retain' in op:
+                position += op['retain'] if isinstance(op['retain'], int) else 1
+                continue
+
+            if 'insert' in op:
+                insertion = op['insert'] if isinstance(op['insert'], str) else OBJET_INTEGRE
+                i, retires, ajoutes = self._remplacer(position, position, insertion)
+                position += longueur_utf16(insertion)
+            else:
+                i, retires, ajoutes = self._remplacer(position, position + op['delete'], '')
+
+            # Un segment créé puis remplacé dans le même delta n'est pas signalé
+            ids_retires = {segment.id for segment in retires}
+            supprimes.extend(id for id in ids_retires if id not in nouveaux)
+            ecart = len(ajoutes) - len(retires)
+            nouveaux = {
+                id: (k + ecart if k >= i else k, segment)
+                for id, (k, segment) in nouveaux.items() if id not in ids_retires
+            }
+            nouveaux.update((segment.id, (i + n, segment)) for n, segment in enumerate(ajoutes))
+
+        self.version += 1
+        return {
+            'version': self.version,
+            'modifies': [self._annoter(k, segment) for k, segment in sorted(nouveaux.values(), key=lambda e: e[0])],
+            'supprimes': sorted(supprimes),
+            'statistiques': self.statistiques()
+        }
+
+    def _valider(self, ops: List[Dict[str, Any]]):
+        """
+        Vérifie tout le delta avant de l'appliquer : un delta invalide ne modifie rien
+
+        Un retain d'objet ({"retain": {...}}, mise en forme d'un objet
+        intégré) compte pour une unité, comme l'objet.
+        """
+        position = 0
+        # Position correspondante dans le document avant le delta
+        ancienne = 0
+        longueur = self.longueur
+        for op in ops:
+            if 'insert' in op:
+                taille = longueur_utf16(op['insert']) if isinstance(op['insert'], str) else 1
+                position += taille
+                longueur += taille
+                continue
+
+            if 'retain' in op:
+                valeur = op['retain']
+                if isinstance(valeur, dict):
+                    valeur = 1
+            elif 'delete' in op:
+                valeur = op['delete']
+            else:
+                raise ValueError(f"Opération de delta inconnue : {op}")
+            if not isinstance(valeur, int) or isinstance(valeur, bool) or valeur < 0:
+                raise ValueError(f"Longueur de delta invalide : {valeur!r}")
+            if position + valeur > longueur:
+                raise ValueError("Le delta dépasse la fin du document")
+
+            if 'retain' in op:
+                position += valeur
+            else:
+                longueur -= valeur
+            ancienne += valeur
+            self._verifier_coupure(ancienne)
+
+    def _verifier_coupure(self, position: int):
+        """Refuse une position du document qui tombe au milieu d'une paire de substitution"""
+        if position >= self.longueur:
+            return
+        i = self._segment_a(position)
+        indice_utf16(self.segments[i].texte, position - int(self.debuts[i]))
+
+    def _remplacer(self, debut: int, fin: int, insertion: str) -> Tuple[int, List[Segment], List[Segment]]:
+        """
+        Remplace le texte [debut, fin) et re-découpe les segments voisins
+
+        Les segments dont le texte ne change pas gardent leur analyse.
+        `debut` et `fin` sont en unités UTF-16.
+
+        Returns:
+            (indice du premier segment remplacé, segments retirés, segments ajoutés)
+        """
+        if not 0 <= debut <= fin <= self.longueur:
+            raise ValueError("Le delta dépasse la fin du document")
+
+        # Segments touchés, plus un de chaque côté : la ponctuation ou le
+        # retour à la ligne qui sépare deux segments peut avoir changé
+        if self.segments:
+            premier = max(self._segment_a(max(debut - 1, 0)) - 1, 0)
+            dernier = min(self._segment_a(min(fin, self.longueur - 1)) + 1, len(self.segments) - 1)
+            origine = int(self.debuts[premier])
+        else:
+            premier, dernier, origine = 0, -1, 0
+
+        anciens = self.segments[premier:dernier + 1]
+        region = ''.join(segment.texte for segment in anciens)
+        region = (region[:indice_utf16(region, debut - origine)] + insertion
+                  + region[indice_utf16(region, fin - origine):])
+        morceaux = decouper_segments(region)
+
+        # Étendre tant que le dernier morceau se prolongerait dans le segment suivant
+        while morceaux and dernier + 1 < len(self.segments):
+            suivant = self.segments[dernier + 1]
+            if decouper_segments(morceaux[-1] + suivant.texte)[0] == morceaux[-1]:
+                break
+            dernier += 1
+            anciens.append(suivant)
+            morceaux = decouper_segments(''.join(morceaux) + suivant.texte)
+
+        # Segments inchangés en tête et en queue de la région
+        avant = 0
+        while avant < min(len(anciens), len(morceaux)) and anciens[avant].texte == morceaux[avant]:
+            avant += 1
+        apres = 0
+        while (apres < min(len(anciens), len(morceaux)) - avant
+               and anciens[-1 - apres].texte == morceaux[-1 - apres]):
+            apres += 1
+
+        retires = anciens[avant:len(anciens) - apres]
+        ajoutes = [self._analyser(texte) for texte in morceaux[avant:len(morceaux) - apres]]
+
+        for segment in retires:
+            self._comptabiliser(segment, -1)
+        for segment in ajoutes:
+            self._comptabiliser(segment, 1)
+
+        # Mise à jour de la liste des segments et de leurs positions
+        i = premier + avant
+        j = dernier + 1 - apres
+        decalage = longueur_utf16(insertion) - (fin - debut)
+        position = int(self.debuts[i]) if i < len(self.debuts) else self.longueur
+        positions = np.cumsum([position] + [longueur_utf16(segment.texte) for segment in ajoutes[:-1]]) \
+            if ajoutes else np.zeros(0, np.int64)
+
+        self.segments[i:j] = ajoutes
+        self.debuts = np.concatenate((self.debuts[:i], positions, self.debuts[j:] + decalage))
+        self.longueur += decalage
+
+        return i, retires, ajoutes
+
+    def _segment_a(self, position: int) -> int:
+        """Indice du segment qui contient la position"""
+        return int(np.searchsorted(self.debuts, position, side='right')) - 1
+
+    def _analyser(self, texte: str) -> Segment:
+        tokens, _, mentions = self.nlp.index_entites.tokeniser_et_reperer(texte)
+        masses, mots = self.nlp.sentiment.evaluer_lot([(tokens, (0,))])
+        segment = Segment(self._prochain_id, texte, tokens, self.nlp._analyser_tokens(tokens),
+                          masses[0], mots[0], mentions)
+        self._prochain_id += 1
+        return segment
+
+    def _comptabiliser(self, segment: Segment, signe: int):
+        """Ajoute (signe = 1) ou retire (signe = -1) un segment des agrégats"""
+        for compteur, cles in (
+            (self.occurrences, segment.tokens),
+            (self.distribution_pos, [fiche.pos for fiche in segment.fiches]),
+        ):
+            for cle in cles:
+                compteur[cle] += signe
+                if compteur[cle] == 0:
+                    del compteur[cle]
+        self.masses += signe * segment.masses
+
+    # ----- Résultats -----
+
+    def _annoter(self, i: int, segment: Segment) -> Dict:
+        """Annotations du i-ème segment (mêmes champs que analyser_texte_complet)"""
+        debut = int(self.debuts[i])
+        return {
+            'id': segment.id,
+            'debut': debut,
+            'fin': debut + longueur_utf16(segment.texte),
+            **self.nlp._annoter(segment.tokens, segment.fiches,
+                                self.nlp.sentiment.resumer(segment.masses, segment.mots),
+                                segment.mentions)
+        }
+
+    def annotations(self) -> List[Dict]:
+        """Annotations de tous les segments"""
+        return [self._annoter(i, segment) for i, segment in enumerate(self.segments)]
+
+    def statistiques(self) -> Dict:
+        """Statistiques et sentiment du document entier"""
+        sentiment = self.nlp.sentiment.resumer(self.masses)
+        return {
+            'nombre_mots': sum(self.occurrences.values()),
+            'mots_uniques': len(self.occurrences),
+            'distribution_pos': dict(self.distribution_pos),
+            'sentiment_dominant': sentiment['sentiment_dominant'],
+            'polarite': sentiment['polarite'],
+            'scores_sentiment': sentiment['scores']
+        }
+
+    @property
+    def texte(self) -> str:
+        return ''.join(segment.texte for segment in self.segments)
+
+
+class SessionsAnalyse:
+    """Documents ouverts par les clients de l'éditeur, par identifiant de session"""
+
+    def __init__(self, pipeline: NLPMalagasy, capacite: int = CAPACITE_SESSIONS):
+        self.nlp = pipeline
+        self.documents = CacheLRU(capacite)
+
+    def ouvrir(self, texte: str = '') -> Dict:
+        """Crée une session et retourne l'analyse complète du texte initial"""
+        document = DocumentAnalyse(self.nlp, texte)
+        session = uuid.uuid4().hex
+        self.documents.ajouter(session, document)
+        return {
+            'session': session,
+            'version': document.version,
+            'segments': document.annotations(),
+            'statistiques': document.statistiques()
+        }
+
+    def modifier(self, session: str, version: int, ops: List[Dict[str, Any]]) -> Dict:
+        """
+        Applique un delta à un document
+
+        Raises:
+            SessionInconnue: session inconnue ou expirée
+            VersionPerimee: `version` n'est pas la version courante
+            ValueError: delta invalide
+        """
+        document = self._document(session)
+        with document.verrou:
+            if version != document.version:
+                raise VersionPerimee(
+                    f"Version {version} reçue, version courante {document.version}"
+                )
+            return document.appliquer_delta(ops)
+
+    def fermer(self, session: str) -> bool:
+        """Oublie une session ; False si elle n'existait pas"""
+        return self.documents.retirer(session) is not None
+
+    def _document(self, session: str) -> DocumentAnalyse:
+        document: Optional[DocumentAnalyse] = self.documents.obtenir(session)
+        if document is None:
+            raise SessionInconnue(session)
+        return document
+
+
+# Sessions de l'éditeur (état en mémoire du processus de l'API)
+sessions = SessionsAnalyse(nlp)
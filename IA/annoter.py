@@ -0,0 +1,315 @@
+"""
+Annotation hors ligne d'un corpus de fichiers texte
+
+Applique le pipeline NLPMalagasy (tokens, lemmes, POS, entités, sentiment,
+statistiques) à chaque fichier, sur plusieurs processus, sans passer par
+l'API. Un enregistrement par fichier, en JSONL ou en Parquet :
+    python annoter.py corpus/ -o annotations.jsonl -j 4
+    python annoter.py 'textes/**/*.txt' -o annotations/ --format parquet
+
+La sortie sert aussi de reprise : relancée après une interruption, la
+commande ignore les fichiers déjà présents dans la sortie.
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from nlp_malagasy import nlp
+
+FORMATS = ('jsonl', 'parquet')
+
+# Fichiers pris dans un dossier
+MOTIF_DEFAUT = '*.txt'
+
+# Enregistrements par fichier Parquet (part-00000.parquet, ...)
+TAILLE_PARTIE = 256
+
+# Intervalle (secondes) entre deux affichages de la progression
+INTERVALLE_PROGRESSION = 2.0
+
+# Début de chaque ligne JSONL : lu seul à la reprise
+PREFIXE_JSONL = '{"fichier": '
+
+# Parties Parquet en cours d'écriture (supprimées à la reprise)
+PREFIXE_TEMPORAIRE = '.part-'
+
+
+def lister_fichiers(sources: Iterable[str], motif: str = MOTIF_DEFAUT) -> List[str]:
+    """
+    Fichiers désignés par des dossiers (parcourus récursivement), des
+    chemins ou des motifs glob, sans doublons, du plus gros au plus petit
+    (les longs fichiers commencent tôt : meilleur équilibrage des processus)
+    """
+    fichiers = set()
+    for source in sources:
+        if os.path.isdir(source):
+            trouves = glob.glob(os.path.join(source, '**', motif), recursive=True)
+        elif os.path.isfile(source):
+            trouves = [source]
+        else:
+            trouves = glob.glob(source, recursive=True)
+        fichiers.update(os.path.normpath(f) for f in trouves if os.path.isfile(f))
+    return sorted(fichiers, key=lambda f: (-os.path.getsize(f), f))
+
+
+def annoter_fichier(chemin: str) -> Dict:
+    """Analyse complète d'un fichier : {'fichier', champs de analyser_texte_complet}"""
+    with open(chemin, encoding='utf-8', errors='replace') as f:
+        texte = f.read()
+    return {'fichier': chemin, **nlp.analyser_texte_complet(texte)}
+
+
+def _annoter(chemin: str, format: str) -> Tuple[str, object, Optional[str]]:
+    """
+    Point d'entrée d'un processus de travail
+
+    Returns:
+        (chemin, enregistrement ou None, erreur) ; en JSONL l'enregistrement
+        est déjà sérialisé, le processus principal n'a plus qu'à l'écrire.
+        Toute erreur sur un fichier est rapportée sans arrêter le corpus.
+    """
+    try:
+        resultat = annoter_fichier(chemin)
+        if format == 'jsonl':
+            return chemin, json.dumps(resultat, ensure_ascii=False), None
+        return chemin, _ligne_parquet(resultat), None
+    except Exception as e:
+        return chemin, None, f"{type(e).__name__} : {e}"
+
+
+# ==================== SORTIES ====================
+
+class SortieJsonl:
+    """Un enregistrement JSON par ligne, ajouté au fichier au fil de l'eau"""
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        self.fichier = None
+
+    def deja_annotes(self) -> Set[str]:
+        """
+        Fichiers déjà présents dans la sortie
+
+        Une dernière ligne incomplète (interruption pendant l'écriture)
+        est retirée du fichier.
+        """
+        annotes = set()
+        if not os.path.exists(self.chemin):
+            return annotes
+
+        decodeur = json.JSONDecoder()
+        fin_valide = 0
+        with open(self.chemin, 'rb') as f:
+            for ligne in f:
+                if not ligne.endswith(b'\n'):
+                    break
+                fin_valide += len(ligne)
+                texte = ligne.decode('utf-8')
+                if texte.startswith(PREFIXE_JSONL):
+                    annotes.add(decodeur.raw_decode(texte, len(PREFIXE_JSONL))[0])
+        if fin_valide < os.path.getsize(self.chemin):
+            os.truncate(self.chemin, fin_valide)
+        return annotes
+
+    def ecrire(self, enregistrement: str):
+        if self.fichier is None:
+            self.fichier = open(self.chemin, 'a', encoding='utf-8')
+        self.fichier.write(enregistrement + '\n')
+        # Écrit avant de passer au suivant : la reprise ne refait que le travail perdu
+        self.fichier.flush()
+
+    def fermer(self):
+        if self.fichier is not None:
+            self.fichier.close()
+
+
+class SortieParquet:
+    """
+    Dossier de fichiers Parquet, un par groupe de TAILLE_PARTIE enregistrements
+
+    Chaque partie est écrite sous un nom temporaire puis renommée : une
+    partie visible est toujours complète. Les POS ne sont gardés que comme
+    étiquettes (colonne `pos_tags`), dans l'ordre de la colonne `tokens`.
+    """
+
+    def __init__(self, dossier: str, taille_partie: int = TAILLE_PARTIE):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("La sortie Parquet nécessite pyarrow (pip install pyarrow)")
+        self.pa, self.pq = pa, pq
+        self.schema = _schema_parquet(pa)
+        self.dossier = dossier
+        self.taille_partie = taille_partie
+        self.tampon: List[Dict] = []
+        os.makedirs(dossier, exist_ok=True)
+        self.prochaine_partie = len(self._parties())
+
+    def _parties(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.dossier, 'part-*.parquet')))
+
+    def deja_annotes(self) -> Set[str]:
+        """Fichiers présents dans les parties déjà écrites (les temporaires sont supprimés)"""
+        for temporaire in glob.glob(os.path.join(self.dossier, PREFIXE_TEMPORAIRE + '*.tmp')):
+            os.remove(temporaire)
+        annotes = set()
+        for partie in self._parties():
+            annotes.update(self.pq.read_table(partie, columns=['fichier']).column('fichier').to_pylist())
+        return annotes
+
+    def ecrire(self, enregistrement: Dict):
+        self.tampon.append(enregistrement)
+        if len(self.tampon) >= self.taille_partie:
+            self._vider()
+
+    def _vider(self):
+        if not self.tampon:
+            return
+        chemin = os.path.join(self.dossier, f'part-{self.prochaine_partie:05d}.parquet')
+        table = self.pa.Table.from_pylist(self.tampon, schema=self.schema)
+        temporaire = tempfile.NamedTemporaryFile(dir=self.dossier, prefix=PREFIXE_TEMPORAIRE,
+                                                 suffix='.tmp', delete=False)
+        try:
+            with temporaire:
+                self.pq.write_table(table, temporaire)
+            os.replace(temporaire.name, chemin)
+        except BaseException:
+            os.unlink(temporaire.name)
+            raise
+        self.prochaine_partie += 1
+        self.tampon = []
+
+    def fermer(self):
+        self._vider()
+
+
+def _schema_parquet(pa):
+    """Schéma des enregistrements Parquet (champs de analyser_texte_complet)"""
+    def categories(type_, noms):
+        return pa.struct([(nom, type_) for nom in noms])
+
+    mots = pa.list_(pa.string())
+    sentiments = ('positif', 'negatif', 'neutre')
+    return pa.schema([
+        ('fichier', pa.string()),
+        ('tokens', mots),
+        ('lemmes', mots),
+        ('pos_tags', mots),
+        ('entites', categories(mots, ('villes', 'personnes', 'lieux', 'autres'))),
+        ('sentiment', pa.struct([
+            ('sentiment_dominant', pa.string()),
+            ('polarite', pa.float64()),
+            ('scores', categories(pa.float64(), sentiments)),
+            ('mots', categories(mots, sentiments)),
+        ])),
+        ('statistiques', pa.struct([
+            ('nombre_mots', pa.int64()),
+            ('mots_uniques', pa.int64()),
+            ('distribution_pos', pa.map_(pa.string(), pa.int64())),
+        ])),
+    ])
+
+
+def _ligne_parquet(resultat: Dict) -> Dict:
+    """Adapte un résultat de annoter_fichier au schéma Parquet"""
+    statistiques = resultat['statistiques']
+    return {
+        **resultat,
+        'pos_tags': [pos for _, pos in resultat['pos_tags']],
+        'statistiques': {**statistiques, 'distribution_pos': list(statistiques['distribution_pos'].items())}
+    }
+
+
+# ==================== ANNOTATION ====================
+
+def annoter_corpus(fichiers: List[str], sortie, processus: int = 0,
+                   format: str = 'jsonl') -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Annote les fichiers qui ne sont pas encore dans la sortie
+
+    Args:
+        processus: nombre de processus de travail (0 : dans ce processus) ;
+            ils héritent du pipeline déjà chargé (fork)
+
+    Yields:
+        (fichier, erreur ou None) au fil des fichiers terminés, dans
+        l'ordre où ils se terminent
+    """
+    deja = sortie.deja_annotes()
+    restants = [f for f in fichiers if f not in deja]
+
+    pool = None
+    if processus > 0 and len(restants) > 1:
+        # Ctrl-C n'interrompt que le processus principal, qui arrête le pool
+        pool = multiprocessing.get_context('fork').Pool(
+            processus, initializer=signal.signal, initargs=(signal.SIGINT, signal.SIG_IGN)
+        )
+        resultats = pool.imap_unordered(partial(_annoter, format=format), restants)
+    else:
+        resultats = (_annoter(f, format) for f in restants)
+
+    try:
+        for chemin, enregistrement, erreur in resultats:
+            if enregistrement is not None:
+                sortie.ecrire(enregistrement)
+            yield chemin, erreur
+    finally:
+        if pool is not None:
+            pool.terminate()
+        sortie.fermer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Annote un corpus de fichiers texte avec le pipeline NLP")
+    parser.add_argument('sources', nargs='+', help="dossiers, fichiers ou motifs glob")
+    parser.add_argument('-o', '--sortie', required=True,
+                        help="fichier JSONL, ou dossier des parties Parquet")
+    parser.add_argument('-f', '--format', choices=FORMATS,
+                        help="format de sortie (par défaut : d'après l'extension de --sortie)")
+    parser.add_argument('-j', '--processus', type=int, default=os.cpu_count(),
+                        help="nombre de processus (0 : aucun ; défaut : nombre de cœurs)")
+    parser.add_argument('-m', '--motif', default=MOTIF_DEFAUT,
+                        help=f"fichiers pris dans les dossiers (défaut : {MOTIF_DEFAUT})")
+    args = parser.parse_args()
+
+    format = args.format or ('jsonl' if args.sortie.endswith('.jsonl') else 'parquet')
+    fichiers = lister_fichiers(args.sources, args.motif)
+    sortie = SortieJsonl(args.sortie) if format == 'jsonl' else SortieParquet(args.sortie)
+    tailles = {f: os.path.getsize(f) for f in fichiers}
+
+    debut = time.perf_counter()
+    affichage = debut
+    annotes = octets = 0
+    erreurs = []
+    progression = annoter_corpus(fichiers, sortie, args.processus, format)
+    try:
+        for chemin, erreur in progression:
+            if erreur is not None:
+                erreurs.append((chemin, erreur))
+                continue
+            annotes += 1
+            octets += tailles[chemin]
+            if time.perf_counter() - affichage >= INTERVALLE_PROGRESSION:
+                affichage = time.perf_counter()
+                print(f"⏳ {annotes} fichiers annotés ({octets / 1e6 / (affichage - debut):.1f} Mo/s)", flush=True)
+    except KeyboardInterrupt:
+        progression.close()
+        print(f"⏹️ Interrompu après {annotes} fichiers : relancer la même commande pour reprendre")
+        sys.exit(130)
+
+    duree = time.perf_counter() - debut
+    print(f"✅ {annotes} fichiers annotés en {duree:.1f} s ({octets / 1e6 / max(duree, 1e-9):.1f} Mo/s), "
+          f"{len(fichiers) - annotes - len(erreurs)} déjà présents dans {args.sortie}")
+    for chemin, erreur in erreurs:
+        print(f"❌ {chemin} : {erreur}", file=sys.stderr)
+    sys.exit(1 if erreurs else 0)
@@ -0,0 +1,70 @@
+"""
+Analyse complète : pipeline en plusieurs passes contre analyser_texte_complet
+
+L'ancienne version de analyser_texte_complet retokenisait le texte pour
+chaque module (lemmes, POS, entités, sentiment) et consultait le
+dictionnaire une fois par token et par module ; elle est reconstituée
+ici avec les méthodes publiques de NLPMalagasy.
+
+    python benchmarks/bench_analyse_complete.py cleaned_bible.txt -t 2000
+"""
+
+import argparse
+
+from commun import chronometrer, lire_corpus
+from nlp_malagasy import nlp
+
+
+def analyser_en_passes(texte: str) -> dict:
+    """Analyse complète en une passe par module (ancienne version)"""
+    tokens = nlp.tokenize(texte)
+    lemmes = [nlp.lemmatiser(token) for token in tokens]
+    pos_tags = nlp.pos_tag(tokens)
+    entites = nlp.extraire_entites(texte)
+    sentiment = nlp.analyser_sentiment(texte)
+    stats = {
+        'nombre_mots': len(tokens),
+        'mots_uniques': len(set(tokens)),
+        'distribution_pos': nlp._compter_pos(pos_tags)
+    }
+    return {
+        'tokens': tokens,
+        'lemmes': lemmes,
+        'pos_tags': pos_tags,
+        'entites': entites,
+        'sentiment': sentiment,
+        'statistiques': stats
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default='cleaned_bible.txt')
+    parser.add_argument('-t', '--taille', type=int, default=2000,
+                        help="taille des documents (caractères) ; 0 = corpus entier")
+    parser.add_argument('-r', '--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = lire_corpus(args.corpus)
+    taille = args.taille or len(corpus)
+    documents = [corpus[i:i + taille] for i in range(0, len(corpus), taille)]
+
+    for document in documents:
+        if analyser_en_passes(document) != nlp.analyser_texte_complet(document):
+            raise SystemExit("❌ Résultats différents entre les deux versions")
+    print(f"✅ Résultats identiques sur {len(documents)} documents")
+
+    mesures = {
+        'plusieurs passes': lambda: [analyser_en_passes(d) for d in documents],
+        'analyser_texte_complet': lambda: [nlp.analyser_texte_complet(d) for d in documents],
+    }
+    temps = {}
+    for nom, fonction in mesures.items():
+        temps[nom], _ = chronometrer(fonction, args.repetitions)
+        print(f"⏳ {nom:24s} {temps[nom] * 1000:8.1f} ms  "
+              f"({len(corpus) / temps[nom] / 1e6:.2f} Mo/s)")
+    print(f"✅ Accélération : x{temps['plusieurs passes'] / temps['analyser_texte_complet']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Annotation hors ligne : débit (Mo/s) de annoter.py selon le nombre de processus et le format
+
+Un corpus temporaire de `-n` fichiers est découpé dans le corpus donné ;
+chaque mesure annote tout le corpus dans une sortie neuve. Les sorties
+JSONL de toutes les mesures sont d'abord comparées entre elles.
+
+    python benchmarks/bench_annoter.py cleaned_bible.txt -n 400 -j 0 2 4
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from commun import lire_corpus
+from annoter import SortieJsonl, SortieParquet, annoter_corpus, annoter_fichier, lister_fichiers
+
+
+def generer_corpus(dossier: str, texte: str, nombre: int):
+    """Fichiers de tailles variées (de 1/4 à 7/4 de la taille moyenne)"""
+    moyenne = len(texte) // nombre
+    position = 0
+    for i in range(nombre):
+        taille = moyenne * (1 + 2 * (i % 4)) // 4
+        with open(os.path.join(dossier, f'texte-{i:05d}.txt'), 'w', encoding='utf-8') as f:
+            f.write(texte[position:position + taille])
+        position = (position + taille) % max(len(texte) - moyenne * 2, 1)
+
+
+def mesurer(fichiers, dossier: str, format: str, processus: int) -> float:
+    if format == 'jsonl':
+        sortie = SortieJsonl(os.path.join(dossier, f'annotations-{processus}.jsonl'))
+    else:
+        sortie = SortieParquet(os.path.join(dossier, f'annotations-{processus}'))
+    debut = time.perf_counter()
+    for chemin, erreur in annoter_corpus(fichiers, sortie, processus, format):
+        if erreur is not None:
+            raise SystemExit(f"❌ {chemin} : {erreur}")
+    return time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default='cleaned_bible.txt')
+    parser.add_argument('-n', '--fichiers', type=int, default=400)
+    parser.add_argument('-j', '--processus', type=int, nargs='+', default=[0, 2, 4])
+    parser.add_argument('-f', '--formats', nargs='+', default=['jsonl', 'parquet'])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        corpus = os.path.join(dossier, 'corpus')
+        os.makedirs(corpus)
+        generer_corpus(corpus, lire_corpus(args.corpus), args.fichiers)
+        fichiers = lister_fichiers([corpus])
+        octets = sum(os.path.getsize(f) for f in fichiers)
+        # Chauffe : caches du lemmatiseur remplis avant la première mesure
+        for fichier in fichiers:
+            annoter_fichier(fichier)
+
+        for format in args.formats:
+            for processus in args.processus:
+                duree = mesurer(fichiers, dossier, format, processus)
+                print(f"⏳ {format:8s} -j {processus}  {len(fichiers)} fichiers, {octets / 1e6:.1f} Mo : "
+                      f"{duree:6.2f} s, {octets / 1e6 / duree:6.2f} Mo/s")
+
+        if 'jsonl' in args.formats:
+            sorties = []
+            for processus in args.processus:
+                with open(os.path.join(dossier, f'annotations-{processus}.jsonl'), encoding='utf-8') as f:
+                    sorties.append(sorted(f.read().splitlines(), key=lambda l: json.loads(l)['fichier']))
+            if any(sortie != sorties[0] for sortie in sorties):
+                raise SystemExit("❌ Sorties JSONL différentes selon le nombre de processus")
+            print("✅ Sorties JSONL identiques quel que soit le nombre de processus")
+
+
+if __name__ == '__main__':
+    main()
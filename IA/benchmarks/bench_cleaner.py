@@ -0,0 +1,122 @@
+"""
+Extraction des PDF : pages/s et mémoire de cleaner.py contre l'ancienne extraction page entière
+
+Les PDF de test imitent l'impression du site (en-têtes, pieds de page,
+navigation, numéros de versets) : `-n` livres de `-p` pages, avec le
+texte du corpus. L'ancienne extraction gardait tout le texte en mémoire
+et ne retirait que les chiffres. Chaque mesure tourne dans son propre
+processus, dont le pic de mémoire résidente est relevé ; les sorties
+de cleaner.py doivent être identiques quel que soit le nombre de processus.
+
+    python benchmarks/bench_cleaner.py -n 8 -p 250 -j 0 2 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+import resource
+import tempfile
+import textwrap
+import time
+
+import fitz
+
+from commun import DOSSIER_IA, lire_corpus
+
+
+def generer_pdf(chemin: str, titre: str, versets: list, pages: int, decalage: int):
+    doc = fitz.open()
+    chapitre, verset, indice = 1, 1, decalage
+    for numero in range(1, pages + 1):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((30, 22), "12/18/25, 10:41 AM", fontsize=8)
+        page.insert_text((290, 22), titre, fontsize=8)
+        page.insert_text((30, 780), "https://nybaiboly.net/Bible/BibleMalagasyHtm-at01-Genese.htm", fontsize=8)
+        page.insert_text((560, 780), f"{numero}/{pages}", fontsize=8)
+        lignes, tete = [], ''
+        if numero == 1:
+            lignes += [f"Accueil / Bible / {titre}", titre,
+                       "Accès direct aux chapitres : " + ", ".join(map(str, range(1, 36))) + ","]
+            tete = ", ".join(map(str, range(36, 51))) + f" Chapitre {chapitre} "
+        while len(lignes) < 55:
+            if verset > 30:
+                chapitre, verset, tete = chapitre + 1, 1, f"Chapitre {chapitre + 1} "
+                lignes.append("*")
+            texte = versets[indice % len(versets)]
+            lignes += textwrap.wrap(f"{tete}{verset} {texte}", 110)
+            tete, verset, indice = '', verset + 1, indice + 1
+        for i, ligne in enumerate(lignes):
+            page.insert_text((30, 50 + i * 12.5), ligne, fontsize=9)
+    doc.save(chemin)
+
+
+def extraire_ancien(pdfs: list, sortie: str) -> int:
+    """Ancienne extraction : texte des pages entières gardé en mémoire, chiffres retirés"""
+    chiffres = re.compile(r'\d+\s*')
+    pages = 0
+    with open(sortie, 'w', encoding='utf-8') as f:
+        for pdf in pdfs:
+            with fitz.open(pdf) as doc:
+                contenu = [chiffres.sub('', page.get_text('text')) for page in doc]
+            f.write('\n'.join(contenu))
+            pages += len(contenu)
+    return pages
+
+
+def mesurer(mode: str, pdfs: list, sortie: str, file):
+    """Processus de mesure : (durée, pages, pic de mémoire en Mo)"""
+    os.chdir(DOSSIER_IA)
+    debut = time.perf_counter()
+    if mode == 'ancien':
+        pages = extraire_ancien(pdfs, sortie)
+    else:
+        from cleaner import extraire
+        pages = extraire(pdfs, sortie, processus=int(mode))
+    duree = time.perf_counter() - debut
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    enfants = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    file.put((duree, pages, pic, enfants))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-c', '--corpus', default='cleaned_bible.txt')
+    parser.add_argument('-n', '--livres', type=int, default=8)
+    parser.add_argument('-p', '--pages', type=int, default=250)
+    parser.add_argument('-j', '--processus', type=int, nargs='+', default=[0, 2, 4])
+    args = parser.parse_args()
+
+    versets = [ligne.strip() for ligne in lire_corpus(args.corpus).splitlines()
+               if ligne.isascii() and len(ligne) > 20 and ligne[0].isalpha() and 'Chapitre' not in ligne]
+    contexte = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as dossier:
+        print(f"⏳ Génération de {args.livres} PDF de {args.pages} pages...")
+        pdfs = []
+        for k in range(args.livres):
+            pdfs.append(os.path.join(dossier, f'livre-{k:02d}.pdf'))
+            generer_pdf(pdfs[-1], f'Boky {k}', versets, args.pages, k * 1000)
+
+        sorties = {}
+        for mode in ['ancien'] + [str(j) for j in args.processus]:
+            sorties[mode] = os.path.join(dossier, f'sortie-{mode}.txt')
+            file = contexte.Queue()
+            processus = contexte.Process(target=mesurer, args=(mode, pdfs, sorties[mode], file))
+            processus.start()
+            duree, pages, pic, enfants = file.get()
+            processus.join()
+            nom = 'ancienne' if mode == 'ancien' else f'cleaner -j {mode}'
+            print(f"⏳ {nom:12s} {pages} pages en {duree:6.2f} s : {pages / duree:6.0f} pages/s, "
+                  f"pic {pic:.0f} Mo (processus de travail {enfants:.0f} Mo)")
+
+        contenus = set()
+        for j in args.processus:
+            with open(sorties[str(j)], encoding='utf-8') as f:
+                contenus.add(f.read())
+        if len(contenus) != 1:
+            raise SystemExit("❌ Sorties différentes selon le nombre de processus")
+        print("✅ Sorties identiques quel que soit le nombre de processus")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Complétion : latence de l'index de préfixes contre le parcours du vocabulaire, avec `-n` mots
+
+Le vocabulaire réunit le corpus et `-n` mots synthétiques (100 000 par
+défaut, de syllabes malagasy, hors corpus). Les requêtes sont des préfixes
+de 1 à 4 caractères de mots du corpus, sans contexte puis avec les mots
+qui les précèdent ; les complétions sont d'abord comparées à celles du
+parcours complet.
+
+    python benchmarks/bench_completion.py cleaned_bible.txt -n 100000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from commun import chronometrer
+from completion import IndexCompletion
+from memoire_lexique import SYLLABES
+from ngrams import ModeleNgrams
+from tokeniseur import tokeniser
+
+
+def completer_parcours(index: IndexCompletion, prefixe: str, n: int, tokens=None):
+    """Ancienne complétion : tous les mots du vocabulaire testés, puis classés"""
+    modele = index.modele
+    mots = [mot for mot in index.mots if mot.startswith(prefixe)]
+    ids = np.array([modele.ids.get(mot, -1) for mot in mots], np.int64)
+    frequences = np.array([modele.unigrammes[i] / modele.nombre_mots if i >= 0 else 0.0 for i in ids])
+    lignes = modele._lignes(tokens) if tokens else []
+    if not lignes:
+        scores = frequences
+    else:
+        scores = np.zeros(len(mots))
+        scores[ids >= 0] = modele._scorer(lignes, ids[ids >= 0], 'kneser-ney')
+    ordre = np.lexsort((np.arange(len(mots)), -frequences, -scores))[:n]
+    return [(mots[i], scores[i]) for i in ordre.tolist()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default='cleaned_bible.txt')
+    parser.add_argument('-n', '--mots', type=int, default=100_000, help="mots synthétiques ajoutés")
+    parser.add_argument('-q', '--requetes', type=int, default=500)
+    parser.add_argument('-r', '--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    modele = ModeleNgrams.charger_ou_entrainer(args.corpus)
+    hasard = random.Random(0)
+    mots = set()
+    while len(mots) < args.mots:
+        mots.add(''.join(hasard.choice(SYLLABES) for _ in range(hasard.randint(2, 5))))
+
+    debut = time.perf_counter()
+    index = IndexCompletion(mots, modele)
+    print(f"⏳ Index de {len(index):,} mots construit en {time.perf_counter() - debut:.2f} s "
+          f"({len(index._etat.precalcul):,} préfixes précalculés)")
+
+    with open(args.corpus, 'r', encoding='utf-8') as f:
+        tokens = tokeniser(f.read(1 << 20))
+    positions = [hasard.randrange(3, len(tokens)) for _ in range(args.requetes)]
+    requetes = {
+        'sans contexte': [(tokens[i][:hasard.randint(1, 4)], None) for i in positions],
+        'avec contexte': [(tokens[i][:hasard.randint(1, 4)], tokens[i - 3:i]) for i in positions],
+    }
+
+    for nom, liste in requetes.items():
+        if [index.completer(p, 5, c) for p, c in liste] != [completer_parcours(index, p, 5, c) for p, c in liste]:
+            raise SystemExit(f"❌ Complétions {nom} différentes du parcours complet")
+    print(f"✅ Complétions identiques au parcours complet ({2 * args.requetes} requêtes)")
+
+    for nom, liste in requetes.items():
+        for methode, completer in (("index", index.completer),
+                                   ("parcours", lambda p, n, c: completer_parcours(index, p, n, c))):
+            temps, _ = chronometrer(lambda: [completer(p, 5, c) for p, c in liste], args.repetitions)
+            print(f"⏳ {nom:14s} {methode:9s} {temps / len(liste) * 1e6:9.1f} µs/requête")
+
+
+if __name__ == '__main__':
+    main()
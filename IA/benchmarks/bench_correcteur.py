@@ -0,0 +1,87 @@
+"""
+Correcteur : balayage complet contre index de candidats, selon la taille du dictionnaire
+
+Dictionnaires synthétiques de mots aléatoires ; les requêtes sont des mots
+du dictionnaire avec 1 à `-m` modifications. Les suggestions de l'index
+doivent être celles du balayage complet ; la part du dictionnaire encore
+scorée par fuzz.ratio est affichée.
+
+    python benchmarks/bench_correcteur.py -t 1000 10000 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from commun import chronometrer
+from corrector import CorrecteurMalagasy, SIMILARITE_MIN
+
+ALPHABET = 'abdefghijklmnoprstvyz'
+
+
+def generer_dictionnaire(taille: int, aleatoire: random.Random) -> list:
+    mots = set()
+    while len(mots) < taille:
+        mots.add(''.join(aleatoire.choice(ALPHABET) for _ in range(aleatoire.randint(4, 12))))
+    return sorted(mots)
+
+
+def deformer(mot: str, modifications: int, aleatoire: random.Random) -> str:
+    for _ in range(modifications):
+        i = aleatoire.randrange(len(mot))
+        operation = aleatoire.randrange(3)
+        if operation == 0:
+            mot = mot[:i] + aleatoire.choice(ALPHABET) + mot[i + 1:]
+        elif operation == 1:
+            mot = mot[:i] + aleatoire.choice(ALPHABET) + mot[i:]
+        elif len(mot) > 2:
+            mot = mot[:i] + mot[i + 1:]
+    return mot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-t', '--tailles', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('-q', '--requetes', type=int, default=200)
+    parser.add_argument('-m', '--modifications', type=int, default=2)
+    args = parser.parse_args()
+
+    aleatoire = random.Random(0)
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in args.tailles:
+            mots = generer_dictionnaire(taille, aleatoire)
+            chemin = os.path.join(dossier, f'dico_{taille}.json')
+            with open(chemin, 'w', encoding='utf-8') as f:
+                json.dump({mot: {} for mot in mots}, f)
+            ensemble = set(mots)
+            requetes = [deformer(aleatoire.choice(mots), aleatoire.randint(1, args.modifications), aleatoire)
+                        for _ in range(args.requetes)]
+            requetes = [r for r in requetes if r not in ensemble]
+
+            references = None
+            for index in (None, 'comptes'):
+                debut = time.process_time()
+                correcteur = CorrecteurMalagasy(chemin, index_candidats=index)
+                construction = time.process_time() - debut
+
+                temps, resultats = chronometrer(
+                    lambda: [correcteur._chercher_similaires(r) for r in requetes], 1)
+                if references is None:
+                    references = resultats
+                elif resultats != references:
+                    raise SystemExit(f"❌ Suggestions différentes du balayage complet ({index})")
+
+                scores = ''
+                if index is not None:
+                    n = sum(len(correcteur.index_candidats.candidats(r, SIMILARITE_MIN)) for r in requetes)
+                    scores = f"  mots scorés : {n / len(requetes) / taille:6.2%}"
+                print(f"⏳ {taille:7d} mots  {str(index):8s} construction {construction:6.2f} s  "
+                      f"{temps / len(requetes) * 1000:7.3f} ms/requête{scores}")
+            print(f"✅ Suggestions identiques au balayage complet ({len(requetes)} requêtes)")
+
+
+if __name__ == '__main__':
+    main()
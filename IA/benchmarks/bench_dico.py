@@ -0,0 +1,84 @@
+"""
+Recherches du dictionnaire : index du lexique contre parcours de toutes les entrées
+
+Dictionnaire synthétique de `-t` entrées ; chaque recherche indexée doit
+donner les mêmes mots, dans le même ordre, que le parcours complet.
+
+    python benchmarks/bench_dico.py -t 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from commun import chronometrer
+from dico import DictionnaireMalagasy
+
+TYPES = ['nom', 'verbe', 'adjectif', 'nom propre']
+SENTIMENTS = ['positif', 'negatif', 'neutre']
+ALPHABET = 'abdefghijklmnoprstvyz'
+
+
+def generer(taille: int, aleatoire: random.Random) -> dict:
+    vocabulaire = [''.join(aleatoire.choice(ALPHABET) for _ in range(aleatoire.randint(2, 9)))
+                   for _ in range(20000)]
+    return {
+        f'mot{i}': {
+            'definitions': [' '.join(aleatoire.choices(vocabulaire, k=aleatoire.randint(2, 8)))
+                            for _ in range(aleatoire.randint(1, 3))],
+            'type': aleatoire.choice(TYPES),
+            'Lemmatisation': f'racine{aleatoire.randrange(taille // 3 + 1)}',
+            'sentiment': aleatoire.choice(SENTIMENTS),
+        }
+        for i in range(taille)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-t', '--taille', type=int, default=100000)
+    parser.add_argument('-r', '--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    aleatoire = random.Random(0)
+    entrees = generer(args.taille, aleatoire)
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'dico.json')
+        with open(chemin, 'w', encoding='utf-8') as f:
+            json.dump(entrees, f)
+        dictionnaire = DictionnaireMalagasy(chemin)
+
+    items = dictionnaire.dictionnaire.items()
+    definition = entrees['mot0']['definitions'][0]
+    recherches = {
+        'type': (lambda: dictionnaire.rechercher_par_type('verbe'),
+                 lambda: [m for m, i in items if i.get('type') == 'verbe']),
+        'sentiment': (lambda: dictionnaire.rechercher_par_sentiment('positif'),
+                      lambda: [m for m, i in items if i.get('sentiment') == 'positif']),
+        'lemme': (lambda: dictionnaire.rechercher_par_lemme('racine7'),
+                  lambda: [m for m, i in items if i.get('Lemmatisation') == 'racine7']),
+    }
+    for nom, terme in (('mot entier', definition.split()[0]), ('partie de mot', definition[1:4]),
+                       ('expression', definition[2:12])):
+        recherches[f'définition ({nom})'] = (
+            lambda t=terme: dictionnaire.rechercher_definition(t),
+            lambda t=terme: [m for m, i in items if any(t in d.lower() for d in i['definitions'])])
+
+    # Index construits à la première recherche
+    dictionnaire.rechercher_par_lemme('')
+    dictionnaire.rechercher_definition('a')
+
+    for nom, (indexee, parcours) in recherches.items():
+        temps_index, resultat = chronometrer(indexee, args.repetitions)
+        temps_parcours, attendu = chronometrer(parcours, args.repetitions)
+        if resultat != attendu:
+            raise SystemExit(f"❌ Résultats différents : {nom}")
+        print(f"⏳ {nom:28s} parcours {temps_parcours * 1000:8.2f} ms  index {temps_index * 1000:8.3f} ms  "
+              f"({len(resultat)} mots)")
+    print("✅ Résultats identiques au parcours complet")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Dictionnaire binaire : démarrage et mémoire du lexique ouvert par mmap contre le JSON
+
+Le dictionnaire synthétique de memoire_lexique.py (`-n` entrées) est
+compilé au format binaire ; ses entrées sont d'abord comparées à celles
+du JSON. Chaque chargement tourne dans son propre processus : durée du
+démarrage, de obtenir_info() sur tous les mots, puis mémoire résidente
+ajoutée et sa part anonyme, propre au processus (le reste, pages du
+fichier mmap, est partagé entre les processus de travail par le cache
+de pages).
+
+    python benchmarks/bench_dico_binaire.py -n 100000
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from commun import DOSSIER_IA
+from memoire_lexique import generer_dictionnaire, memoire_residente
+from dico_binaire import CHAMPS_LISTE, CHAMPS_TEXTE, DictionnaireBinaire, compiler
+
+
+def memoire_anonyme() -> int:
+    """Pages anonymes (tas Python) : celles qu'aucun autre processus ne peut partager"""
+    with open('/proc/self/smaps_rollup') as f:
+        for ligne in f:
+            if ligne.startswith('Anonymous:'):
+                return int(ligne.split()[1]) * 1024
+    return 0
+
+
+def mesurer(chemin: str, file):
+    """Processus de mesure : (démarrage, mémoire résidente, mémoire anonyme, consultations)"""
+    os.chdir(DOSSIER_IA)
+    from lexique import Lexique
+    gc.collect()
+    residente, anonyme = memoire_residente(), memoire_anonyme()
+    debut = time.perf_counter()
+    lexique = Lexique(chemin)
+    demarrage = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    for mot in lexique.mots:
+        lexique.obtenir_info(mot)
+    consultations = time.perf_counter() - debut
+    gc.collect()
+    file.put((demarrage, memoire_residente() - residente, memoire_anonyme() - anonyme, consultations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--entrees', type=int, default=100_000)
+    args = parser.parse_args()
+
+    contexte = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin_json = os.path.join(dossier, 'dictionnaire.json')
+        chemin_binaire = os.path.join(dossier, 'dictionnaire.bin')
+        generer_dictionnaire(chemin_json, args.entrees)
+        debut = time.perf_counter()
+        compiler(chemin_json, chemin_binaire)
+        print(f"⏳ {args.entrees:,} entrées compilées en {time.perf_counter() - debut:.2f} s : "
+              f"JSON {os.path.getsize(chemin_json) / 1e6:.1f} Mo, "
+              f"binaire {os.path.getsize(chemin_binaire) / 1e6:.1f} Mo")
+
+        with open(chemin_json, 'r', encoding='utf-8') as f:
+            source = json.load(f)
+        binaire = DictionnaireBinaire(chemin_binaire)
+        champs = CHAMPS_TEXTE + CHAMPS_LISTE
+        if len(binaire) != len(source) or any(
+                binaire.get(mot) != {k: v for k, v in info.items() if k in champs}
+                for mot, info in source.items()):
+            raise SystemExit("❌ Entrées du binaire différentes du JSON")
+        binaire.fermer()
+        print(f"✅ Entrées identiques au JSON ({len(source):,} mots)")
+        del source
+
+        for nom, chemin in (('JSON', chemin_json), ('binaire mmap', chemin_binaire)):
+            file = contexte.Queue()
+            processus = contexte.Process(target=mesurer, args=(chemin, file))
+            processus.start()
+            demarrage, residente, anonyme, consultations = file.get()
+            processus.join()
+            print(f"⏳ {nom:12s} démarrage {demarrage:5.2f} s  obtenir_info "
+                  f"{consultations / args.entrees * 1e6:5.2f} µs  +{residente / 1e6:6.1f} Mo résidents "
+                  f"dont {anonyme / 1e6:6.1f} Mo non partageables")
+
+
+if __name__ == '__main__':
+    main()
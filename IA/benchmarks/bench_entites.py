@@ -0,0 +1,103 @@
+"""
+Entités nommées : compilation et débit de l'automate d'Aho-Corasick contre une recherche naïve
+
+Des noms synthétiques (`-n`, 100 000 par défaut) sont ajoutés aux noms
+propres du dictionnaire et semés dans le corpus (un mot sur 50) ; les
+mentions de l'automate sont d'abord comparées à celles de la recherche
+naïve, qui essaie tous les noms possibles à chaque mot.
+
+    python benchmarks/bench_entites.py cleaned_bible.txt -n 100000
+    python benchmarks/bench_entites.py -g noms.tsv      (fichier nom<TAB>catégorie)
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from commun import chronometrer, lire_corpus
+from entites import CATEGORIES, IndexEntites, _sans_chevauchement
+from lexique import obtenir_lexique
+from tokeniseur import iterer_segments, iterer_tokens
+
+
+def generer_noms(nombre: int, graine: int = 0) -> list:
+    """Noms synthétiques de 1 à 3 mots, de syllabes malagasy, et leur catégorie"""
+    hasard = random.Random(graine)
+    syllabes = [c + v for c in ('', 'b', 'd', 'f', 'h', 'k', 'l', 'm', 'n', 'r', 's', 't', 'v', 'z',
+                                'ts', 'tr', 'dr', 'mb', 'nd', 'ny')
+                for v in 'aeioy']
+
+    def mot():
+        return ''.join(hasard.choice(syllabes) for _ in range(hasard.randint(2, 5))).capitalize()
+
+    noms = {}
+    while len(noms) < nombre:
+        noms[' '.join(mot() for _ in range(hasard.choice((1, 1, 2, 2, 3))))] = hasard.choice(CATEGORIES)
+    return list(noms.items())
+
+
+def reperer_naif(index: IndexEntites, texte: str) -> list:
+    """Référence : à chaque mot, tous les noms possibles y sont cherchés un par un"""
+    longueur_max = max(map(len, index.noms), default=0)
+    candidats = []
+    for debut, fin in iterer_segments(texte):
+        tokens = list(iterer_tokens(texte, debut, fin))
+        mots = [mot for _, _, mot in tokens]
+        for i in range(len(tokens)):
+            for longueur in range(1, min(longueur_max, len(tokens) - i) + 1):
+                entite = index.noms.get(tuple(mots[i:i + longueur]))
+                if entite is not None and texte[tokens[i][0]].isupper():
+                    candidats.append((tokens[i][0], tokens[i + longueur - 1][1], entite))
+    return [
+        {'debut': d, 'fin': f, 'texte': texte[d:f], 'entite': entite[0], 'categorie': entite[1]}
+        for d, f, entite in _sans_chevauchement(candidats)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default='cleaned_bible.txt')
+    parser.add_argument('-n', '--noms', type=int, default=100_000, help="noms synthétiques ajoutés")
+    parser.add_argument('-g', '--gazetteer', help="fichier de noms (nom<TAB>catégorie) ajouté au dictionnaire")
+    parser.add_argument('-r', '--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    index = IndexEntites(obtenir_lexique())
+    if args.gazetteer:
+        print(f"⏳ {index.charger(args.gazetteer)} noms lus dans {args.gazetteer}")
+    lignes = lire_corpus(args.corpus).splitlines(keepends=True)
+    if args.noms:
+        noms = generer_noms(args.noms)
+        for nom, categorie in noms:
+            index.ajouter(nom, categorie)
+        hasard = random.Random(1)
+        lignes = [' '.join(hasard.choice(noms)[0] if hasard.random() < 0.02 else mot
+                           for mot in ligne.split(' '))
+                  for ligne in lignes]
+    texte = ''.join(lignes)
+
+    debut = time.perf_counter()
+    index._compiler()
+    duree = time.perf_counter() - debut
+    # Mémoire mesurée à part : tracemalloc ralentit la compilation
+    tracemalloc.start()
+    automate = index._obtenir_automate()
+    memoire = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"⏳ {len(index):,} noms compilés en {duree:.2f} s ({len(automate[0]):,} états, "
+          f"{memoire / 2**20:.0f} Mio)")
+
+    mentions = index.reperer(texte)
+    if mentions != reperer_naif(index, texte):
+        raise SystemExit("❌ Mentions différentes de la recherche naïve")
+    print(f"✅ Mentions identiques à la recherche naïve ({len(mentions):,} mentions)")
+
+    taille = len(texte.encode()) / 1e6
+    for nom, reperer in (("Aho-Corasick", index.reperer), ("recherche naïve", lambda t: reperer_naif(index, t))):
+        temps, _ = chronometrer(lambda: reperer(texte), args.repetitions)
+        print(f"⏳ {nom:16s} {taille / temps:6.1f} Mo/s")
+
+
+if __name__ == '__main__':
+    main()
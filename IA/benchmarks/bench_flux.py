@@ -0,0 +1,123 @@
+"""
+Analyse en flux : premier octet, durée et pic de mémoire de /api/analyser-texte/flux contre /api/analyser-texte
+
+Pour chaque mesure, une API est lancée (uvicorn, port --port) puis
+reçoit un texte de `-f` copies du corpus ; le pic de mémoire résidente
+(Linux : /proc) est celui du serveur et de ses processus de travail.
+Le flux est d'abord comparé à l'analyse complète, dans ce processus.
+
+    python benchmarks/bench_flux.py cleaned_bible.txt -f 1 10
+"""
+
+import argparse
+import glob
+import json
+import subprocess
+import sys
+import time
+
+import httpx
+
+from commun import DOSSIER_IA, lire_corpus
+
+ROUTES = ('/api/analyser-texte', '/api/analyser-texte/flux')
+
+
+def verifier(texte: str):
+    """Segments du flux mis bout à bout et ligne finale contre analyser_texte_complet"""
+    from nlp_malagasy import nlp
+    complet = nlp.analyser_texte_complet(texte)
+    *segments, final = nlp.analyser_texte_flux(texte)
+    for champ in ('tokens', 'lemmes', 'pos_tags'):
+        if [valeur for segment in segments for valeur in segment[champ]] != complet[champ]:
+            raise SystemExit(f"❌ Flux différent de l'analyse complète : {champ}")
+    for champ in ('entites', 'sentiment', 'statistiques'):
+        if final[champ] != complet[champ]:
+            raise SystemExit(f"❌ Flux différent de l'analyse complète : {champ}")
+    print(f"✅ Flux identique à l'analyse complète ({len(segments):,} segments)")
+
+
+def processus(pid: int) -> list:
+    """Le processus et tous ses descendants"""
+    pids = [pid]
+    for fichier in glob.glob(f'/proc/{pid}/task/*/children'):
+        with open(fichier) as f:
+            for enfant in f.read().split():
+                pids += processus(int(enfant))
+    return pids
+
+
+def memoire(pid: int, champ: str) -> int:
+    """VmRSS (courante) ou VmHWM (pic) d'un processus, en Mo"""
+    with open(f'/proc/{pid}/status') as f:
+        for ligne in f:
+            if ligne.startswith(champ):
+                return int(ligne.split()[1]) // 1024
+    return 0
+
+
+def mesurer(route: str, texte: str, echauffement: str, port: int):
+    serveur = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port)],
+                               cwd=DOSSIER_IA, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f'http://127.0.0.1:{port}', timeout=600) as client:
+            while True:
+                try:
+                    client.get('/health')
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.3)
+            # Chauffe : processus de travail lancés, caches remplis
+            for chemin in ROUTES:
+                client.post(chemin, json={'texte': echauffement}).read()
+
+            pids = processus(serveur.pid)
+            avant = {pid: memoire(pid, 'VmRSS') for pid in pids}
+            for pid in pids:
+                # Le pic de mémoire repart de la mémoire courante
+                with open(f'/proc/{pid}/clear_refs', 'w') as f:
+                    f.write('5')
+
+            corps = json.dumps({'texte': texte})
+            debut = time.perf_counter()
+            premier = None
+            octets = lignes = 0
+            with client.stream('POST', route, content=corps,
+                               headers={'content-type': 'application/json'}) as reponse:
+                reponse.raise_for_status()
+                for morceau in reponse.iter_bytes():
+                    if premier is None:
+                        premier = time.perf_counter() - debut
+                    octets += len(morceau)
+                    lignes += morceau.count(b'\n')
+            total = time.perf_counter() - debut
+            pics = {pid: memoire(pid, 'VmHWM') for pid in pids}
+    finally:
+        serveur.terminate()
+        serveur.wait()
+
+    hausse = sum(pics[pid] - avant[pid] for pid in pids)
+    print(f"⏳ {route:26s} {len(texte) / 1e6:6.2f} Mo  premier octet {premier * 1000:8.1f} ms  "
+          f"total {total:6.2f} s  réponse {octets / 1e6:6.1f} Mo ({lignes} lignes)  "
+          f"pic {sum(pics.values())} Mo (+{hausse} Mo)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default='cleaned_bible.txt')
+    parser.add_argument('-f', '--facteurs', type=int, nargs='+', default=[1, 10],
+                        help="tailles du texte (copies du corpus)")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    corpus = lire_corpus(args.corpus)
+    verifier(corpus)
+    for facteur in args.facteurs:
+        texte = '\n'.join([corpus] * facteur)
+        for route in ROUTES:
+            mesurer(route, texte, corpus[:25000], args.port)
+    print("✅ Mesures terminées")
+
+
+if __name__ == '__main__':
+    main()
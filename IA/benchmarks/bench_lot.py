@@ -0,0 +1,111 @@
+"""
+Traitement par lots : débit de analyser_lot contre l'analyse document par document
+
+Les documents sont les lignes du corpus (un verset par document) ; le lot
+est traité par tranches de 1, 10, 100... documents, comme autant d'appels
+à l'API /api/lot/*. Les résultats sont d'abord comparés à ceux de
+l'analyse document par document.
+
+Dans le processus, seul le sentiment (vectorisé sur le lot) gagne à être
+groupé ; avec --url, la même mesure passe par une API lancée à part, où
+chaque requête HTTP a aussi son coût fixe.
+
+    python benchmarks/bench_lot.py cleaned_bible.txt -n 20000
+    uvicorn main:app --port 8765 &
+    python benchmarks/bench_lot.py -n 5000 --url http://127.0.0.1:8765
+"""
+
+import argparse
+import time
+
+import httpx
+
+from commun import chronometrer, lire_corpus
+from nlp_malagasy import nlp, CHAMPS_LOT
+
+# Route /api/lot/* -> champs calculés
+ROUTES = {
+    'lemmatiser': ('tokens', 'lemmes'),
+    'pos-tag': ('pos_tags',),
+    'sentiment': ('sentiment',),
+}
+
+
+def analyser_par_document(textes, champs):
+    resultats = []
+    for texte in textes:
+        tokens = nlp.tokenize(texte)
+        analyse = {
+            'tokens': tokens,
+            'lemmes': [nlp.lemmatiser(token) for token in tokens] if 'lemmes' in champs else None,
+            'pos_tags': nlp.pos_tag(tokens) if 'pos_tags' in champs else None,
+            'sentiment': nlp.analyser_sentiment(texte) if 'sentiment' in champs else None,
+        }
+        resultats.append({champ: analyse[champ] for champ in champs})
+    return resultats
+
+
+def analyser_par_lots(textes, champs, taille):
+    resultats = []
+    for debut in range(0, len(textes), taille):
+        resultats.extend(nlp.analyser_lot(textes[debut:debut + taille], champs))
+    return resultats
+
+
+def mesurer_api(url: str, documents: list):
+    """Débit par l'API : une requête par document, puis /api/lot/* par lots"""
+    with httpx.Client(base_url=url, timeout=600) as client:
+        # Chauffe : modules chargés dans les processus de travail
+        client.post('/api/lot/sentiment', json={'textes': documents}).raise_for_status()
+
+        nombre = min(len(documents), 2000)
+        debut = time.perf_counter()
+        for texte in documents[:nombre]:
+            client.post('/api/sentiment', json={'texte': texte}).raise_for_status()
+        print(f"⏳ API /api/sentiment      un document par requête : "
+              f"{nombre / (time.perf_counter() - debut):10,.0f} docs/s")
+
+        for route in ROUTES:
+            for taille in (1, 10, 100, 1000, 10000):
+                nombre = min(len(documents), max(taille * 5, 2000))
+                debut = time.perf_counter()
+                for i in range(0, nombre, taille):
+                    lot = documents[i:i + taille]
+                    reponse = client.post(f'/api/lot/{route}', json={'textes': lot})
+                    reponse.raise_for_status()
+                    if reponse.json()['nombre_documents'] != len(lot):
+                        raise SystemExit(f"❌ /api/lot/{route} : nombre de documents incorrect")
+                print(f"⏳ API /api/lot/{route:10s} lots de {taille:>5}        : "
+                      f"{nombre / (time.perf_counter() - debut):10,.0f} docs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default='cleaned_bible.txt')
+    parser.add_argument('-n', '--documents', type=int, default=20000)
+    parser.add_argument('-r', '--repetitions', type=int, default=3)
+    parser.add_argument('--url', help="mesure aussi par l'API lancée à cette adresse")
+    args = parser.parse_args()
+
+    lignes = [ligne for ligne in lire_corpus(args.corpus).splitlines() if ligne.strip()]
+    documents = (lignes * (args.documents // max(len(lignes), 1) + 1))[:args.documents]
+
+    if nlp.analyser_lot(documents, CHAMPS_LOT) != analyser_par_document(documents, CHAMPS_LOT):
+        raise SystemExit("❌ Résultats du lot différents de l'analyse document par document")
+    print(f"✅ Résultats identiques sur {len(documents):,} documents")
+
+    for route, champs in ROUTES.items():
+        temps, _ = chronometrer(lambda: analyser_par_document(documents, champs), args.repetitions)
+        print(f"⏳ /api/lot/{route:10s} document par document : {len(documents) / temps:10,.0f} docs/s")
+        for taille in (10, 100, 1000, 10000):
+            if taille > len(documents):
+                break
+            temps, _ = chronometrer(lambda: analyser_par_lots(documents, champs, taille), args.repetitions)
+            print(f"⏳ /api/lot/{route:10s} lots de {taille:>5}        : {len(documents) / temps:10,.0f} docs/s")
+
+    if args.url:
+        mesurer_api(args.url, documents)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Prédiction du mot suivant : n meilleurs candidats contre tri de tout le vocabulaire
+
+predire() ne score que les successeurs connus du contexte et les n
+meilleurs mots unigrammes ; la référence score tout le vocabulaire et le
+trie. Les deux doivent donner les mêmes prédictions, sur chaque contexte
+distinct du corpus.
+
+    python benchmarks/bench_prediction.py cleaned_bible.txt -n 5
+"""
+
+import argparse
+
+import numpy as np
+
+from commun import chronometrer, lire_corpus
+from ngrams import LISSAGES, ModeleNgrams
+from tokeniseur import tokeniser
+
+
+def predire_exhaustif(modele: ModeleNgrams, tokens, n: int, lissage: str):
+    """Référence : score de tout le vocabulaire, puis tri complet"""
+    candidats = np.arange(len(modele.vocabulaire), dtype=np.int32)
+    scores = modele._scorer(modele._lignes(tokens), candidats, lissage)
+    meilleurs = np.lexsort((candidats, -scores))[:n]
+    return [(modele.vocabulaire[i], float(scores[i])) for i in meilleurs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default='cleaned_bible.txt')
+    parser.add_argument('-n', '--limite', type=int, default=5)
+    parser.add_argument('-r', '--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    modele = ModeleNgrams.charger_ou_entrainer(args.corpus)
+    tokens = tokeniser(lire_corpus(args.corpus))
+    marge = modele.ordre - 1
+    contextes = list({tuple(tokens[max(0, i - marge):i]) for i in range(1, len(tokens))})
+    print(f"⏳ {len(contextes)} contextes distincts, vocabulaire de {len(modele.vocabulaire)} mots")
+
+    for lissage in LISSAGES:
+        for contexte in contextes:
+            if modele.predire(list(contexte), args.limite, lissage) != \
+                    predire_exhaustif(modele, list(contexte), args.limite, lissage):
+                raise SystemExit(f"❌ Prédictions différentes ({lissage}) après {contexte}")
+        print(f"✅ Prédictions identiques ({lissage})")
+
+        temps_n, _ = chronometrer(
+            lambda: [modele.predire(list(c), args.limite, lissage) for c in contextes], args.repetitions)
+        temps_tri, _ = chronometrer(
+            lambda: [predire_exhaustif(modele, list(c), args.limite, lissage) for c in contextes],
+            args.repetitions)
+        print(f"⏳ {lissage:15s} tri complet {temps_tri / len(contextes) * 1e6:7.1f} µs/appel  "
+              f"predire {temps_n / len(contextes) * 1e6:7.1f} µs/appel  (x{temps_tri / temps_n:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Sentiment : débit du moteur vectorisé, document par document et par lot
+
+Un document par ligne du corpus. L'ancien calcul (comptage des mots
+positifs et négatifs, sans négation ni intensificateurs) sert de
+référence de débit ; le lot est d'abord comparé aux documents un par un.
+
+    python benchmarks/bench_sentiment.py cleaned_bible.txt
+"""
+
+import argparse
+
+from commun import chronometrer, lire_corpus
+from lexique import obtenir_lexique
+from sentiment_analyzer import MoteurSentiment
+from tokeniseur import tokeniser, tokeniser_phrases
+
+
+def compter(textes, sentiments):
+    """Ancien calcul : nombre de mots de chaque sentiment"""
+    resultats = []
+    for texte in textes:
+        compte = {'positif': 0, 'negatif': 0, 'neutre': 0}
+        for mot in tokeniser(texte):
+            if sentiments.get(mot) in compte:
+                compte[sentiments[mot]] += 1
+        resultats.append(compte)
+    return resultats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default='cleaned_bible.txt')
+    parser.add_argument('-r', '--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    lexique = obtenir_lexique()
+    moteur = MoteurSentiment(lexique)
+    textes = [ligne for ligne in lire_corpus(args.corpus).splitlines() if ligne.strip()]
+    documents = [tokeniser_phrases(texte) for texte in textes]
+
+    if moteur.analyser_lot(documents) != [moteur.analyser(*document) for document in documents]:
+        raise SystemExit("❌ Lot différent de l'analyse document par document")
+    print(f"✅ Lot identique à l'analyse document par document ({len(textes):,} documents)")
+
+    sentiments = {mot: info.get('sentiment') for mot, info in lexique.dictionnaire.items()}
+    mesures = (
+        ("comptage (ancien calcul)", lambda: compter(textes, sentiments)),
+        ("document par document", lambda: [moteur.analyser(*tokeniser_phrases(t)) for t in textes]),
+        ("par lot", lambda: moteur.analyser_lot([tokeniser_phrases(t) for t in textes])),
+    )
+    for nom, fonction in mesures:
+        temps, _ = chronometrer(fonction, args.repetitions)
+        print(f"⏳ {nom:26s} {len(textes) / temps:12,.0f} documents/s")
+
+
+if __name__ == '__main__':
+    main()
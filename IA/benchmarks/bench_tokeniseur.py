@@ -0,0 +1,80 @@
+"""
+Tokeniseur : débit (tokens/s) et pic d'allocation contre les anciens découpages
+
+Le corpus est répété `-x` fois. Les anciens découpages (minuscules du
+texte entier puis findall pour NLPMalagasy, finditer puis minuscules mot
+par mot pour le correcteur) sont d'abord comparés au tokeniseur partagé,
+les apostrophes typographiques redressées. Le pic d'allocation est mesuré
+par tracemalloc, dans une passe à part (il ralentit les allocations).
+
+    python benchmarks/bench_tokeniseur.py cleaned_bible.txt -x 4
+"""
+
+import argparse
+import re
+import tracemalloc
+
+from commun import chronometrer, lire_corpus
+from tokeniseur import iterer_tokens, normaliser, tokeniser, tokeniser_phrases
+
+ANCIEN_NLP = re.compile(r"\b[\w']+\b")
+ANCIEN_MOT = re.compile(r'\b\w+\b')
+
+
+def ancien_nlp(texte: str) -> list:
+    return ANCIEN_NLP.findall(texte.lower())
+
+
+def anciennes_positions(texte: str) -> list:
+    return [(m.start(), m.end(), m.group().lower()) for m in ANCIEN_MOT.finditer(texte)]
+
+
+def parcourir(tokens) -> int:
+    """Consomme un flux de tokens sans le garder en mémoire"""
+    nombre = 0
+    for _ in tokens:
+        nombre += 1
+    return nombre
+
+
+def pic_allocation(fonction) -> int:
+    tracemalloc.start()
+    try:
+        fonction()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?', default='cleaned_bible.txt')
+    parser.add_argument('-x', '--repetitions-corpus', type=int, default=4)
+    parser.add_argument('-r', '--repetitions', type=int, default=5)
+    args = parser.parse_args()
+
+    texte = lire_corpus(args.corpus) * args.repetitions_corpus
+    redresse = normaliser(texte)
+    if tokeniser(texte) != ANCIEN_NLP.findall(redresse):
+        raise SystemExit("❌ Tokens différents de l'ancien tokeniseur de NLPMalagasy")
+    if [p for mot in tokeniser(texte) for p in mot.split("'")] != ANCIEN_MOT.findall(redresse):
+        raise SystemExit("❌ Tokens différents de l'ancien découpage du correcteur")
+    nombre = len(tokeniser(texte))
+    print(f"✅ Tokens identiques aux anciens découpages ({nombre:,} tokens)")
+
+    mesures = (
+        ("ancien NLP (lower + findall)", lambda: ancien_nlp(texte)),
+        ("tokeniser", lambda: tokeniser(texte)),
+        ("tokeniser_phrases", lambda: tokeniser_phrases(texte)),
+        ("ancien correcteur (positions)", lambda: anciennes_positions(texte)),
+        ("iterer_tokens, en liste", lambda: list(iterer_tokens(texte))),
+        ("iterer_tokens, en flux", lambda: parcourir(iterer_tokens(texte))),
+    )
+    for nom, fonction in mesures:
+        temps, _ = chronometrer(fonction, args.repetitions)
+        pic = pic_allocation(fonction)
+        print(f"⏳ {nom:30s} {nombre / temps / 1e6:5.2f} M tokens/s  pic {pic / 1e6:6.1f} Mo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Latence des petites requêtes pendant l'analyse de gros documents (API lancée à part)
+
+Des clients envoient en boucle des prédictions de mot suivant pendant que
+d'autres analysent de gros documents ; avec l'exécution hors de la boucle
+d'événements, la latence des petites requêtes reste stable.
+
+    uvicorn main:app --port 8765 &
+    python benchmarks/charge_api.py --url http://127.0.0.1:8765 -c cleaned_bible.txt
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from commun import lire_corpus
+
+
+async def mesurer(url: str, gros_texte: str, gros: int, petits: int, analyses: int) -> list:
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        # Chauffe : modules chargés dans les processus de travail
+        await client.post('/api/analyser-texte', json={'texte': gros_texte})
+
+        latences = []
+        termine = False
+
+        async def analyser():
+            for _ in range(analyses):
+                reponse = await client.post('/api/analyser-texte', json={'texte': gros_texte})
+                reponse.raise_for_status()
+
+        async def predire():
+            while not termine:
+                debut = time.perf_counter()
+                reponse = await client.post('/api/predire-mot-suivant', json={'contexte': 'ary hoy'})
+                reponse.raise_for_status()
+                latences.append(time.perf_counter() - debut)
+
+        taches = [asyncio.create_task(predire()) for _ in range(petits)]
+        await asyncio.gather(*(analyser() for _ in range(gros)))
+        termine = True
+        await asyncio.gather(*taches)
+        stats = (await client.get('/api/stats')).json()['stats']
+        print(f"⏳ Cache du correcteur (tous processus) : {stats['cache_correcteur']}")
+        return sorted(latences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('-c', '--corpus', default='cleaned_bible.txt')
+    parser.add_argument('-f', '--facteur', type=int, default=3,
+                        help="taille du gros document (copies du corpus)")
+    parser.add_argument('-g', '--gros', type=int, default=2, help="clients de gros documents")
+    parser.add_argument('-p', '--petits', type=int, default=4, help="clients de petites requêtes")
+    parser.add_argument('-a', '--analyses', type=int, default=6, help="analyses par client")
+    args = parser.parse_args()
+
+    gros_texte = lire_corpus(args.corpus) * args.facteur
+    latences = asyncio.run(mesurer(args.url, gros_texte, args.gros, args.petits, args.analyses))
+    if not latences:
+        raise SystemExit("❌ Aucune petite requête mesurée")
+
+    def centile(p):
+        return latences[min(int(len(latences) * p), len(latences) - 1)] * 1000
+
+    print(f"✅ {len(latences)} petites requêtes : p50 {centile(0.5):.1f} ms, "
+          f"p99 {centile(0.99):.1f} ms, max {latences[-1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Frappe simulée : requêtes HTTP par touche contre le canal WebSocket de l'éditeur (API lancée à part)
+
+Chaque client tape une phrase du corpus, touche par touche (avec des
+rafales), et demande à chaque touche une prédiction et une correction, à
+chaque fin de mot le sentiment. En HTTP, chaque touche coûte ses calculs ;
+sur le canal, les requêtes périmées ne sont pas calculées. La latence
+mesurée est celle de la réponse à la dernière touche de chaque mot.
+
+    uvicorn main:app --port 8765 &
+    python benchmarks/charge_canal.py --url http://127.0.0.1:8765 -n 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+import websockets
+
+from commun import lire_corpus
+
+
+class Mesures:
+    def __init__(self):
+        self.envoyees = 0
+        self.calculees = 0
+        self.latences = []
+
+
+def frappes(phrase: str):
+    """(texte tapé, fin de mot ?) après chaque touche"""
+    for i in range(1, len(phrase) + 1):
+        yield phrase[:i], i == len(phrase) or phrase[i] == ' '
+
+
+def requetes(courant: str, fin_mot: bool) -> list:
+    """(type du canal, route HTTP, corps) des requêtes d'une touche"""
+    mot = courant.split(' ')[-1] or courant.strip()
+    liste = [('prediction', '/api/predire-mot-suivant', {'contexte': courant, 'limite': 5}),
+             ('correction', '/api/corriger', {'texte': mot})]
+    if fin_mot:
+        liste.append(('sentiment', '/api/sentiment', {'texte': courant}))
+    return liste
+
+
+async def taper_http(client, phrase: str, pause, mesures: Mesures):
+    async def envoyer(route, corps, finale):
+        debut = time.perf_counter()
+        reponse = await client.post(route, json=corps)
+        reponse.raise_for_status()
+        mesures.calculees += 1
+        if finale:
+            mesures.latences.append(time.perf_counter() - debut)
+
+    taches = []
+    for courant, fin_mot in frappes(phrase):
+        for _, route, corps in requetes(courant, fin_mot):
+            mesures.envoyees += 1
+            taches.append(asyncio.create_task(envoyer(route, corps, fin_mot)))
+        await asyncio.sleep(pause())
+    await asyncio.gather(*taches)
+
+
+async def taper_canal(url: str, phrase: str, pause, mesures: Mesures):
+    async with websockets.connect(url.replace('http', 'ws', 1) + '/ws/editeur', max_size=None) as ws:
+        envois = {}
+        finales = set()
+
+        async def lire():
+            async for brut in ws:
+                reponse = json.loads(brut)
+                if 'erreur' in reponse:
+                    raise RuntimeError(reponse['erreur'])
+                mesures.calculees += 1
+                if reponse['id'] in finales:
+                    mesures.latences.append(time.perf_counter() - envois[reponse['id']])
+
+        lecteur = asyncio.create_task(lire())
+        identifiant = 0
+        for courant, fin_mot in frappes(phrase):
+            for type_requete, _, corps in requetes(courant, fin_mot):
+                identifiant += 1
+                envois[identifiant] = time.perf_counter()
+                if fin_mot:
+                    finales.add(identifiant)
+                mesures.envoyees += 1
+                await ws.send(json.dumps({'id': identifiant, 'type': type_requete, **corps}))
+            await asyncio.sleep(pause())
+        # Les dernières réponses arrivent après la dernière touche
+        await asyncio.sleep(2)
+        lecteur.cancel()
+
+
+async def mesurer(mode: str, url: str, phrases: list, intervalle: float) -> Mesures:
+    aleatoire = random.Random(1)
+
+    def pause():
+        # Rafale (une touche sur cinq) ou frappe normale avec gigue
+        if aleatoire.random() < 0.2:
+            return aleatoire.uniform(0.005, 0.02)
+        return aleatoire.uniform(0.5, 1.5) * intervalle
+
+    mesures = Mesures()
+    if mode == 'http':
+        async with httpx.AsyncClient(base_url=url, timeout=600,
+                                     limits=httpx.Limits(max_connections=len(phrases))) as client:
+            await asyncio.gather(*(taper_http(client, p, pause, mesures) for p in phrases))
+    else:
+        await asyncio.gather(*(taper_canal(url, p, pause, mesures) for p in phrases))
+    return mesures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('-c', '--corpus', default='cleaned_bible.txt')
+    parser.add_argument('-n', '--clients', type=int, default=20, help="éditeurs simultanés")
+    parser.add_argument('-i', '--intervalle', type=float, default=0.1,
+                        help="intervalle moyen entre deux touches (s)")
+    parser.add_argument('-m', '--mode', choices=('http', 'canal', 'les-deux'), default='les-deux')
+    args = parser.parse_args()
+
+    aleatoire = random.Random(0)
+    lignes = [l for l in lire_corpus(args.corpus).splitlines() if 40 <= len(l) <= 80]
+    phrases = [aleatoire.choice(lignes) for _ in range(args.clients)]
+
+    for mode in ('http', 'canal') if args.mode == 'les-deux' else (args.mode,):
+        debut = time.perf_counter()
+        mesures = asyncio.run(mesurer(mode, args.url, phrases, args.intervalle))
+        duree = time.perf_counter() - debut
+        latences = sorted(mesures.latences)
+        if not latences:
+            raise SystemExit(f"❌ {mode} : aucune réponse à une fin de mot")
+
+        def centile(p):
+            return latences[min(int(len(latences) * p), len(latences) - 1)] * 1000
+
+        print(f"⏳ {mode:5s} {args.clients} clients : {mesures.envoyees} requêtes, "
+              f"{mesures.calculees} réponses en {duree:.1f} s ; fin de mot p50 {centile(0.5):.0f} ms, "
+              f"p95 {centile(0.95):.0f} ms")
+
+    stats = httpx.get(args.url + '/api/stats').json()['stats']
+    print(f"✅ Canal de l'éditeur (serveur) : {stats['canal_editeur']}")
+
+
+if __name__ == '__main__':
+    main()
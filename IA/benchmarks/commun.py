@@ -0,0 +1,40 @@
+"""
+Outils communs des scripts de mesure (lancer `python benchmarks/<script>.py` depuis IA/)
+
+Les modules du backend s'importent à plat et chargent leurs fichiers
+(dictionary.json, cleaned_bible.txt) depuis le dossier IA/.
+"""
+
+import os
+import sys
+import time
+from typing import Callable, Tuple
+
+DOSSIER_IA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, DOSSIER_IA)
+os.chdir(DOSSIER_IA)
+
+
+def chronometrer(fonction: Callable, repetitions: int = 5) -> Tuple[float, object]:
+    """
+    Meilleur temps CPU (secondes) de `repetitions` appels à fonction()
+
+    Le temps CPU du processus est moins sensible que l'horloge murale
+    à la charge de la machine ; le meilleur essai écarte les perturbations.
+
+    Returns:
+        (meilleur temps, résultat du dernier appel)
+    """
+    meilleur = float('inf')
+    resultat = None
+    for _ in range(repetitions):
+        debut = time.process_time()
+        resultat = fonction()
+        meilleur = min(meilleur, time.process_time() - debut)
+    return meilleur, resultat
+
+
+def lire_corpus(chemin: str) -> str:
+    with open(chemin, 'r', encoding='utf-8') as f:
+        return f.read()
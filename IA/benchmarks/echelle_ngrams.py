@@ -0,0 +1,67 @@
+"""
+Entraînement n-grams : durée selon le nombre de processus contre l'entraînement séquentiel
+
+Le corpus de test répète cleaned_bible.txt jusqu'à `-t` Mo (voir
+memoire_ngrams.py). Chaque modèle entraîné sur plusieurs processus est
+d'abord comparé au modèle séquentiel (vocabulaire, unigrammes et tables) ;
+les durées sont en temps réel, le comptage étant réparti sur plusieurs
+processus. Le gain est borné par le nombre de cœurs de la machine et par
+la fusion des comptes, faite dans le processus principal.
+
+    python benchmarks/echelle_ngrams.py -t 100 -j 1 2 4 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import commun  # noqa: F401 (chemins du dossier IA)
+from memoire_ngrams import generer_corpus
+from ngrams import CHAMPS_TABLE, ModeleNgrams
+
+
+def identiques(a: ModeleNgrams, b: ModeleNgrams) -> bool:
+    return (a.vocabulaire == b.vocabulaire and a.nombre_mots == b.nombre_mots
+            and np.array_equal(a.unigrammes, b.unigrammes)
+            and all(np.array_equal(getattr(a.tables[k], champ), getattr(b.tables[k], champ))
+                    for k in a.tables for champ in CHAMPS_TABLE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-t', '--taille', type=int, default=100, help="taille du corpus (Mo)")
+    parser.add_argument('-c', '--corpus', help="corpus existant (au lieu du corpus généré)")
+    parser.add_argument('-n', '--ordre', type=int, default=4)
+    parser.add_argument('-j', '--processus', type=int, nargs='+',
+                        default=sorted({2, 4, os.cpu_count() or 1} - {1}))
+    args = parser.parse_args()
+
+    print(f"⏳ {os.cpu_count()} cœurs disponibles")
+    with tempfile.TemporaryDirectory() as dossier:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = os.path.join(dossier, 'corpus.txt')
+            print(f"⏳ Génération d'un corpus de {args.taille} Mo...")
+            generer_corpus(corpus, args.taille)
+        taille = os.path.getsize(corpus) / (1 << 20)
+
+        reference = None
+        for processus in [1] + [j for j in args.processus if j != 1]:
+            modele = ModeleNgrams(args.ordre)
+            debut = time.perf_counter()
+            modele.entrainer(corpus, processus=processus)
+            duree = time.perf_counter() - debut
+            if reference is None:
+                reference = (modele, duree)
+            elif not identiques(modele, reference[0]):
+                raise SystemExit(f"❌ Modèle différent du modèle séquentiel (-j {processus})")
+            print(f"⏳ -j {processus:<3d} {taille:6.0f} Mo  {modele.nombre_mots:>11,} mots  {duree:7.1f} s  "
+                  f"{taille / duree:6.1f} Mo/s  x{reference[1] / duree:.2f}")
+        print("✅ Modèles identiques au modèle séquentiel")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Lexique : mémoire résidente des copies du dictionnaire par module contre le lexique partagé
+
+Un dictionnaire synthétique de `-n` entrées (100 000 par défaut, champs
+du format de dictionary.json) est chargé comme le faisaient les quatre
+modules (pipeline, correcteur, sentiment, dictionnaire : chacun son
+json.load et ses ensembles), puis par obtenir_lexique() pour ces quatre
+modules. Chaque mesure tourne dans son propre processus ; la mémoire
+résidente est relevée avant et après le chargement.
+
+    python benchmarks/memoire_lexique.py -n 100000
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+from commun import DOSSIER_IA
+
+SYLLABES = [c + v for c in ('', 'b', 'd', 'f', 'h', 'k', 'l', 'm', 'n', 'r', 's', 't', 'v', 'z',
+                            'ts', 'tr', 'dr', 'mb', 'nd', 'ny')
+            for v in 'aeioy']
+TYPES = ('nom', 'verbe', 'adjectif', 'nom propre')
+SENTIMENTS = ('positif', 'negatif', 'neutre')
+
+
+def generer_dictionnaire(chemin: str, nombre: int):
+    """Entrées au format de dictionary.json : définitions, exemples, lemme, synonymes, sentiment"""
+    hasard = random.Random(0)
+
+    def mot():
+        return ''.join(hasard.choice(SYLLABES) for _ in range(hasard.randint(2, 5)))
+
+    mots = set()
+    while len(mots) < nombre:
+        mots.add(mot())
+    dictionnaire = {}
+    for m in sorted(mots):
+        dictionnaire[m] = {
+            'definitions': [' '.join(mot() for _ in range(hasard.randint(3, 8))) for _ in range(2)],
+            'type': hasard.choice(TYPES),
+            'exemples': [' '.join(mot() for _ in range(hasard.randint(4, 10)))],
+            'Lemmatisation': m[:hasard.randint(4, max(len(m), 4))],
+            'synonymes': [mot() for _ in range(hasard.randint(0, 2))],
+            'sentiment': hasard.choice(SENTIMENTS),
+        }
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(dictionnaire, f, ensure_ascii=False)
+
+
+def charger_copies(chemin: str) -> list:
+    """Ancien chargement : chaque module lit sa copie du JSON et construit ses ensembles"""
+    modules = []
+
+    with open(chemin, 'r', encoding='utf-8') as f:       # pipeline NLP
+        dictionnaire = json.load(f)
+    pos_index = defaultdict(set)
+    for mot, info in dictionnaire.items():
+        pos_index[info.get('type', 'inconnu')].add(mot)
+    modules.append((dictionnaire, set(dictionnaire.keys()), pos_index))
+
+    for _ in range(2):                                   # correcteur, dictionnaire
+        with open(chemin, 'r', encoding='utf-8') as f:
+            dictionnaire = json.load(f)
+        modules.append((dictionnaire, set(mot.lower() for mot in dictionnaire.keys())))
+
+    with open(chemin, 'r', encoding='utf-8') as f:       # sentiment
+        dictionnaire = json.load(f)
+    par_sentiment = defaultdict(set)
+    for mot, info in dictionnaire.items():
+        par_sentiment[info.get('sentiment', 'neutre')].add(mot.lower())
+    modules.append((dictionnaire, par_sentiment))
+    return modules
+
+
+def charger_partage(chemin: str) -> list:
+    """Lexique partagé : les quatre modules reçoivent le même objet"""
+    from lexique import obtenir_lexique
+    return [obtenir_lexique(chemin) for _ in range(4)]
+
+
+def memoire_residente() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def mesurer(mode: str, chemin: str, file):
+    """Processus de mesure : (durée, mémoire résidente ajoutée)"""
+    os.chdir(DOSSIER_IA)
+    charger = charger_copies if mode == 'copies' else charger_partage
+    if mode == 'partage':
+        import lexique  # noqa: F401 (import hors de la mesure)
+    gc.collect()
+    avant = memoire_residente()
+    debut = time.perf_counter()
+    modules = charger(chemin)
+    duree = time.perf_counter() - debut
+    gc.collect()
+    file.put((duree, memoire_residente() - avant))
+    del modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--entrees', type=int, default=100_000)
+    args = parser.parse_args()
+
+    contexte = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'dictionnaire.json')
+        generer_dictionnaire(chemin, args.entrees)
+        print(f"⏳ Dictionnaire de {args.entrees:,} entrées ({os.path.getsize(chemin) / 1e6:.1f} Mo)")
+
+        mesures = {}
+        for mode, nom in (('copies', "une copie par module"), ('partage', "lexique partagé")):
+            file = contexte.Queue()
+            processus = contexte.Process(target=mesurer, args=(mode, chemin, file))
+            processus.start()
+            mesures[mode] = file.get()
+            processus.join()
+            duree, memoire = mesures[mode]
+            print(f"⏳ {nom:22s} {duree:6.2f} s  +{memoire / 1e6:7.1f} Mo de mémoire résidente")
+        print(f"✅ Lexique partagé : mémoire divisée par "
+              f"{mesures['copies'][1] / max(mesures['partage'][1], 1):.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Entraînement n-grams : mémoire de la lecture par blocs contre la lecture du corpus entier
+
+Le corpus de test répète cleaned_bible.txt jusqu'à `-t` Mo (1 Go par
+défaut) ; chaque entraînement tourne dans son propre processus, dont le
+pic de mémoire résidente est mesuré.
+
+    python benchmarks/memoire_ngrams.py -t 1024
+    python benchmarks/memoire_ngrams.py -t 225 --ancien    # compare à la lecture complète
+
+La lecture complète garde tout le texte et tous ses tokens en mémoire
+(environ 13 fois la taille du corpus) : --ancien n'est utilisable que si
+la machine a cette mémoire.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from commun import DOSSIER_IA
+
+
+def entrainer_par_blocs(corpus: str, ordre: int):
+    from ngrams import ModeleNgrams
+    modele = ModeleNgrams(ordre)
+    modele.entrainer(corpus)
+    return modele
+
+
+def entrainer_lecture_complete(corpus: str, ordre: int):
+    """Ancien entraînement : tout le corpus lu, normalisé et tokenisé d'un coup"""
+    from ngrams import ModeleNgrams
+    from tokeniseur import MOT, normaliser
+    modele = ModeleNgrams(ordre)
+    with open(corpus, 'r', encoding='utf-8') as f:
+        tokens = MOT.findall(normaliser(f.read()))
+    modele._compter([], tokens)
+    modele.comptes_unigrammes.update(tokens)
+    modele.nombre_mots = len(tokens)
+    modele.compacter()
+    return modele
+
+
+def mesurer(mode: str, corpus: str, ordre: int, file):
+    """Processus de mesure : (durée, pic de mémoire en Mo, nombre de mots, n-grams par ordre)"""
+    os.chdir(DOSSIER_IA)
+    entrainer = entrainer_par_blocs if mode == 'blocs' else entrainer_lecture_complete
+    debut = time.perf_counter()
+    modele = entrainer(corpus, ordre)
+    duree = time.perf_counter() - debut
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    file.put((duree, pic, modele.nombre_mots, {k: len(t) for k, t in modele.tables.items()}))
+
+
+def generer_corpus(chemin: str, taille_mo: int):
+    with open(os.path.join(DOSSIER_IA, 'cleaned_bible.txt'), 'rb') as f:
+        source = f.read()
+    restant = taille_mo << 20
+    with open(chemin, 'wb') as f:
+        while restant > 0:
+            morceau = source[:restant]
+            f.write(morceau)
+            restant -= len(morceau)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-t', '--taille', type=int, default=1024, help="taille du corpus (Mo)")
+    parser.add_argument('-c', '--corpus', help="corpus existant (au lieu du corpus généré)")
+    parser.add_argument('-n', '--ordre', type=int, default=4)
+    parser.add_argument('--ancien', action='store_true', help="mesure aussi la lecture complète")
+    args = parser.parse_args()
+
+    contexte = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as dossier:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = os.path.join(dossier, 'corpus.txt')
+            print(f"⏳ Génération d'un corpus de {args.taille} Mo...")
+            generer_corpus(corpus, args.taille)
+        taille = os.path.getsize(corpus) / (1 << 20)
+
+        resultats = {}
+        for mode in ('blocs', 'lecture complète') if args.ancien else ('blocs',):
+            file = contexte.Queue()
+            processus = contexte.Process(target=mesurer, args=(mode, corpus, args.ordre, file))
+            processus.start()
+            resultat = file.get()
+            processus.join()
+            duree, pic, nombre_mots, ngrams = resultat
+            resultats[mode] = (nombre_mots, ngrams)
+            print(f"⏳ {mode:16s} {taille:7.0f} Mo  {nombre_mots:>11,} mots  {duree:7.1f} s  "
+                  f"pic de mémoire {pic:7.0f} Mo")
+
+        if len(resultats) == 2 and len(set(map(repr, resultats.values()))) != 1:
+            raise SystemExit("❌ Comptes différents entre les deux entraînements")
+        print("✅ Mesures terminées")
+
+
+if __name__ == '__main__':
+    main()
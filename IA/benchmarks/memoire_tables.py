@@ -0,0 +1,87 @@
+"""
+N-grams : mémoire des compteurs Python contre les tables NumPy compactées
+
+Mesure (tracemalloc) la mémoire des compteurs d'entraînement, puis celle
+du modèle compacté (tables CSR d'identifiants entiers) et la latence de
+predire(). Sans corpus, un corpus synthétique de `-m` mots est généré.
+
+    python benchmarks/memoire_tables.py cleaned_bible.txt
+    python benchmarks/memoire_tables.py -m 2000000 -v 60000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from commun import chronometrer
+from ngrams import TAILLE_BLOC, ModeleNgrams
+from tokeniseur import tokeniser
+
+ALPHABET = 'abdefghijklmnoprstvyz'
+
+
+def generer_corpus(chemin: str, mots: int, vocabulaire: int):
+    """Mots tirés selon une loi de Zipf, phrases de 5 à 20 mots"""
+    aleatoire = random.Random(0)
+    lexique = [''.join(aleatoire.choice(ALPHABET) for _ in range(aleatoire.randint(2, 10)))
+               for _ in range(vocabulaire)]
+    poids = [1 / (rang + 1) for rang in range(vocabulaire)]
+    with open(chemin, 'w', encoding='utf-8') as f:
+        ecrits = 0
+        while ecrits < mots:
+            phrase = aleatoire.choices(lexique, poids, k=aleatoire.randint(5, 20))
+            f.write(' '.join(phrase) + '.\n')
+            ecrits += len(phrase)
+
+
+def mesurer(corpus: str, ordre: int):
+    modele = ModeleNgrams(ordre)
+
+    tracemalloc.start()
+    debut = time.perf_counter()
+    modele._compter_tranche(corpus, TAILLE_BLOC)
+    comptage = time.perf_counter() - debut
+    compteurs, _ = tracemalloc.get_traced_memory()
+
+    debut = time.perf_counter()
+    modele.empreinte = ''
+    modele.compacter()
+    compaction = time.perf_counter() - debut
+    apres, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ngrams = sum(len(table) for table in modele.tables.values())
+    print(f"⏳ {modele.nombre_mots:,} mots, vocabulaire {len(modele.vocabulaire):,}, {ngrams:,} n-grams")
+    print(f"⏳ compteurs Python   {compteurs / 1e6:8.1f} Mo  (comptage {comptage:.1f} s)")
+    print(f"⏳ modèle compacté    {apres / 1e6:8.1f} Mo  dont tables {modele.nbytes / 1e6:.1f} Mo "
+          f"(compaction {compaction:.1f} s)  x{compteurs / max(apres, 1):.1f}")
+
+    with open(corpus, 'r', encoding='utf-8') as f:
+        tokens = tokeniser(f.read(1 << 20))
+    contextes = [tokens[max(0, i - ordre + 1):i] for i in range(1, len(tokens), 7)][:5000]
+    temps, _ = chronometrer(lambda: [modele.predire(c, 5) for c in contextes], 3)
+    print(f"⏳ predire : {temps / len(contextes) * 1e6:.1f} µs/appel ({len(contextes)} contextes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='?')
+    parser.add_argument('-n', '--ordre', type=int, default=4)
+    parser.add_argument('-m', '--mots', type=int, default=2_000_000)
+    parser.add_argument('-v', '--vocabulaire', type=int, default=60_000)
+    args = parser.parse_args()
+
+    if args.corpus:
+        mesurer(args.corpus, args.ordre)
+        return
+    with tempfile.TemporaryDirectory() as dossier:
+        corpus = os.path.join(dossier, 'synthetique.txt')
+        generer_corpus(corpus, args.mots, args.vocabulaire)
+        mesurer(corpus, args.ordre)
+
+
+if __name__ == '__main__':
+    main()
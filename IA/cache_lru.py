@@ -0,0 +1,90 @@
+"""
+Cache LRU borné avec compteurs de succès / échecs / évictions
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+# Valeur par défaut d'obtenir() qui distingue une absence d'une valeur None en cache
+ABSENT = object()
+
+
+class CacheLRU:
+    """
+    Cache à taille bornée : l'entrée la moins récemment utilisée est évincée
+    quand la capacité est atteinte
+    """
+
+    def __init__(self, capacite: int = 10000):
+        if capacite <= 0:
+            raise ValueError("La capacité du cache doit être positive")
+
+        self.capacite = capacite
+        self._entrees = OrderedDict()
+        self._verrou = Lock()
+
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def obtenir(self, cle: Hashable, defaut: Any = None) -> Optional[Any]:
+        """
+        Retourne la valeur associée à la clé, ou `defaut` si absente
+
+        Une valeur None en cache est un succès : passer ABSENT comme
+        défaut pour la distinguer d'une absence.
+        """
+        with self._verrou:
+            valeur = self._entrees.get(cle, ABSENT)
+            if valeur is ABSENT:
+                self.echecs += 1
+                return defaut
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return valeur
+
+    def ajouter(self, cle: Hashable, valeur: Any):
+        """Ajoute une valeur, en évinçant la plus ancienne si nécessaire"""
+        with self._verrou:
+            self._entrees[cle] = valeur
+            self._entrees.move_to_end(cle)
+            if len(self._entrees) > self.capacite:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def retirer(self, cle: Hashable) -> Optional[Any]:
+        """Retire une entrée et retourne sa valeur, ou None si absente"""
+        with self._verrou:
+            return self._entrees.pop(cle, None)
+
+    def vider(self):
+        """Invalide toutes les entrées (les compteurs sont conservés)"""
+        with self._verrou:
+            self._entrees.clear()
+
+    def __len__(self) -> int:
+        return len(self._entrees)
+
+    def statistiques(self) -> Dict:
+        """Compteurs d'utilisation du cache"""
+        total = self.succes + self.echecs
+        return {
+            'capacite': self.capacite,
+            'taille': len(self._entrees),
+            'succes': self.succes,
+            'echecs': self.echecs,
+            'evictions': self.evictions,
+            'taux_succes': round(self.succes / total, 4) if total else 0.0
+        }
+
+
+def fusionner_statistiques(statistiques: Iterable[Dict]) -> Dict:
+    """Additionne les statistiques de plusieurs caches (un par processus)"""
+    total = {'capacite': 0, 'taille': 0, 'succes': 0, 'echecs': 0, 'evictions': 0}
+    for partie in statistiques:
+        for cle in total:
+            total[cle] += partie[cle]
+    requetes = total['succes'] + total['echecs']
+    total['taux_succes'] = round(total['succes'] / requetes, 4) if requetes else 0.0
+    return total
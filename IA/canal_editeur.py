@@ -0,0 +1,223 @@
+"""
+Canal WebSocket de l'éditeur : suggestions et corrections en direct
+
+Une seule connexion par éditeur transporte toutes les requêtes de frappe
+(prédiction, complétion, correction, sentiment) au lieu d'une requête HTTP
+par touche.
+
+Messages du client (JSON) :
+    {"id": 12, "type": "prediction", "contexte": "Manao ahoana"}
+    {"id": 13, "type": "correction", "texte": "tsara"}
+    {"id": 13, "type": "annuler"}
+
+Réponses, avec l'identifiant de la requête :
+    {"id": 12, "type": "prediction", "resultat": ...}
+    {"id": 12, "type": "prediction", "erreur": "..."}
+    {"id": 13, "type": "correction", "annule": true}   (annulation demandée)
+    {"erreur": "..."}                                  (message illisible ou binaire)
+
+Les requêtes d'un même type (et d'un même "canal" facultatif) forment une
+voie : au plus une est en cours de calcul et une seule attend derrière
+elle. Une nouvelle requête remplace celle qui attend (jamais calculée) et
+rend périmée celle en cours : ni l'une ni l'autre ne reçoit de réponse, le
+client n'attend que celle de sa dernière requête. Une rafale de frappes ne
+coûte donc que deux calculs.
+
+Une annulation explicite ("annuler") reçoit toujours sa réponse "annule",
+que la requête attende ou soit déjà en cours de calcul (son résultat est
+alors ignoré). "limite" va de 1 à LIMITE_SUGGESTIONS, comme dans l'API HTTP.
+"canal" est une chaîne ou un entier ; une connexion ouvre au plus
+VOIES_MAX voies.
+"""
+
+import asyncio
+import json
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from nlp_malagasy import LIMITE_SUGGESTIONS
+
+
+def _suggestions(resultats) -> list:
+    return [{"mot": mot, "score": round(score, 6)} for mot, score in resultats]
+
+
+def _predictions(resultats) -> list:
+    return [{"mot": mot, "frequence": frequence, "score": round(score, 6)}
+            for mot, score, frequence in resultats]
+
+
+# Type de requête -> (cible, méthode, paramètres avec leur valeur par
+# défaut (None : obligatoire), mise en forme du résultat comme l'API HTTP)
+REQUETES: Dict[str, Tuple[str, str, Tuple[Tuple[str, Any], ...], Optional[Callable]]] = {
+    'prediction': ('nlp', 'predire_avec_frequences', (('contexte', None), ('limite', 5)), _predictions),
+    'completion': ('nlp', 'completer_mot',
+                   (('prefixe', None), ('contexte', ''), ('limite', 5)), _suggestions),
+    'correction': ('correcteur', 'verifier_mot', (('texte', None),), None),
+    'correction_texte': ('correcteur', 'corriger_texte', (('texte', None),), None),
+    'sentiment': ('nlp', 'analyser_sentiment', (('texte', None),), None),
+}
+
+# Requêtes dont la taille du texte décide du pool d'exécution (comme dans l'API HTTP)
+REQUETES_TEXTE = {'correction_texte', 'sentiment'}
+
+# Nombre maximal de voies (type, canal) d'une connexion
+VOIES_MAX = 64
+
+# Compteurs de tous les canaux depuis le démarrage (exposés par /api/stats)
+compteurs = Counter()
+
+
+def _arguments(message: Dict, parametres: Tuple[Tuple[str, Any], ...]) -> list:
+    """Valeurs des paramètres d'une requête, dans l'ordre de la méthode appelée"""
+    arguments = []
+    for nom, defaut in parametres:
+        valeur = message.get(nom, defaut)
+        if valeur is None:
+            raise ValueError(f"Paramètre manquant : {nom}")
+        if not isinstance(valeur, type(defaut) if defaut is not None else str) or isinstance(valeur, bool):
+            raise ValueError(f"Paramètre invalide : {nom}")
+        if nom == 'limite' and not 1 <= valeur <= LIMITE_SUGGESTIONS:
+            raise ValueError(f"Paramètre invalide : limite (de 1 à {LIMITE_SUGGESTIONS})")
+        arguments.append(valeur)
+    return arguments
+
+
+class Voie:
+    """Requêtes d'un même type : celle en cours de calcul et celle qui attend"""
+
+    __slots__ = ('attente', 'en_cours', 'perime', 'signal', 'tache')
+
+    def __init__(self):
+        self.attente: Optional[Dict] = None
+        self.en_cours: Optional[Dict] = None
+        self.perime = False
+        self.signal = asyncio.Event()
+        self.tache: Optional[asyncio.Task] = None
+
+
+class CanalEditeur:
+    """Une connexion WebSocket de l'éditeur et ses voies de requêtes"""
+
+    def __init__(self, websocket: WebSocket, executeur):
+        """
+        Args:
+            websocket: connexion déjà acceptée
+            executeur: ExecuteurNLP qui exécute les requêtes hors de la boucle
+        """
+        self.websocket = websocket
+        self.executeur = executeur
+        self.voies: Dict[Tuple[str, Any], Voie] = {}
+        self._verrou_envoi = asyncio.Lock()
+
+    async def ecouter(self):
+        """Traite les messages du client jusqu'à la déconnexion"""
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                texte = message.get('text')
+                if texte is None:
+                    await self._envoyer({"erreur": "Message binaire refusé : JSON texte attendu"})
+                    continue
+                await self._recevoir(texte)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for voie in self.voies.values():
+                if voie.tache is not None:
+                    voie.tache.cancel()
+
+    async def _recevoir(self, texte: str):
+        try:
+            message = json.loads(texte)
+        except ValueError:
+            await self._envoyer({"erreur": "Message JSON invalide"})
+            return
+        if not isinstance(message, dict):
+            await self._envoyer({"erreur": "Message JSON invalide"})
+            return
+
+        type_requete = message.get('type')
+        if type_requete == 'annuler':
+            await self._annuler(message.get('id'))
+            return
+        if type_requete not in REQUETES:
+            await self._envoyer({"id": message.get('id'), "type": type_requete,
+                                 "erreur": f"Type de requête inconnu : {type_requete}"})
+            return
+
+        canal = message.get('canal')
+        if canal is not None and (not isinstance(canal, (str, int)) or isinstance(canal, bool)):
+            await self._envoyer({"id": message.get('id'), "type": type_requete,
+                                 "erreur": "Paramètre invalide : canal"})
+            return
+
+        cle = (type_requete, canal)
+        voie = self.voies.get(cle)
+        if voie is None:
+            if len(self.voies) >= VOIES_MAX:
+                await self._envoyer({"id": message.get('id'), "type": type_requete,
+                                     "erreur": f"Trop de voies ouvertes (au plus {VOIES_MAX})"})
+                return
+            voie = self.voies[cle] = Voie()
+            voie.tache = asyncio.create_task(self._traiter(voie))
+        compteurs['recues'] += 1
+
+        # La requête qui attendait n'a pas commencé : elle ne sera pas calculée
+        if voie.attente is not None:
+            compteurs['annulees'] += 1
+        voie.attente = message
+        voie.perime = voie.en_cours is not None
+        voie.signal.set()
+
+    async def _annuler(self, identifiant: Any):
+        """Annule une requête à la demande du client"""
+        for voie in self.voies.values():
+            if voie.attente is not None and voie.attente.get('id') == identifiant:
+                message, voie.attente = voie.attente, None
+                await self._signaler_annulation(message)
+                return
+            if voie.en_cours is not None and voie.en_cours.get('id') == identifiant:
+                # Résultat ignoré, compté parmi les annulées quand le calcul se termine
+                voie.perime = True
+                await self._envoyer({"id": identifiant, "type": voie.en_cours['type'], "annule": True})
+                return
+
+    async def _traiter(self, voie: Voie):
+        """Calcule les requêtes d'une voie l'une après l'autre"""
+        while True:
+            await voie.signal.wait()
+            voie.signal.clear()
+            if voie.attente is None:
+                continue
+
+            message, voie.attente = voie.attente, None
+            voie.en_cours, voie.perime = message, False
+            reponse = {"id": message.get('id'), "type": message['type']}
+            try:
+                cible, methode, parametres, formater = REQUETES[message['type']]
+                arguments = _arguments(message, parametres)
+                taille = len(arguments[0]) if message['type'] in REQUETES_TEXTE else 0
+                resultat = await self.executeur.executer(cible, methode, *arguments, taille=taille)
+                reponse['resultat'] = formater(resultat) if formater else resultat
+            except Exception as e:
+                reponse['erreur'] = str(e)
+            voie.en_cours = None
+
+            if voie.perime:
+                compteurs['annulees'] += 1
+            else:
+                compteurs['traitees'] += 1
+                await self._envoyer(reponse)
+
+    async def _signaler_annulation(self, message: Dict):
+        compteurs['annulees'] += 1
+        await self._envoyer({"id": message.get('id'), "type": message['type'], "annule": True})
+
+    async def _envoyer(self, reponse: Dict):
+        async with self._verrou_envoi:
+            await self.websocket.send_text(json.dumps(reponse, ensure_ascii=False))
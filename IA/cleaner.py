@@ -1,32 +1,171 @@
-import fitz  # PyMuPDF
+"""
+Extraction du corpus texte à partir de PDF (PyMuPDF)
+
+Les pages sont extraites et nettoyées par tranches dans des processus de
+travail, puis écrites sur disque dans l'ordre des pages au fil de l'eau :
+la mémoire ne dépend pas de la taille des PDF.
+
+    python cleaner.py Genesisy.pdf Eksodosy.pdf -o cleaned_bible.txt -j 4
+    python cleaner.py pdf/*.pdf -d corpus/      (un .txt par PDF)
+
+Nettoyage (règles compilées une fois, appliquées page par page) :
+- en-têtes et pieds de page d'impression (date, titre, adresse, numéro de
+  page) : texte situé dans les marges haute et basse
+- navigation du site (fil d'Ariane, accès direct aux chapitres, "Chapitre N")
+- numéros de versets, lignes sans lettres (séparateurs, espaces insécables)
+"""
+
+import argparse
+import multiprocessing
+import os
 import re
+import time
+from typing import Iterator, List, Optional, Tuple
 
-def clean_bible_pdf(input_pdf, output_txt):
-    # Regex to find numbers at the start of lines or within text
-    # This matches digits followed by optional spaces
-    number_pattern = re.compile(r'\d+\s*')
+import fitz  # PyMuPDF
+
+# Part de la hauteur de page, en haut et en bas, réservée aux en-têtes et
+# pieds de page
+MARGE_PAGE = 0.05
+
+# Pages extraites par tâche envoyée à un processus de travail
+PAGES_PAR_TRANCHE = 32
+
+# Espace horizontal (une règle ne déborde jamais sur la ligne suivante)
+_ESPACE = r'[^\S\n]'
+
+# Lignes entièrement supprimées (navigation et en-têtes d'impression)
+LIGNES_IGNOREES = re.compile(r'^{0}*(?:{1}){0}*\n'.format(_ESPACE, '|'.join((
+    r'Accueil{0}*/.*',                                      # fil d'Ariane
+    r'Accès direct aux chapitres.*',
+    r'\d{{1,2}}/\d{{1,2}}/\d{{2,4}},?{0}*\d{{1,2}}:\d{{2}}.*',  # date d'impression
+    r'https?://\S+',
+    r'\d+{0}*/{0}*\d+',                                     # numéro de page
+    r'[^\w\n]*',                                           # aucune lettre
+))).format(_ESPACE), re.MULTILINE)
+
+# Morceaux supprimés à l'intérieur des lignes : fin de la liste des
+# chapitres, titre de chapitre, numéros de versets
+SUPPRESSIONS = re.compile('|'.join((
+    r'^(?:\d+{0}*,{0}*)+\d+{0}*',
+    r'Chapitre{0}+\d+{0}*',
+    r'\d+{0}*',
+)).format(_ESPACE), re.MULTILINE)
+
+
+def nettoyer_texte(texte: str) -> str:
+    """Nettoie le texte d'une page (chaque ligne terminée par \\n)"""
+    texte = LIGNES_IGNOREES.sub('', texte)
+    # Les lignes vidées (un numéro de verset seul...) disparaissent aussi
+    return LIGNES_IGNOREES.sub('', SUPPRESSIONS.sub('', texte))
+
+
+def texte_page(page: fitz.Page) -> str:
+    """Texte d'une page sans les marges haute et basse (en-têtes et pieds de page)"""
+    rect = page.rect
+    marge = rect.height * MARGE_PAGE
+    texte = page.get_text('text', clip=fitz.Rect(rect.x0, rect.y0 + marge, rect.x1, rect.y1 - marge))
+    return texte if texte.endswith('\n') or not texte else texte + '\n'
+
+
+def textes_pages(doc: fitz.Document, debut: int, fin: int) -> str:
+    """Texte nettoyé des pages [debut, fin) d'un PDF ouvert"""
+    return ''.join(nettoyer_texte(texte_page(doc[numero])) for numero in range(debut, fin))
 
+
+def _extraire_tranche(tranche: Tuple[str, int, int]) -> str:
+    """Point d'entrée d'un processus de travail : (pdf, début, fin) -> texte"""
+    chemin, debut, fin = tranche
+    with fitz.open(chemin) as doc:
+        return textes_pages(doc, debut, fin)
+
+
+def iterer_textes(pdfs: List[str], processus: int = 0,
+                  pages_par_tranche: int = PAGES_PAR_TRANCHE) -> Iterator[Tuple[str, int, str]]:
+    """
+    Texte nettoyé des PDF, tranche par tranche, dans l'ordre des PDF et des pages
+
+    Args:
+        processus: nombre de processus de travail (0 : dans ce processus)
+
+    Yields:
+        (pdf, nombre de pages de la tranche, texte)
+    """
+    if processus > 0:
+        tranches = []
+        for chemin in pdfs:
+            with fitz.open(chemin) as doc:
+                pages = doc.page_count
+            tranches.extend((chemin, debut, min(debut + pages_par_tranche, pages))
+                            for debut in range(0, pages, pages_par_tranche))
+
+        # 'spawn' : MuPDF n'est pas repris tel quel d'un processus parent
+        with multiprocessing.get_context('spawn').Pool(processus) as pool:
+            # imap : résultats dans l'ordre, dès que la tranche suivante est prête
+            for tranche, texte in zip(tranches, pool.imap(_extraire_tranche, tranches)):
+                yield tranche[0], tranche[2] - tranche[1], texte
+    else:
+        # Dans ce processus, chaque PDF n'est ouvert qu'une fois
+        for chemin in pdfs:
+            with fitz.open(chemin) as doc:
+                for debut in range(0, doc.page_count, pages_par_tranche):
+                    fin = min(debut + pages_par_tranche, doc.page_count)
+                    yield chemin, fin - debut, textes_pages(doc, debut, fin)
+
+
+def extraire(pdfs: List[str], sortie: Optional[str] = None, dossier: Optional[str] = None,
+             processus: int = 0) -> int:
+    """
+    Écrit le corpus des PDF, tranche par tranche
+
+    Args:
+        sortie: fichier unique où les PDF sont mis bout à bout
+        dossier: ou bien, un fichier <nom du pdf>.txt par PDF dans ce dossier
+
+    Returns:
+        nombre de pages extraites
+    """
+    if (sortie is None) == (dossier is None):
+        raise ValueError("Indiquer soit un fichier de sortie, soit un dossier")
+    if dossier is not None:
+        os.makedirs(dossier, exist_ok=True)
+
+    pages = 0
+    fichier, courant = None, None
     try:
-        # Open the PDF
-        doc = fitz.open(input_pdf)
-        cleaned_content = []
-
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            text = page.get_text("text")
-            
-            # Remove the numbers using regex
-            cleaned_text = number_pattern.sub('', text)
-            cleaned_content.append(cleaned_text)
-
-        # Save to a text file
-        with open(output_txt, 'w', encoding='utf-8') as f:
-            f.write("\n".join(cleaned_content))
-            
-        print(f"Success! Cleaned text saved to {output_txt}")
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-# Usage
-clean_bible_pdf("Genesisy.pdf", "cleaned_bible.txt")
\ No newline at end of file
+        for pdf, nombre, texte in iterer_textes(pdfs, processus):
+            if fichier is None or (dossier is not None and pdf != courant):
+                if fichier is not None:
+                    fichier.close()
+                nom = sortie if dossier is None else \
+                    os.path.join(dossier, os.path.splitext(os.path.basename(pdf))[0] + '.txt')
+                fichier, courant = open(nom, 'w', encoding='utf-8'), pdf
+            fichier.write(texte)
+            pages += nombre
+    finally:
+        if fichier is not None:
+            fichier.close()
+    return pages
+
+
+def clean_bible_pdf(input_pdf, output_txt):
+    """Extrait et nettoie un seul PDF (ancienne interface)"""
+    extraire([input_pdf], output_txt)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrait et nettoie le texte de PDF pour le corpus")
+    parser.add_argument('pdfs', nargs='+', help="fichiers PDF, dans l'ordre du corpus")
+    destination = parser.add_mutually_exclusive_group()
+    destination.add_argument('-o', '--sortie', default='cleaned_bible.txt',
+                             help="fichier texte unique (défaut : cleaned_bible.txt)")
+    destination.add_argument('-d', '--dossier', help="un fichier texte par PDF dans ce dossier")
+    parser.add_argument('-j', '--processus', type=int, default=os.cpu_count(),
+                        help="nombre de processus (0 : aucun ; défaut : nombre de cœurs)")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    pages = extraire(args.pdfs, None if args.dossier else args.sortie, args.dossier, args.processus)
+    duree = time.perf_counter() - debut
+    print(f"✅ {pages} pages de {len(args.pdfs)} PDF extraites en {duree:.1f} s "
+          f"({pages / duree:.0f} pages/s) : {args.dossier or args.sortie}")
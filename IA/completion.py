@@ -0,0 +1,202 @@
+"""
+Complétion de mots en cours de frappe
+
+Le vocabulaire (dictionnaire + corpus) est trié : les mots qui commencent
+par un préfixe forment une plage contiguë, trouvée par dichotomie. C'est un
+trie implicite, sans un objet Python par nœud. Les meilleures complétions
+des préfixes courts (plages de plus de SEUIL_PRECALCUL mots) sont
+précalculées ; les autres plages sont assez petites pour être classées à
+la demande.
+
+L'index est un état immuable (EtatCompletion) remplacé d'un bloc par
+ajouter() : une complétion en cours dans un autre thread lit toujours des
+mots, poids et précalculs cohérents entre eux.
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ngrams import ModeleNgrams
+
+# Au-delà de cette taille de plage, les meilleures complétions sont précalculées
+SEUIL_PRECALCUL = 256
+
+# Nombre de complétions précalculées par préfixe
+TOP_K_PRECALCUL = 20
+
+# Majorant de tout caractère, pour la borne haute d'une plage de préfixe
+FIN_PREFIXE = '\U0010ffff'
+
+
+class EtatCompletion(NamedTuple):
+    """Vocabulaire trié et tableaux alignés sur lui, jamais modifiés après publication"""
+    mots: List[str]
+    # Par mot (ordre alphabétique) : identifiant n-grams (-1 : hors corpus),
+    # fréquence relative et probabilité unigramme de Kneser-Ney
+    ids_modele: np.ndarray
+    poids: np.ndarray
+    poids_kn: np.ndarray
+    # Identifiant n-grams -> rang alphabétique
+    rangs: np.ndarray
+    # Préfixe -> meilleurs rangs selon (poids, poids_kn)
+    precalcul: Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+
+class IndexCompletion:
+    """
+    Complétions d'un préfixe, pondérées par la fréquence dans le corpus et
+    éventuellement conditionnées par les mots qui précèdent (modèle n-grams)
+    """
+
+    def __init__(self, mots: Iterable[str], modele: ModeleNgrams):
+        """
+        Args:
+            mots: mots du dictionnaire (sans fréquence s'ils sont absents du corpus)
+            modele: modèle n-grams entraîné, qui fournit le vocabulaire du
+                corpus, les fréquences et les probabilités conditionnelles
+        """
+        self.modele = modele
+        mots = sorted(set(mots).union(modele.vocabulaire))
+
+        ids = modele.ids
+        ids_modele = np.fromiter((ids.get(mot, -1) for mot in mots), np.int32, len(mots))
+        poids = np.zeros(len(mots), np.float64)
+        poids_kn = np.zeros(len(mots), np.float64)
+        connus = ids_modele >= 0
+        if modele.nombre_mots:
+            poids[connus] = modele.unigrammes[ids_modele[connus]] / modele.nombre_mots
+            poids_kn[connus] = modele.p_unigrammes[ids_modele[connus]]
+
+        rangs = np.empty(len(modele.vocabulaire), np.int64)
+        rangs[ids_modele[connus]] = np.flatnonzero(connus)
+
+        etat = EtatCompletion(mots, ids_modele, poids, poids_kn, rangs, {})
+        self._precalculer(etat, '', 0, len(mots))
+        self._etat = etat
+
+    def _precalculer(self, etat: EtatCompletion, prefixe: str, debut: int, fin: int):
+        """Classe les grandes plages, en descendant caractère par caractère"""
+        if fin - debut <= SEUIL_PRECALCUL:
+            return
+        etat.precalcul[prefixe] = (self._classer(etat, 0, debut, fin, TOP_K_PRECALCUL),
+                                   self._classer(etat, 1, debut, fin, TOP_K_PRECALCUL))
+
+        mots = etat.mots
+        profondeur = len(prefixe)
+        i = debut
+        # Le mot égal au préfixe (s'il existe) est en tête de plage
+        if i < fin and len(mots[i]) == profondeur:
+            i += 1
+        while i < fin:
+            enfant = mots[i][:profondeur + 1]
+            j = bisect_left(mots, enfant + FIN_PREFIXE, i, fin)
+            self._precalculer(etat, enfant, i, j)
+            i = j
+
+    @staticmethod
+    def _classer(etat: EtatCompletion, critere: int, debut: int, fin: int, n: int) -> np.ndarray:
+        """
+        Rangs alphabétiques des n meilleurs mots de la plage selon la
+        fréquence (critere 0) ou la probabilité unigramme de Kneser-Ney (1)
+        """
+        poids = (etat.poids, etat.poids_kn)[critere][debut:fin]
+        if len(poids) > n:
+            seuil = np.partition(poids, len(poids) - n)[len(poids) - n]
+            retenus = np.flatnonzero(poids >= seuil)
+        else:
+            retenus = np.arange(len(poids))
+        # Égalités départagées par fréquence puis par ordre alphabétique
+        frequences = etat.poids[debut + retenus]
+        return debut + retenus[np.lexsort((retenus, -frequences, -poids[retenus]))][:n]
+
+    @property
+    def mots(self) -> List[str]:
+        """Vocabulaire trié"""
+        return self._etat.mots
+
+    def plage(self, prefixe: str, etat: Optional[EtatCompletion] = None) -> Tuple[int, int]:
+        """Plage [debut, fin) des mots qui commencent par le préfixe"""
+        mots = (etat or self._etat).mots
+        debut = bisect_left(mots, prefixe)
+        return debut, bisect_left(mots, prefixe + FIN_PREFIXE, debut)
+
+    def completer(self, prefixe: str, n: int = 5,
+                  tokens: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Les n meilleures complétions d'un préfixe
+
+        Args:
+            prefixe: début de mot (minuscules)
+            tokens: mots qui précèdent ; s'ils sont connus du modèle, les
+                complétions sont classées par P(mot | contexte) (Kneser-Ney)
+                parmi les successeurs connus et les mots les plus fréquents
+
+        Returns:
+            (mot, score) par score décroissant : fréquence relative dans le
+            corpus, ou probabilité conditionnelle si `tokens` est utilisé
+        """
+        if n <= 0:
+            return []
+        # Un seul état lu pour toute la complétion (voir ajouter)
+        etat = self._etat
+        debut, fin = self.plage(prefixe, etat)
+        if debut == fin:
+            return []
+
+        lignes = self.modele._lignes(tokens) if tokens else []
+        if not lignes:
+            meilleurs = self._meilleurs(etat, 0, prefixe, debut, fin, n)
+            return list(zip((etat.mots[i] for i in meilleurs.tolist()), etat.poids[meilleurs].tolist()))
+
+        # Successeurs connus du dernier mot qui commencent par le préfixe ; les
+        # autres mots ne dépendent que de leur probabilité unigramme
+        table = self.modele.tables[2]
+        i = lignes[0][1]
+        rangs = etat.rangs[table.successeurs[table.debuts[i]:table.debuts[i + 1]]]
+        candidats = np.union1d(rangs[(rangs >= debut) & (rangs < fin)],
+                               self._meilleurs(etat, 1, prefixe, debut, fin, n))
+
+        ids = etat.ids_modele[candidats]
+        scores = np.zeros(len(candidats))
+        connus = ids >= 0
+        scores[connus] = self.modele._scorer(lignes, ids[connus], 'kneser-ney')
+
+        meilleurs = np.lexsort((candidats, -etat.poids[candidats], -scores))[:n]
+        return [(etat.mots[i], score)
+                for i, score in zip(candidats[meilleurs].tolist(), scores[meilleurs].tolist())]
+
+    def _meilleurs(self, etat: EtatCompletion, critere: int, prefixe: str,
+                   debut: int, fin: int, n: int) -> np.ndarray:
+        """Comme _classer, en lisant les plages précalculées si possible"""
+        precalcul = etat.precalcul.get(prefixe)
+        if precalcul is not None and n <= TOP_K_PRECALCUL:
+            return precalcul[critere][:n]
+        return self._classer(etat, critere, debut, fin, n)
+
+    def ajouter(self, mot: str):
+        """
+        Ajoute un mot hors corpus (fréquence nulle) au vocabulaire
+
+        Le nouvel état est construit à part puis publié en une affectation.
+        """
+        etat = self._etat
+        i = bisect_left(etat.mots, mot)
+        if i < len(etat.mots) and etat.mots[i] == mot:
+            return
+
+        self._etat = EtatCompletion(
+            mots=etat.mots[:i] + [mot] + etat.mots[i:],
+            ids_modele=np.insert(etat.ids_modele, i, -1),
+            poids=np.insert(etat.poids, i, 0.0),
+            poids_kn=np.insert(etat.poids_kn, i, 0.0),
+            rangs=etat.rangs + (etat.rangs >= i),
+            precalcul={
+                prefixe: tuple(tops + (tops >= i) for tops in classements)
+                for prefixe, classements in etat.precalcul.items()
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self._etat.mots)
@@ -2,25 +2,46 @@
 Correcteur Orthographique Malagasy
 """
 
-import json
-import re
 from rapidfuzz import fuzz, process
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+from index_candidats import creer_index
+from cache_lru import ABSENT, CacheLRU
+from lexique import obtenir_lexique, CHEMIN_DICTIONNAIRE
+from tokeniseur import iterer_tokens, tokeniser
+
+
+# Suggestions retenues : les NOMBRE_SUGGESTIONS plus similaires (fuzz.ratio)
+# parmi celles d'au moins SIMILARITE_MIN %
+NOMBRE_SUGGESTIONS = 5
+SIMILARITE_MIN = 60
+
 
 class CorrecteurMalagasy:
-    def __init__(self, dictionnaire_path: str):
+    def __init__(self, dictionnaire_path: str = CHEMIN_DICTIONNAIRE, index_candidats: Optional[str] = 'comptes',
+                 taille_cache: int = 10000):
         """
         Args:
             dictionnaire_path: chemin vers le fichier JSON du dictionnaire
             Format: {"mot": {"definitions": [...], "type": "...", "exemples": [...], 
                      "Lemmatisation": "...", "synonymes": [...], "sentiment": "..."}}
+            index_candidats: 'comptes' ou None pour comparer avec tout
+                le dictionnaire
+            taille_cache: nombre maximal de mots inconnus dont les
+                suggestions sont gardées en cache (LRU)
         """
-        # Charger le dictionnaire
-        with open(dictionnaire_path, 'r', encoding='utf-8') as f:
-            self.dictionnaire = json.load(f)
+        # Lexique partagé avec les autres modules
+        self.lexique = obtenir_lexique(dictionnaire_path)
+        self.dictionnaire = self.lexique.dictionnaire
+        
+        # Set de mots valides pour recherche rapide
+        self.mots_valides = self.lexique.mots
+        
+        # Index pour restreindre les candidats avant le scoring
+        self.index_candidats = creer_index(index_candidats, self.mots_valides)
         
-        # Créer un set de mots valides pour recherche rapide
-        self.mots_valides = set(mot.lower() for mot in self.dictionnaire.keys())
+        # Cache des suggestions pour les fautes fréquentes
+        self.cache_suggestions = CacheLRU(taille_cache)
+        self.lexique.abonner(self._sur_ajout_mot)
         
         # Règles phonotactiques malagasy (combinaisons impossibles)
         self.combinaisons_interdites = [
@@ -60,7 +81,7 @@ class CorrecteurMalagasy:
                 'info_mot': Dict ou None
             }
         """
-        mot_clean = re.sub(r'[^\w]', '', mot).lower()
+        mot_clean = ''.join(tokeniser(mot))
         
         if not mot_clean:
             return {
@@ -83,21 +104,40 @@ class CorrecteurMalagasy:
                 'info_mot': self.dictionnaire[mot_clean]
             }
         
-        # 2. Vérifier la phonotactique
+        # 2. Suggestions (depuis le cache si le mot a déjà été vérifié)
+        calcul = self.cache_suggestions.obtenir(mot_clean, ABSENT)
+        if calcul is ABSENT:
+            calcul = self._calculer_suggestions(mot_clean)
+            self.cache_suggestions.ajouter(mot_clean, calcul)
+        
+        suggestions, suggestions_avec_info, violations = calcul
+        
+        return {
+            'mot': mot,
+            'est_correct': False,
+            'suggestions': list(suggestions),
+            'suggestions_avec_info': list(suggestions_avec_info),
+            'violations': list(violations),
+            'info_mot': None,
+            'confiance': 'faible' if violations else 'moyenne'
+        }
+    
+    def _calculer_suggestions(self, mot_clean: str) -> Tuple[List[str], List[Dict], List[str]]:
+        """
+        Calcule les suggestions d'un mot inconnu
+        
+        Returns:
+            (suggestions, suggestions_avec_info, violations)
+        """
+        # Vérifier la phonotactique
         est_valide_phono, violations = self.verifier_phonotactique(mot_clean)
         
-        # 3. Trouver des suggestions avec Levenshtein
-        suggestions_brutes = process.extract(
-            mot_clean,
-            self.mots_valides,
-            scorer=fuzz.ratio,
-            limit=5,
-            score_cutoff=60  # Minimum 60% de similarité
-        )
+        # Trouver des suggestions avec Levenshtein
+        suggestions_brutes = self._chercher_similaires(mot_clean)
         
         suggestions = [s[0] for s in suggestions_brutes]
         
-        # 4. NOUVEAU : Enrichir les suggestions avec infos du dictionnaire
+        # NOUVEAU : Enrichir les suggestions avec infos du dictionnaire
         suggestions_avec_info = []
         for suggestion in suggestions:
             info = self.dictionnaire.get(suggestion, {})
@@ -108,33 +148,70 @@ class CorrecteurMalagasy:
                 'sentiment': info.get('sentiment')
             })
         
-        return {
-            'mot': mot,
-            'est_correct': False,
-            'suggestions': suggestions,
-            'suggestions_avec_info': suggestions_avec_info,
-            'violations': violations,
-            'info_mot': None,
-            'confiance': 'faible' if violations else 'moyenne'
-        }
+        return suggestions, suggestions_avec_info, violations
+    
+    def _chercher_similaires(self, mot_clean: str) -> List[Tuple[str, float]]:
+        """
+        Les mots du dictionnaire les plus similaires (fuzz.ratio)
+        
+        L'index ne retire que des mots dont la similarité ne peut atteindre
+        SIMILARITE_MIN : le résultat est celui du balayage complet.
+        
+        Returns:
+            (mot, score) par score décroissant puis par ordre alphabétique
+        """
+        if self.index_candidats is None:
+            candidats = self.mots_valides
+        else:
+            candidats = self.index_candidats.candidats(mot_clean, SIMILARITE_MIN)
+        return self._meilleurs(mot_clean, candidats, SIMILARITE_MIN)
+    
+    @staticmethod
+    def _meilleurs(mot_clean: str, candidats, seuil: float) -> List[Tuple[str, float]]:
+        """Les NOMBRE_SUGGESTIONS candidats de fuzz.ratio >= seuil (égalités par ordre alphabétique)"""
+        trouves = process.extract(mot_clean, candidats, scorer=fuzz.ratio,
+                                  limit=None, score_cutoff=seuil)
+        trouves.sort(key=lambda s: (-s[1], s[0]))
+        return [(mot, score) for mot, score, _ in trouves[:NOMBRE_SUGGESTIONS]]
+    
+    def ajouter_mot(self, mot: str, info: Dict) -> bool:
+        """Ajoute un mot au lexique partagé"""
+        return self.lexique.ajouter_mot(mot, info)
+    
+    def _sur_ajout_mot(self, mot: str, info: Dict):
+        """
+        Appelé par le lexique à chaque nouveau mot
+        Invalide le cache : des suggestions déjà calculées peuvent changer
+        """
+        if self.index_candidats is not None:
+            self.index_candidats.ajouter(mot)
+        self.cache_suggestions.vider()
     
     def corriger_texte(self, texte: str) -> List[Dict]:
         """
         Corrige un texte complet et retourne toutes les erreurs trouvées
         
+        Chaque mot distinct n'est vérifié qu'une fois, même s'il est répété.
+        
         Returns:
-            Liste de dictionnaires avec les erreurs et suggestions
+            Liste de dictionnaires avec les erreurs, suggestions et positions
+            ('debut', 'fin' : indices de caractères dans le texte)
         """
-        mots = re.findall(r'\b\w+\b', texte)
+        verifications = {}
         resultats = []
         
-        for i, mot in enumerate(mots):
-            verification = self.verifier_mot(mot)
+        for i, (debut, fin, cle) in enumerate(iterer_tokens(texte)):
+            verification = verifications.get(cle)
+            if verification is None:
+                verification = self.verifier_mot(cle)
+                verifications[cle] = verification
             
             if not verification['est_correct']:
                 resultats.append({
                     'position': i,
-                    'mot_original': mot,
+                    'debut': debut,
+                    'fin': fin,
+                    'mot_original': texte[debut:fin],
                     'suggestions': verification['suggestions'],
                     'suggestions_detaillees': verification['suggestions_avec_info'],
                     'violations_phono': verification['violations'],
@@ -153,4 +230,4 @@ class CorrecteurMalagasy:
         return []
 
 
-corrector = CorrecteurMalagasy('dictionary.json')
+corrector = CorrecteurMalagasy(CHEMIN_DICTIONNAIRE)
@@ -5,11 +5,12 @@ Nouveau Format : definitions, type, exemples, Lemmatisation, synonymes, sentimen
 
 import json
 from typing import List, Dict, Optional
+from lexique import obtenir_lexique, CHEMIN_DICTIONNAIRE, MOT_DEFINITION
 
 class DictionnaireMalagasy:
-    def __init__(self, fichier_path: str):
+    def __init__(self, fichier_path: str = CHEMIN_DICTIONNAIRE):
         """
-        Charge le dictionnaire depuis un fichier JSON
+        Charge le dictionnaire depuis un fichier JSON (via le lexique partagé)
         
         Format attendu:
         {
@@ -23,11 +24,11 @@ class DictionnaireMalagasy:
             }
         }
         """
-        with open(fichier_path, 'r', encoding='utf-8') as f:
-            self.dictionnaire = json.load(f)
+        self.lexique = obtenir_lexique(fichier_path)
+        self.dictionnaire = self.lexique.dictionnaire
         
-        # Créer un index pour recherche rapide
-        self.mots = set(mot.lower() for mot in self.dictionnaire.keys())
+        # Index pour recherche rapide (partagé avec les autres modules)
+        self.mots = self.lexique.mots
         
         print(f"✅ Dictionnaire chargé : {len(self.mots)} mots")
     
@@ -105,11 +106,7 @@ class DictionnaireMalagasy:
         Args:
             type_gram: 'nom', 'verbe', 'adjectif', 'nom propre'
         """
-        resultats = []
-        for mot, info in self.dictionnaire.items():
-            if info.get('type') == type_gram:
-                resultats.append(mot)
-        return resultats
+        return list(self.lexique.index_type.get(type_gram, ()))
     
     def rechercher_par_sentiment(self, sentiment: str) -> List[str]:
         """
@@ -118,41 +115,47 @@ class DictionnaireMalagasy:
         Args:
             sentiment: 'positif', 'negatif', 'neutre'
         """
-        resultats = []
-        for mot, info in self.dictionnaire.items():
-            if info.get('sentiment') == sentiment:
-                resultats.append(mot)
-        return resultats
+        return list(self.lexique.index_sentiment.get(sentiment, ()))
     
     def rechercher_par_lemme(self, lemme: str) -> List[str]:
         """
         NOUVEAU : Trouve tous les mots ayant le même lemme
         Exemple: lemme='faly' → ['faly', 'mahafaly', 'mampifaly']
         """
-        resultats = []
-        lemme_lower = lemme.lower()
-        
-        for mot, info in self.dictionnaire.items():
-            if info.get('Lemmatisation', '').lower() == lemme_lower:
-                resultats.append(mot)
-        
-        return resultats
+        return list(self.lexique.index_lemme.get(lemme.lower(), ()))
     
     def rechercher_definition(self, terme: str) -> List[str]:
         """
         Recherche un terme dans les définitions
-        Retourne les mots dont la définition contient le terme
+        Retourne les mots dont la définition contient le terme, y compris
+        à l'intérieur d'un mot ('riz' trouve aussi 'rizière')
+        
+        L'index inversé restreint les mots à vérifier : chaque mot du terme
+        fait partie d'un mot indexé de la définition. Seul le vocabulaire
+        des définitions est parcouru, pas les définitions elles-mêmes.
         """
-        resultats = []
         terme_lower = terme.lower()
+        termes = set(MOT_DEFINITION.findall(terme_lower))
+        if not termes:
+            candidats = self.mots
+        else:
+            index = self.lexique.index_definitions
+            parties = {t: set() for t in termes}
+            for cle, mots in index.items():
+                for t in termes:
+                    if t in cle:
+                        parties[t].update(mots)
+            candidats = set.intersection(*parties.values())
+            if not candidats:
+                return []
         
-        for mot, info in self.dictionnaire.items():
-            for definition in info.get('definitions', []):
-                if terme_lower in definition.lower():
-                    resultats.append(mot)
-                    break
-        
-        return resultats
+        # Un seul mot cherché : tout candidat le contient, rien à vérifier
+        exact = len(termes) == 1 and terme_lower in termes
+        return [
+            mot for mot in self.dictionnaire
+            if mot in candidats and (exact or any(
+                terme_lower in d.lower() for d in self.dictionnaire[mot].get('definitions', [])))
+        ]
     
     def trouver_tous_synonymes(self, mot: str) -> List[str]:
         """
@@ -180,21 +183,18 @@ class DictionnaireMalagasy:
         """
         Ajoute un nouveau mot au dictionnaire avec le nouveau format
         """
-        mot_lower = mot.lower()
-        
-        if mot_lower in self.mots:
-            print(f"⚠️  Le mot '{mot}' existe déjà")
-            return False
-        
-        self.dictionnaire[mot_lower] = {
+        ajoute = self.lexique.ajouter_mot(mot, {
             "definitions": definitions,
             "type": type_gram,
             "exemples": exemples,
             "Lemmatisation": lemmatisation,
             "synonymes": synonymes,
             "sentiment": sentiment
-        }
-        self.mots.add(mot_lower)
+        })
+        
+        if not ajoute:
+            print(f"⚠️  Le mot '{mot}' existe déjà")
+            return False
         
         print(f"✅ Mot ajouté : {mot}")
         return True
@@ -202,7 +202,7 @@ class DictionnaireMalagasy:
     def sauvegarder(self, fichier_path: str):
         """Sauvegarde le dictionnaire dans un fichier JSON"""
         with open(fichier_path, 'w', encoding='utf-8') as f:
-            json.dump(self.dictionnaire, f, ensure_ascii=False, indent=2)
+            json.dump(dict(self.dictionnaire), f, ensure_ascii=False, indent=2)
         print(f"💾 Dictionnaire sauvegardé : {fichier_path}")
     
     def obtenir_stats(self) -> Dict:
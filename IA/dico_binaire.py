@@ -0,0 +1,248 @@
+"""
+Format binaire compact du dictionnaire Malagasy, ouvert par mmap
+
+Le fichier est partagé entre les processus de travail via le cache de pages
+du système : aucun processus ne recopie le dictionnaire en objets Python.
+
+Structure du fichier (entiers little-endian) :
+    en-tête     : MAGIC, version, nombre d'entrées, nombre de références de
+                  liste, taille de la table de hachage
+    hachage     : table à adressage ouvert (crc32 du mot) -> indice d'entrée
+    entrées     : enregistrements de taille fixe, triés par mot (octets UTF-8)
+    listes      : références (offset, longueur) vers la table des chaînes
+    chaînes     : table des chaînes UTF-8 concaténées
+
+Une référence absente (champ manquant dans le JSON) vaut ABSENT.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b'MGDB'
+VERSION = 1
+ABSENT = 0xFFFFFFFF
+
+EN_TETE = struct.Struct('<4sHxxIII')
+CASE = struct.Struct('<I')
+# mot, type, Lemmatisation, sentiment : (offset, longueur) dans les chaînes
+# definitions, exemples, synonymes : (début, nombre) dans les listes
+ENTREE = struct.Struct('<14I')
+REFERENCE = struct.Struct('<II')
+
+CHAMPS_TEXTE = ('type', 'Lemmatisation', 'sentiment')
+CHAMPS_LISTE = ('definitions', 'exemples', 'synonymes')
+
+
+def compiler(chemin_json: str, chemin_binaire: str) -> int:
+    """
+    Convertit un dictionnaire JSON en fichier binaire
+
+    Seuls les champs du format standard sont conservés (voir CHAMPS_TEXTE
+    et CHAMPS_LISTE).
+
+    Returns:
+        Nombre d'entrées écrites
+    """
+    with open(chemin_json, 'r', encoding='utf-8') as f:
+        dictionnaire = json.load(f)
+
+    chaines = bytearray()
+    positions: Dict[bytes, int] = {}
+
+    def chaine(texte: Optional[str]) -> Tuple[int, int]:
+        if texte is None:
+            return ABSENT, 0
+        donnees = texte.encode('utf-8')
+        offset = positions.get(donnees)
+        if offset is None:
+            offset = len(chaines)
+            positions[donnees] = offset
+            chaines.extend(donnees)
+        return offset, len(donnees)
+
+    listes: List[Tuple[int, int]] = []
+
+    def liste(valeurs: Optional[List[str]]) -> Tuple[int, int]:
+        if valeurs is None:
+            return ABSENT, 0
+        debut = len(listes)
+        listes.extend(chaine(v) for v in valeurs)
+        return debut, len(valeurs)
+
+    # Clés en minuscules comme au chargement du JSON : la dernière l'emporte
+    minuscules = {mot.lower(): info for mot, info in dictionnaire.items()}
+    entrees = sorted(
+        ((mot.encode('utf-8'), info) for mot, info in minuscules.items()),
+        key=lambda e: e[0]
+    )
+
+    # Table de hachage (taux de remplissage <= 50 %)
+    taille_table = 1
+    while taille_table < 2 * len(entrees):
+        taille_table *= 2
+    table = [ABSENT] * taille_table
+    for i, (mot, _) in enumerate(entrees):
+        case = zlib.crc32(mot) & (taille_table - 1)
+        while table[case] != ABSENT:
+            case = (case + 1) & (taille_table - 1)
+        table[case] = i
+
+    enregistrements = bytearray()
+    for mot, info in entrees:
+        champs = [*chaine(mot.decode('utf-8'))]
+        for nom in CHAMPS_TEXTE:
+            champs.extend(chaine(info.get(nom)))
+        for nom in CHAMPS_LISTE:
+            champs.extend(liste(info.get(nom)))
+        enregistrements.extend(ENTREE.pack(*champs))
+
+    # Fichier temporaire renommé une fois complet : le lexique ne peut pas
+    # ouvrir un fichier à moitié écrit (compilation interrompue ou simultanée)
+    temporaire = tempfile.NamedTemporaryFile(dir=os.path.dirname(chemin_binaire) or '.', prefix='.dico-',
+                                             suffix='.tmp', delete=False)
+    try:
+        with temporaire as f:
+            f.write(EN_TETE.pack(MAGIC, VERSION, len(entrees), len(listes), taille_table))
+            f.write(struct.pack(f'<{taille_table}I', *table))
+            f.write(enregistrements)
+            for reference in listes:
+                f.write(REFERENCE.pack(*reference))
+            f.write(chaines)
+        os.replace(temporaire.name, chemin_binaire)
+    except BaseException:
+        os.unlink(temporaire.name)
+        raise
+
+    return len(entrees)
+
+
+class DictionnaireBinaire(Mapping):
+    """
+    Dictionnaire en lecture seule adossé à un fichier binaire mmap
+
+    Se comporte comme le dict chargé depuis le JSON ({mot: info}) et
+    expose la même API de consultation que DictionnaireMalagasy.
+    """
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        with open(chemin, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self._nombre, nombre_listes, self._taille_table = \
+            EN_TETE.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Format de dictionnaire binaire invalide : {chemin}")
+
+        self._debut_table = EN_TETE.size
+        self._debut_entrees = self._debut_table + self._taille_table * CASE.size
+        self._debut_listes = self._debut_entrees + self._nombre * ENTREE.size
+        self._debut_chaines = self._debut_listes + nombre_listes * REFERENCE.size
+
+    # ----- Accès bas niveau -----
+
+    def _entree(self, i: int) -> Tuple[int, ...]:
+        return ENTREE.unpack_from(self._mmap, self._debut_entrees + i * ENTREE.size)
+
+    def _octets(self, offset: int, longueur: int) -> bytes:
+        debut = self._debut_chaines + offset
+        return self._mmap[debut:debut + longueur]
+
+    def _chaine(self, offset: int, longueur: int) -> Optional[str]:
+        if offset == ABSENT:
+            return None
+        return self._octets(offset, longueur).decode('utf-8')
+
+    def _liste(self, debut: int, nombre: int) -> Optional[List[str]]:
+        if debut == ABSENT:
+            return None
+        base = self._debut_listes + debut * REFERENCE.size
+        return [
+            self._chaine(*REFERENCE.unpack_from(self._mmap, base + k * REFERENCE.size))
+            for k in range(nombre)
+        ]
+
+    def _chercher(self, mot: str) -> int:
+        """Indice de l'entrée du mot (table de hachage) ou -1"""
+        cible = mot.encode('utf-8')
+        masque = self._taille_table - 1
+        case = zlib.crc32(cible) & masque
+        while True:
+            (i,) = CASE.unpack_from(self._mmap, self._debut_table + case * CASE.size)
+            if i == ABSENT:
+                return -1
+            offset, longueur = ENTREE.unpack_from(
+                self._mmap, self._debut_entrees + i * ENTREE.size
+            )[:2]
+            if longueur == len(cible) and self._octets(offset, longueur) == cible:
+                return i
+            case = (case + 1) & masque
+
+    def _decoder(self, champs: Tuple[int, ...]) -> Dict:
+        info = {}
+        for k, nom in enumerate(CHAMPS_LISTE):
+            valeur = self._liste(champs[8 + 2 * k], champs[9 + 2 * k])
+            if valeur is not None:
+                info[nom] = valeur
+        for k, nom in enumerate(CHAMPS_TEXTE):
+            valeur = self._chaine(champs[2 + 2 * k], champs[3 + 2 * k])
+            if valeur is not None:
+                info[nom] = valeur
+        return info
+
+    # ----- Interface Mapping -----
+
+    def __getitem__(self, mot: str) -> Dict:
+        i = self._chercher(mot)
+        if i < 0:
+            raise KeyError(mot)
+        return self._decoder(self._entree(i))
+
+    def __contains__(self, mot) -> bool:
+        return isinstance(mot, str) and self._chercher(mot) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._nombre):
+            yield self._chaine(*self._entree(i)[:2])
+
+    def __len__(self) -> int:
+        return self._nombre
+
+    def attributs(self) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """(mot, type, sentiment) de chaque entrée, sans décoder les listes"""
+        for i in range(self._nombre):
+            champs = self._entree(i)
+            yield (self._chaine(champs[0], champs[1]),
+                   self._chaine(champs[2], champs[3]),
+                   self._chaine(champs[6], champs[7]))
+
+    # ----- API compatible DictionnaireMalagasy -----
+
+    def mot_existe(self, mot: str) -> bool:
+        """Vérifie si un mot existe dans le dictionnaire"""
+        return mot.lower() in self
+
+    def obtenir_info(self, mot: str) -> Optional[Dict]:
+        """Récupère toutes les informations d'un mot, ou None"""
+        return self.get(mot.lower())
+
+    def fermer(self):
+        """Libère le mmap"""
+        self._mmap.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile un dictionnaire JSON au format binaire")
+    parser.add_argument('json', help="dictionnaire source (JSON)")
+    parser.add_argument('binaire', help="fichier binaire à produire")
+    args = parser.parse_args()
+
+    nombre = compiler(args.json, args.binaire)
+    print(f"✅ {nombre} mots compilés dans {args.binaire}")
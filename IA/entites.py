@@ -0,0 +1,256 @@
+"""
+Reconnaissance d'entités nommées par liste de noms (gazetteer)
+
+Tous les noms (noms propres du dictionnaire, fichiers de noms) sont
+compilés en un automate d'Aho-Corasick dont les symboles sont des mots :
+le texte est parcouru une seule fois, mot par mot, quel que soit le nombre
+de noms, et un nom de plusieurs mots ("Antananarivo Renivohitra") est
+reconnu comme une seule entité.
+
+Les mots sont comparés sous leur forme normalisée (voir tokeniseur.py),
+puis la casse du texte d'origine décide : une mention commence par une
+majuscule ("Antsirabe", pas "antsirabe"). Un nom ne traverse pas une fin
+de segment (phrase ou ligne), comme dans l'analyse en flux et incrémentale.
+Entre deux noms qui se chevauchent, le plus à gauche puis le plus long
+l'emporte.
+"""
+
+from collections import deque
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from lexique import Lexique
+from tokeniseur import MOT_OU_FIN, normaliser, tokeniser
+
+CATEGORIES = ('villes', 'personnes', 'lieux', 'autres')
+
+# Entité d'un nom : (nom canonique, catégorie)
+Entite = Tuple[str, str]
+
+# Automate compilé : (transitions, échecs, sorties) par état, l'état 0 est
+# la racine ; les sorties d'un état sont les (nombre de mots, entité) des
+# noms qui se terminent sur lui, du plus long au plus court
+Automate = Tuple[List[Dict[str, int]], List[int], List[Tuple[Tuple[int, Entite], ...]]]
+
+# Transitions partagées par tous les états sans successeur (la plupart)
+_AUCUNE_TRANSITION: Dict[str, int] = {}
+
+
+def classer_nom_propre(info: Dict) -> str:
+    """Catégorie d'un nom propre du dictionnaire d'après ses définitions (simple heuristique)"""
+    definitions = ' '.join(info.get('definitions', [])).lower()
+    if 'ville' in definitions or 'capitale' in definitions:
+        return 'villes'
+    if 'lieu' in definitions or 'région' in definitions:
+        return 'lieux'
+    return 'personnes'
+
+
+class IndexEntites:
+    """
+    Noms d'entités et automate d'Aho-Corasick sur leurs mots
+
+    L'automate est recompilé à la première recherche qui suit un ajout.
+    """
+
+    def __init__(self, lexique: Optional[Lexique] = None):
+        """
+        Args:
+            lexique: ses noms propres sont ajoutés, et ceux qui lui seront
+                ajoutés ensuite (voir ajouter_entree)
+        """
+        # Mots normalisés du nom -> entité
+        self.noms: Dict[Tuple[str, ...], Entite] = {}
+        self._automate: Optional[Automate] = None
+        self._verrou = Lock()
+
+        if lexique is not None:
+            for mot, info in lexique.dictionnaire.items():
+                self.ajouter_entree(mot, info)
+            lexique.abonner(self.ajouter_entree)
+
+    def __len__(self) -> int:
+        return len(self.noms)
+
+    def ajouter(self, nom: str, categorie: str, canonique: Optional[str] = None):
+        """
+        Ajoute un nom (ou le remplace)
+
+        Args:
+            canonique: nom rendu pour cette entité (par défaut `nom`) ; un
+                synonyme ("Tana") désigne ainsi l'entité principale
+        """
+        mots = tuple(tokeniser(nom))
+        if not mots:
+            return
+        with self._verrou:
+            self.noms[mots] = (canonique or nom, categorie if categorie in CATEGORIES else 'autres')
+            self._automate = None
+
+    def ajouter_entree(self, mot: str, info: Dict):
+        """
+        Ajoute une entrée du dictionnaire si c'est un nom propre, avec ses
+        synonymes écrits avec une majuscule ("Tana" pour Antananarivo)
+
+        Les clés du lexique sont en minuscules : le nom canonique est pris
+        dans le champ 'Lemmatisation' quand il a la même orthographe.
+        """
+        if info.get('type') != 'nom propre':
+            return
+        lemme = info.get('Lemmatisation') or ''
+        nom = lemme if lemme.lower() == mot else mot.title()
+        categorie = classer_nom_propre(info)
+        self.ajouter(nom, categorie)
+        for synonyme in info.get('synonymes', []):
+            if synonyme[:1].isupper() and synonyme.lower() != mot:
+                self.ajouter(synonyme, categorie, nom)
+
+    def charger(self, chemin: str) -> int:
+        """
+        Ajoute les noms d'un fichier : une ligne "nom<TAB>catégorie" par nom
+
+        Returns:
+            nombre de noms lus
+        """
+        nombre = 0
+        with open(chemin, encoding='utf-8') as f:
+            for ligne in f:
+                nom, _, categorie = ligne.rstrip('\n').partition('\t')
+                if nom.strip():
+                    self.ajouter(nom.strip(), categorie.strip() or 'autres')
+                    nombre += 1
+        return nombre
+
+    # ----- Automate -----
+
+    def _obtenir_automate(self) -> Automate:
+        automate = self._automate
+        if automate is None:
+            with self._verrou:
+                if self._automate is None:
+                    self._automate = self._compiler()
+                automate = self._automate
+        return automate
+
+    def _compiler(self) -> Automate:
+        """Trie des noms, puis liens d'échec et sorties en largeur d'abord"""
+        transitions: List[Dict[str, int]] = [{}]
+        sorties: List[Tuple[Tuple[int, Entite], ...]] = [()]
+        for mots, entite in self.noms.items():
+            etat = 0
+            for mot in mots:
+                suivant = transitions[etat].get(mot)
+                if suivant is None:
+                    suivant = transitions[etat][mot] = len(transitions)
+                    transitions.append({})
+                    sorties.append(())
+                etat = suivant
+            sorties[etat] = ((len(mots), entite),)
+
+        echecs = [0] * len(transitions)
+        file = deque(transitions[0].values())
+        while file:
+            etat = file.popleft()
+            for mot, suivant in transitions[etat].items():
+                file.append(suivant)
+                repli = echecs[etat]
+                while repli and mot not in transitions[repli]:
+                    repli = echecs[repli]
+                echecs[suivant] = transitions[repli].get(mot, 0) if etat else 0
+                # L'état de repli, moins profond, est déjà complet
+                sorties[suivant] += sorties[echecs[suivant]]
+
+        transitions = [t or _AUCUNE_TRANSITION for t in transitions]
+        return transitions, echecs, sorties
+
+    # ----- Recherche -----
+
+    def reperer(self, texte: str, debut: int = 0, fin: Optional[int] = None) -> List[Dict]:
+        """
+        Mentions d'entités dans le texte (ou dans texte[debut:fin])
+
+        Returns:
+            [{'debut', 'fin', 'texte', 'entite', 'categorie'}] dans l'ordre du
+            texte, sans chevauchement ; positions dans `texte`, 'texte' tel
+            qu'il est écrit, 'entite' le nom canonique
+        """
+        return self.tokeniser_et_reperer(texte, debut, fin)[2]
+
+    def tokeniser_et_reperer(self, texte: str, debut: int = 0, fin: Optional[int] = None
+                             ) -> Tuple[List[str], List[int], List[Dict]]:
+        """
+        Tokens, débuts de segments et mentions d'entités, dans le même
+        parcours du texte
+
+        Returns:
+            (tokens comme tokeniser_phrases, indices des tokens qui commencent
+             un segment, mentions comme reperer)
+        """
+        transitions, echecs, sorties = self._obtenir_automate()
+
+        tokens: List[str] = []
+        phrases: List[int] = []
+        nouveau_segment = True
+        candidats = []
+        etat = 0
+        # Début des mots lus par l'automate : les mots du nom en cours sont
+        # les derniers (un mot qui ne mène nulle part ramène à la racine)
+        debuts_mots: List[int] = []
+        for match in MOT_OU_FIN.finditer(texte, debut, len(texte) if fin is None else fin):
+            mot = match.group(1)
+            if mot is None:
+                # Fin de segment : aucun nom ne continue au-delà
+                nouveau_segment = True
+                etat = 0
+                continue
+            if not (mot.isascii() and mot.islower()):
+                mot = normaliser(mot)
+            if nouveau_segment:
+                phrases.append(len(tokens))
+                nouveau_segment = False
+            tokens.append(mot)
+
+            suivant = transitions[etat].get(mot)
+            if suivant is None:
+                # Cas courant : un mot qui ne commence aucun nom
+                if not etat:
+                    continue
+                while suivant is None and etat:
+                    etat = echecs[etat]
+                    suivant = transitions[etat].get(mot)
+                if suivant is None:
+                    etat = 0
+                    continue
+            etat = suivant
+            debuts_mots.append(match.start())
+
+            for longueur, entite in sorties[etat]:
+                position = debuts_mots[-longueur]
+                # Casse du texte d'origine : un nom propre commence par une majuscule
+                if texte[position].isupper():
+                    candidats.append((position, match.end(), entite))
+
+        mentions = [
+            {'debut': d, 'fin': f, 'texte': texte[d:f], 'entite': entite[0], 'categorie': entite[1]}
+            for d, f, entite in _sans_chevauchement(candidats)
+        ]
+        return tokens, phrases, mentions
+
+
+def _sans_chevauchement(candidats: List[Tuple[int, int, Entite]]) -> List[Tuple[int, int, Entite]]:
+    """Garde la mention la plus à gauche, puis la plus longue, parmi celles qui se chevauchent"""
+    retenus = []
+    fin_retenue = -1
+    for candidat in sorted(candidats, key=lambda c: (c[0], -c[1])):
+        if candidat[0] >= fin_retenue:
+            retenus.append(candidat)
+            fin_retenue = candidat[1]
+    return retenus
+
+
+def regrouper(mentions: Sequence[Dict]) -> Dict[str, List[str]]:
+    """Textes des mentions par catégorie : {'villes': [...], 'personnes': [...], ...}"""
+    entites = {categorie: [] for categorie in CATEGORIES}
+    for mention in mentions:
+        entites[mention['categorie']].append(mention['texte'])
+    return entites
@@ -0,0 +1,201 @@
+"""
+Couche d'exécution pour les traitements NLP
+Sort le travail CPU de la boucle d'événements de l'API :
+- pool de threads pour les appels courts
+- pool de processus pour les analyses de gros documents
+- résultats en flux (NDJSON) calculés par paquets dans le pool de threads
+"""
+
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from cache_lru import fusionner_statistiques
+
+# Modules NLP accessibles par nom : cible -> (module, objet global)
+CIBLES = {
+    'nlp': ('nlp_malagasy', 'nlp'),
+    'correcteur': ('corrector', 'corrector'),
+    # État en mémoire : toujours appelé dans le pool de threads (taille=0)
+    'sessions': ('analyse_incrementale', 'sessions'),
+}
+
+
+def _obtenir_cible(cible: str):
+    """Retourne l'instance globale d'un module NLP (chargée une fois par processus)"""
+    nom_module, nom_objet = CIBLES[cible]
+    return getattr(importlib.import_module(nom_module), nom_objet)
+
+
+def _initialiser_processus(cibles):
+    """Charge les modules NLP au démarrage de chaque processus de travail"""
+    for cible in cibles:
+        _obtenir_cible(cible)
+
+
+def _appeler(cible: str, methode: str, *args) -> Any:
+    """Point d'entrée exécuté dans un processus de travail"""
+    return getattr(_obtenir_cible(cible), methode)(*args)
+
+
+def _appeler_json(cible: str, methode: str, *args) -> str:
+    """Comme _appeler, mais sérialise le résultat en JSON dans le processus de travail"""
+    return json.dumps(_appeler(cible, methode, *args), ensure_ascii=False)
+
+
+def _statistiques_locales() -> Dict[str, Dict]:
+    """Statistiques des caches du processus courant"""
+    return {'cache_correcteur': _obtenir_cible('correcteur').cache_suggestions.statistiques()}
+
+
+def _appeler_en_processus(tache, cible: str, methode: str, *args):
+    """
+    Point d'entrée du pool de processus : exécute la tâche et remonte les
+    statistiques des caches du processus de travail avec son résultat
+
+    Returns:
+        (pid, résultat, statistiques)
+    """
+    resultat = tache(cible, methode, *args)
+    return os.getpid(), resultat, _statistiques_locales()
+
+
+def _paquet_ndjson(resultats: Iterator, taille: int) -> str:
+    """
+    Sérialise les résultats suivants d'un générateur, une ligne JSON par
+    résultat, jusqu'à dépasser `taille` caractères ('' quand il est épuisé)
+    """
+    lignes = []
+    longueur = 0
+    for resultat in resultats:
+        ligne = json.dumps(resultat, ensure_ascii=False) + '\n'
+        lignes.append(ligne)
+        longueur += len(ligne)
+        if longueur >= taille:
+            break
+    return ''.join(lignes)
+
+
+class ExecuteurNLP:
+    """
+    Route chaque appel NLP vers un pool de threads ou de processus
+    selon la taille de la requête
+    """
+
+    def __init__(self, threads: int = 4, processus: int = 2,
+                 seuil_processus: int = 20000):
+        """
+        Args:
+            threads: taille du pool de threads (appels courts)
+            processus: taille du pool de processus (0 pour le désactiver)
+            seuil_processus: taille (en caractères) à partir de laquelle
+                une requête est envoyée au pool de processus
+        """
+        self.seuil_processus = seuil_processus
+        self.processus = processus
+        self.pool_threads = ThreadPoolExecutor(max_workers=threads,
+                                               thread_name_prefix='nlp')
+        self.pool_processus: Optional[ProcessPoolExecutor] = None
+        if processus > 0:
+            self.pool_processus = ProcessPoolExecutor(
+                max_workers=processus,
+                # 'spawn' : pas de fork d'un serveur déjà multi-threadé
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_initialiser_processus,
+                initargs=(tuple(CIBLES),)
+            )
+        # Dernières statistiques remontées par chaque processus de travail (pid -> statistiques)
+        self.statistiques_processus: Dict[int, Dict[str, Dict]] = {}
+
+    async def executer(self, cible: str, methode: str, *args, taille: int = 0) -> Any:
+        """
+        Exécute `cible.methode(*args)` hors de la boucle d'événements
+
+        Args:
+            cible: 'nlp' ou 'correcteur'
+            methode: nom de la méthode à appeler
+            taille: taille de l'entrée, décide du pool utilisé
+        """
+        return await self._soumettre(_appeler, cible, methode, *args, taille=taille)
+
+    async def executer_json(self, cible: str, methode: str, *args, taille: int = 0) -> str:
+        """
+        Comme executer, mais renvoie le résultat déjà sérialisé en JSON
+
+        Pour les gros résultats : la sérialisation ne bloque pas la boucle
+        d'événements et rien n'est reconverti par FastAPI.
+        """
+        return await self._soumettre(_appeler_json, cible, methode, *args, taille=taille)
+
+    async def executer_lot_json(self, cible: str, methode: str, elements: list, *args,
+                                taille: int = 0) -> str:
+        """
+        Comme executer_json pour une méthode qui prend une liste et renvoie
+        une liste de même longueur : un gros lot est découpé en une tranche
+        contiguë par processus, et les résultats sont recollés dans l'ordre
+        """
+        if self.pool_processus is None or taille < self.seuil_processus or len(elements) < 2:
+            return await self.executer_json(cible, methode, elements, *args, taille=taille)
+
+        nombre = min(len(elements), self.processus)
+        bornes = [len(elements) * k // nombre for k in range(nombre + 1)]
+        parties = await asyncio.gather(*(
+            self.executer_json(cible, methode, elements[bornes[k]:bornes[k + 1]], *args, taille=taille)
+            for k in range(nombre)
+        ))
+        # Chaque partie est un tableau JSON non vide : on retire ses crochets
+        return '[' + ','.join(partie[1:-1] for partie in parties) + ']'
+
+    async def iterer_ndjson(self, cible: str, methode: str, *args,
+                            taille_paquet: int = 65536) -> AsyncIterator[str]:
+        """
+        Itère sur les résultats du générateur `cible.methode(*args)` en NDJSON
+
+        Le générateur avance dans le pool de threads, par paquets d'environ
+        `taille_paquet` caractères ; le premier paquet ne contient que le
+        premier résultat, envoyé dès qu'il est prêt.
+        """
+        boucle = asyncio.get_running_loop()
+        resultats = _appeler(cible, methode, *args)
+        taille = 1
+        while True:
+            paquet = await boucle.run_in_executor(self.pool_threads, _paquet_ndjson, resultats, taille)
+            if not paquet:
+                return
+            yield paquet
+            taille = taille_paquet
+
+    async def _soumettre(self, tache, cible: str, methode: str, *args, taille: int = 0) -> Any:
+        """Choisit le pool selon la taille de la requête"""
+        boucle = asyncio.get_running_loop()
+
+        if self.pool_processus is None or taille < self.seuil_processus:
+            return await boucle.run_in_executor(self.pool_threads, tache, cible, methode, *args)
+
+        pid, resultat, statistiques = await boucle.run_in_executor(
+            self.pool_processus, _appeler_en_processus, tache, cible, methode, *args)
+        self.statistiques_processus[pid] = statistiques
+        return resultat
+
+    def statistiques(self) -> Dict[str, Dict]:
+        """
+        Statistiques des caches, tous processus confondus : processus
+        principal (pool de threads) et processus de travail, tels qu'ils
+        étaient à la fin de leur dernier appel
+        """
+        parties = [_statistiques_locales(), *self.statistiques_processus.values()]
+        return {
+            nom: dict(fusionner_statistiques([partie[nom] for partie in parties]),
+                      processus=len(parties))
+            for nom in parties[0]
+        }
+
+    def arreter(self):
+        """Libère les pools"""
+        self.pool_threads.shutdown(wait=False, cancel_futures=True)
+        if self.pool_processus is not None:
+            self.pool_processus.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,112 @@
+"""
+Index de génération de candidats pour le correcteur orthographique
+Réduit l'ensemble des mots à scorer avant le calcul de similarité (fuzz.ratio)
+"""
+
+from collections import Counter
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+# Comptes gardés sur un octet : un mot qui répète un caractère plus de
+# COMPTE_MAX fois est compté COMPTE_MAX fois
+COMPTE_MAX = 255
+
+
+class IndexComptes:
+    """
+    Filtre par comptes de caractères, exact pour un seuil de fuzz.ratio
+
+    fuzz.ratio vaut 100 * (1 - indel / (len(a) + len(b))), avec
+    indel = len(a) + len(b) - 2 * lcs. La plus longue sous-séquence commune
+    (lcs) ne peut dépasser le nombre de caractères communs aux deux mots,
+    répétitions comprises, d'où la borne
+        fuzz.ratio(a, b) <= 200 * communs / (len(a) + len(b))
+    Elle est calculée pour tous les mots à la fois à partir d'une colonne
+    numpy de comptes par caractère ; seuls les mots qui peuvent atteindre
+    le seuil sont scorés.
+
+    L'état (mots, longueurs, comptes, taille) est remplacé d'un bloc :
+    les tableaux ne sont écrits qu'au-delà de la taille publiée, les
+    recherches concurrentes n'y voient jamais de mot à moitié ajouté.
+    """
+
+    def __init__(self, mots: Iterable[str]):
+        mots = list(mots)
+        taille = len(mots)
+        capacite = max(taille, 16)
+        longueurs = np.zeros(capacite, np.int32)
+        positions = {}
+        for i, mot in enumerate(mots):
+            longueurs[i] = len(mot)
+            for caractere, compte in Counter(mot).items():
+                positions.setdefault(caractere, ([], []))
+                positions[caractere][0].append(i)
+                positions[caractere][1].append(min(compte, COMPTE_MAX))
+
+        comptes = {}
+        for caractere, (indices, valeurs) in positions.items():
+            colonne = np.zeros(capacite, np.uint8)
+            colonne[indices] = valeurs
+            comptes[caractere] = colonne
+
+        self._etat = (mots, longueurs, comptes, taille)
+
+    def __len__(self) -> int:
+        return self._etat[3]
+
+    def ajouter(self, mot: str):
+        """Indexe un nouveau mot"""
+        mots, longueurs, comptes, taille = self._etat
+        if taille == len(longueurs):
+            # Capacité doublée : copies publiées avec le nouvel état
+            longueurs = np.concatenate((longueurs, np.zeros(taille, np.int32)))
+            comptes = {c: np.concatenate((colonne, np.zeros(taille, np.uint8)))
+                       for c, colonne in comptes.items()}
+        nouveaux = [c for c in set(mot) if c not in comptes]
+        if nouveaux:
+            comptes = dict(comptes)
+            for caractere in nouveaux:
+                comptes[caractere] = np.zeros(len(longueurs), np.uint8)
+
+        longueurs[taille] = len(mot)
+        for caractere, compte in Counter(mot).items():
+            comptes[caractere][taille] = min(compte, COMPTE_MAX)
+        mots.append(mot)
+        self._etat = (mots, longueurs, comptes, taille + 1)
+
+    def candidats(self, mot: str, seuil: float) -> List[str]:
+        """Mots du dictionnaire dont fuzz.ratio avec `mot` peut atteindre `seuil`"""
+        mots, longueurs, comptes, taille = self._etat
+        communs = np.zeros(taille, np.int32)
+        for caractere, compte in Counter(mot).items():
+            colonne = comptes.get(caractere)
+            if colonne is None:
+                continue
+            if compte > COMPTE_MAX:
+                # Compte tronqué : la borne ne tient plus
+                return mots[:taille]
+            communs += np.minimum(colonne[:taille], compte)
+
+        # 200 * communs >= seuil * (len(a) + len(b)), en entiers quand le seuil l'est
+        retenus = np.flatnonzero(200 * communs >= seuil * (len(mot) + longueurs[:taille]))
+        return [mots[i] for i in retenus]
+
+
+INDEX_DISPONIBLES = {
+    'comptes': IndexComptes,
+}
+
+
+def creer_index(nom: Optional[str], mots: Iterable[str]):
+    """
+    Construit l'index de candidats demandé
+
+    Args:
+        nom: 'comptes' ou None (pas d'index, balayage complet)
+    """
+    if nom is None:
+        return None
+    if nom not in INDEX_DISPONIBLES:
+        raise ValueError(f"Index de candidats inconnu : {nom}")
+    return INDEX_DISPONIBLES[nom](mots)
@@ -0,0 +1,261 @@
+"""
+Analyse morphologique malagasy : racine d'un mot absent du dictionnaire
+
+Les préfixes et suffixes sont rangés une fois pour toutes dans deux tries
+(le trie des suffixes est parcouru depuis la fin du mot) : un seul
+parcours du mot donne tous les affixes qui s'y appliquent. Chaque
+découpage produit des racines candidates, en défaisant :
+- la mutation nasale des préfixes man-/mam-/many- (manosika -> tosika,
+  mamono -> vono, mangataka -> hataka, mandainga -> lainga) ;
+- l'élision de la voyelle initiale (malahelo -> alahelo) ;
+- les alternances de fin de racine devant un suffixe (velomana -> velona,
+  fahaterahana -> teraka, verezana -> very) ;
+- le redoublement (tsaratsara, fotsifotsy, mandehandeha).
+
+Seules les racines connues du dictionnaire (mots ou valeurs du champ
+'Lemmatisation') sont retenues, en préférant l'analyse la plus simple ;
+sans racine connue, le mot est réduit par les règles seules. Les résultats
+sont mémorisés par forme de mot.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cache_lru import ABSENT, CacheLRU
+from lexique import Lexique
+
+VOYELLES = 'aeiouy'
+
+# Par nasale de préfixe : (consonne initiale de la racine absorbée, lettres
+# qui peuvent suivre la nasale) ; '' : racine conservée telle quelle
+# (man + deha -> mandeha, mand + resy -> mandresy)
+MUTATIONS_NASALES = {
+    'n': (('', 'dgjz' + VOYELLES), ('t', VOYELLES), ('s', VOYELLES), ('ts', VOYELLES)),
+    'ng': (('k', VOYELLES), ('h', VOYELLES)),
+    'nd': (('l', VOYELLES), ('', 'r')),
+    'm': (('p', VOYELLES), ('f', VOYELLES), ('v', VOYELLES), ('', 'b')),
+    'ny': (('', VOYELLES),),
+}
+
+# Préfixes suivis d'une nasale (ma + n -> man, fa + m -> fam...)
+BASES_NASALES = ('ma', 'mpa', 'fa', 'mifa', 'mampa', 'ampa', 'mpampa', 'fampa')
+
+# Préfixes sans mutation
+PREFIXES_SIMPLES = (
+    'mi', 'ma', 'maha', 'mampi', 'mampa', 'mifampi', 'mifanka', 'mpi', 'mpampi',
+    'ampi', 'aha', 'tafa', 'voa', 'fi', 'faha', 'fampi', 'fanka', 'fah',
+)
+
+# Suffixes verbaux et nominaux, possessifs
+SUFFIXES = ('ana', 'ina', 'ena', 'na', 'an', 'in', 'ko', 'nao', 'ny', 'ntsika',
+            'nay', 'ndreo', 'tsika', 'ay', 'ao')
+
+# Fin du thème devant un suffixe -> fin de la racine (velom-ana -> velona)
+ALTERNANCES = {
+    'h': ('ka',), 'r': ('tra',), 'er': ('itra',), 'm': ('na',), 'v': ('',),
+    'ez': ('y',), 'iz': ('y',), 'iaz': ('y',), 'es': ('y',), 'i': ('y',), 'e': ('y',),
+}
+
+# Voyelle ou syllabe finale perdue devant un suffixe (tsar-ana -> tsara)
+FINALES_PERDUES = ('a', 'y', 'ka', 'tra', 'na')
+
+# Finales qui disparaissent dans la première moitié d'un redoublement
+# (tsanga-tsangana)
+FINALES_REDOUBLEMENT = ('na', 'ka', 'tra')
+
+# Une racine malagasy se termine par une voyelle (-y en fin de mot, jamais -i)
+FINALES_PLAUSIBLES = frozenset('aeoy')
+
+# Noyau de syllabe : sans racine connue, un thème d'une seule syllabe n'est
+# pas réduit (tany n'est pas ta + -ny)
+SYLLABE = re.compile(r'[aeiouy]+')
+
+# Longueur minimale d'une racine
+LONGUEUR_RACINE = 2
+
+TAILLE_CACHE = 100000
+
+FIN = ''
+
+
+def _variantes_temps(prefixe: str) -> Tuple[str, ...]:
+    """Présent, passé et futur d'un préfixe verbal (man-, nan-, han-)"""
+    if prefixe.startswith('m') and not prefixe.startswith('mp'):
+        return prefixe, 'n' + prefixe[1:], 'h' + prefixe[1:]
+    return prefixe,
+
+
+def _tableau_prefixes() -> Dict[str, Tuple[Tuple[str, Optional[str]], ...]]:
+    """Préfixe de surface -> (début de racine, lettres suivantes permises ou None)"""
+    prefixes: Dict[str, Tuple[Tuple[str, Optional[str]], ...]] = {}
+
+    def ajouter(prefixe: str, debuts: Tuple[Tuple[str, Optional[str]], ...]):
+        for variante in _variantes_temps(prefixe):
+            anciens = prefixes.get(variante, ())
+            prefixes[variante] = anciens + tuple(d for d in debuts if d not in anciens)
+
+    for base in BASES_NASALES:
+        for nasale, debuts in MUTATIONS_NASALES.items():
+            ajouter(base + nasale, debuts)
+    for prefixe in PREFIXES_SIMPLES:
+        # Voyelle initiale de la racine élidée après un préfixe en -a
+        ajouter(prefixe, (('', None), ('a', None)) if prefixe.endswith('a') else (('', None),))
+    return prefixes
+
+
+class TrieAffixes:
+    """
+    Affixes rangés caractère par caractère ; chaque affixe porte ses
+    restaurations (débuts ou fins de racine possibles)
+    """
+
+    def __init__(self, affixes: Dict[str, Tuple], depuis_fin: bool = False):
+        self.depuis_fin = depuis_fin
+        self.racine: Dict = {}
+        for affixe, restaurations in affixes.items():
+            noeud = self.racine
+            for caractere in (reversed(affixe) if depuis_fin else affixe):
+                noeud = noeud.setdefault(caractere, {})
+            noeud[FIN] = restaurations
+
+    def correspondances(self, mot: str) -> List[Tuple[int, Tuple]]:
+        """(longueur, restaurations) de chaque affixe présent au début (ou à la fin) du mot"""
+        resultats = []
+        noeud = self.racine
+        n = len(mot)
+        for k in range(n):
+            noeud = noeud.get(mot[n - 1 - k] if self.depuis_fin else mot[k])
+            if noeud is None:
+                break
+            restaurations = noeud.get(FIN)
+            if restaurations is not None:
+                resultats.append((k + 1, restaurations))
+        return resultats
+
+
+def sans_redoublement(forme: str) -> List[str]:
+    """Bases dont la forme est un redoublement (tsaratsara -> tsara)"""
+    bases = []
+    # Moitiés d'au moins trois lettres : lalana n'est pas un redoublement
+    for k in range(LONGUEUR_RACINE + 1, len(forme) - LONGUEUR_RACINE):
+        gauche, droite = forme[:k], forme[k:]
+        if droite == gauche or droite == 'n' + gauche:
+            bases.append(gauche)
+        elif droite.endswith('y') and gauche == droite[:-1] + 'i':
+            bases.append(droite)
+        elif any(droite == gauche + finale for finale in FINALES_REDOUBLEMENT):
+            bases.append(droite)
+    return bases
+
+
+class LemmatiseurMalagasy:
+    """Racines des mots inconnus, validées par le lexique partagé"""
+
+    def __init__(self, lexique: Lexique, taille_cache: int = TAILLE_CACHE):
+        self.lexique = lexique
+        self.prefixes = TrieAffixes(_tableau_prefixes())
+        self.suffixes = TrieAffixes({s: () for s in SUFFIXES}, depuis_fin=True)
+        self.longueur_alternance = max(map(len, ALTERNANCES))
+
+        # Forme connue -> lemme : mots du dictionnaire et lemmes eux-mêmes
+        self.racines: Dict[str, str] = {}
+        for lemme, mots in lexique.index_lemme.items():
+            for mot in mots:
+                self.racines[mot] = lemme or mot
+        for lemme in lexique.index_lemme:
+            if lemme:
+                self.racines.setdefault(lemme, lemme)
+
+        self.cache = CacheLRU(taille_cache)
+        lexique.abonner(self._sur_ajout_mot)
+
+    def _sur_ajout_mot(self, mot: str, info: Dict):
+        """Un nouveau mot peut servir de racine : les analyses mémorisées sont invalidées"""
+        lemme = info.get('Lemmatisation', '').lower()
+        self.racines[mot] = lemme or mot
+        if lemme:
+            self.racines.setdefault(lemme, lemme)
+        self.cache.vider()
+
+    def lemmatiser(self, mot: str) -> str:
+        """Racine d'un mot (forme normalisée, voir tokeniseur.normaliser)"""
+        lemme = self.cache.obtenir(mot, ABSENT)
+        if lemme is ABSENT:
+            lemme = self.analyser(mot)
+            self.cache.ajouter(mot, lemme)
+        return lemme
+
+    def analyser(self, mot: str) -> str:
+        """Analyse sans mémorisation"""
+        # Lemme connu (valeur du champ Lemmatisation) : déjà une racine
+        lemme = self.racines.get(mot)
+        if lemme is not None:
+            return lemme
+
+        meilleur: Optional[Tuple[int, int, str]] = None
+        for _, cout, _, _, candidat in self._candidats(mot):
+            lemme = self.racines.get(candidat)
+            if lemme is None or candidat == mot:
+                continue
+            # Analyse la plus simple, puis racine la plus longue
+            cle = (cout, -len(candidat), lemme)
+            if meilleur is None or cle < meilleur:
+                meilleur = cle
+        if meilleur is not None:
+            return meilleur[2]
+        return self._reduire(mot)
+
+    def _candidats(self, mot: str) -> Iterable[Tuple[int, int, int, str, str]]:
+        """
+        (affixes retirés, nombre d'opérations, longueur des affixes, thème
+        avant restauration, racine candidate) de chaque découpage du mot
+        """
+        for longueur_prefixe, restaurations in [(0, (('', None),))] + self.prefixes.correspondances(mot):
+            reste = mot[longueur_prefixe:]
+            if len(reste) < LONGUEUR_RACINE:
+                continue
+            debuts = [debut for debut, suivantes in restaurations
+                      if suivantes is None or reste[0] in suivantes]
+            cout_prefixe = longueur_prefixe > 0
+            formes = [(reste, 0)] + [(base, 1) for base in sans_redoublement(reste)]
+
+            for forme, cout_redoublement in formes:
+                for longueur_suffixe, _ in [(0, ())] + self.suffixes.correspondances(forme):
+                    theme = forme[:len(forme) - longueur_suffixe]
+                    if len(theme) < LONGUEUR_RACINE:
+                        continue
+                    affixes = cout_prefixe + cout_redoublement + (longueur_suffixe > 0)
+                    cout = affixes
+                    for fin, cout_fin in self._fins(theme, longueur_suffixe > 0):
+                        for debut in debuts:
+                            yield (affixes, cout + cout_fin + (debut != ''),
+                                   longueur_prefixe + longueur_suffixe, theme, debut + fin)
+
+    def _fins(self, theme: str, suffixe: bool) -> Iterable[Tuple[str, int]]:
+        """Thèmes restaurés (fin de racine) et leur coût"""
+        yield theme, 0
+        if not suffixe:
+            return
+        # Une alternance est plus spécifique qu'une finale perdue
+        for k in range(1, min(self.longueur_alternance, len(theme) - 1) + 1):
+            for remplacement in ALTERNANCES.get(theme[-k:], ()):
+                yield theme[:-k] + remplacement, 1
+        for finale in FINALES_PERDUES:
+            yield theme + finale, 2
+
+    def _reduire(self, mot: str) -> str:
+        """
+        Sans racine connue : le découpage qui retire le plus d'affixes, et
+        les plus longs, en laissant une racine plausible (finale en voyelle,
+        jamais en -i) et un thème d'au moins deux syllabes
+        """
+        meilleur: Optional[Tuple[Tuple[int, int, int], str]] = None
+        for affixes, cout, longueur_affixes, theme, candidat in self._candidats(mot):
+            if candidat[-1] not in FINALES_PLAUSIBLES or (affixes and len(SYLLABE.findall(theme)) < 2):
+                continue
+            # À égalité, le premier candidat (mutation la plus courante) l'emporte
+            cle = (-affixes, -longueur_affixes, cout)
+            if meilleur is None or cle < meilleur[0]:
+                meilleur = cle, candidat
+        return mot if meilleur is None else meilleur[1]
+
@@ -0,0 +1,159 @@
+"""
+Lexique partagé entre tous les modules NLP
+Le dictionnaire est chargé une seule fois par processus et indexé une seule fois
+"""
+
+import json
+import os
+import re
+from collections import ChainMap, defaultdict
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+from dico_binaire import DictionnaireBinaire
+
+# Dictionnaire utilisé par défaut par tous les modules
+CHEMIN_DICTIONNAIRE = 'dictionary.json'
+
+MOT_DEFINITION = re.compile(r'\w+')
+
+
+class Lexique:
+    """
+    Dictionnaire malagasy et ses index communs
+
+    Format attendu:
+    {"mot": {"definitions": [...], "type": "...", "exemples": [...],
+             "Lemmatisation": "...", "synonymes": [...], "sentiment": "..."}}
+
+    Un fichier .bin (voir dico_binaire.py) est ouvert par mmap ; les mots
+    ajoutés ensuite sont gardés en mémoire par-dessus.
+
+    Les index secondaires associent une clé à un ensemble ordonné de mots
+    (dict dont seules les clés servent), dans l'ordre du dictionnaire.
+    """
+
+    def __init__(self, chemin: str):
+        self.chemin = chemin
+        self.index_type = defaultdict(dict)
+        self.index_sentiment = defaultdict(dict)
+
+        # Construits à la première utilisation (recherches du dictionnaire)
+        self._index_lemme = None
+        self._index_definitions = None
+
+        if chemin.endswith('.bin'):
+            binaire = DictionnaireBinaire(chemin)
+            self.dictionnaire = ChainMap({}, binaire)
+            self.mots = set()
+            for mot, type_gram, sentiment in binaire.attributs():
+                self.mots.add(mot)
+                self.index_type[type_gram or 'inconnu'][mot] = None
+                self.index_sentiment[sentiment or 'neutre'][mot] = None
+        else:
+            with open(chemin, 'r', encoding='utf-8') as f:
+                donnees = json.load(f)
+            self.dictionnaire = {mot.lower(): info for mot, info in donnees.items()}
+            self.mots = set(self.dictionnaire)
+            for mot, info in self.dictionnaire.items():
+                self._indexer(mot, info)
+
+        # Incrémenté à chaque modification du vocabulaire
+        self.version = 0
+        self._abonnes: List[Callable[[str, Dict], None]] = []
+
+        print(f"✅ Lexique chargé : {len(self.mots)} mots ({chemin})")
+
+    def _indexer(self, mot: str, info: Dict):
+        """Ajoute un mot aux index secondaires"""
+        self.index_type[info.get('type', 'inconnu')][mot] = None
+        self.index_sentiment[info.get('sentiment', 'neutre')][mot] = None
+        if self._index_lemme is not None:
+            self._indexer_lemme(mot, info)
+        if self._index_definitions is not None:
+            self._indexer_definitions(mot, info)
+
+    def _indexer_lemme(self, mot: str, info: Dict):
+        self._index_lemme[info.get('Lemmatisation', '').lower()][mot] = None
+
+    def _indexer_definitions(self, mot: str, info: Dict):
+        for definition in info.get('definitions', []):
+            for terme in MOT_DEFINITION.findall(definition.lower()):
+                self._index_definitions[terme][mot] = None
+
+    @property
+    def index_lemme(self) -> Dict[str, Dict[str, None]]:
+        """Lemme (minuscules) -> mots"""
+        if self._index_lemme is None:
+            self._index_lemme = defaultdict(dict)
+            for mot, info in self.dictionnaire.items():
+                self._indexer_lemme(mot, info)
+        return self._index_lemme
+
+    @property
+    def index_definitions(self) -> Dict[str, Dict[str, None]]:
+        """Index inversé : mot apparaissant dans une définition -> mots définis"""
+        if self._index_definitions is None:
+            self._index_definitions = defaultdict(dict)
+            for mot, info in self.dictionnaire.items():
+                self._indexer_definitions(mot, info)
+        return self._index_definitions
+
+    def __contains__(self, mot: str) -> bool:
+        return mot in self.dictionnaire
+
+    def __len__(self) -> int:
+        return len(self.dictionnaire)
+
+    def obtenir_info(self, mot: str) -> Optional[Dict]:
+        """Informations d'un mot (clé en minuscules) ou None"""
+        return self.dictionnaire.get(mot.lower())
+
+    def abonner(self, rappel: Callable[[str, Dict], None]):
+        """Enregistre une fonction appelée avec (mot, info) à chaque ajout"""
+        self._abonnes.append(rappel)
+
+    def ajouter_mot(self, mot: str, info: Dict) -> bool:
+        """
+        Ajoute un mot et prévient les modules abonnés
+
+        Returns:
+            False si le mot existe déjà
+        """
+        mot_lower = mot.lower()
+        if mot_lower in self.mots:
+            return False
+
+        self.dictionnaire[mot_lower] = info
+        self.mots.add(mot_lower)
+        self._indexer(mot_lower, info)
+        self.version += 1
+
+        for rappel in self._abonnes:
+            rappel(mot_lower, info)
+
+        return True
+
+
+_lexiques: Dict[str, Lexique] = {}
+_verrou = Lock()
+
+
+def _choisir_source(chemin: str) -> str:
+    """Préfère la version binaire compilée d'un JSON si elle est à jour"""
+    base, extension = os.path.splitext(chemin)
+    binaire = base + '.bin'
+    if (extension == '.json' and os.path.exists(binaire)
+            and os.path.getmtime(binaire) >= os.path.getmtime(chemin)):
+        return binaire
+    return chemin
+
+
+def obtenir_lexique(chemin: str = CHEMIN_DICTIONNAIRE) -> Lexique:
+    """Retourne le lexique du fichier donné, chargé au premier appel seulement"""
+    cle = os.path.abspath(chemin)
+    with _verrou:
+        lexique = _lexiques.get(cle)
+        if lexique is None:
+            lexique = Lexique(_choisir_source(chemin))
+            _lexiques[cle] = lexique
+    return lexique
@@ -3,13 +3,19 @@ API Backend FastAPI pour l'Éditeur de Texte Malagasy
 Intègre tous les modules NLP
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response, WebSocket
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from pydantic import BaseModel, Field
+from typing import Any, List, Dict, Optional
 import json
-from nlp_malagasy import nlp
+from nlp_malagasy import nlp, LIMITE_SUGGESTIONS
 from corrector import corrector
+from analyse_incrementale import SessionInconnue, VersionPerimee
+from entites import regrouper as regrouper_entites
+from canal_editeur import CanalEditeur, compteurs as compteurs_canal
+from execution import ExecuteurNLP
 
 # Importer vos classes NLP (à créer dans des fichiers séparés)
 # from nlp_pipeline import NLPMalagasy
@@ -26,7 +32,22 @@ class MotRequest(BaseModel):
 
 class PredictionRequest(BaseModel):
     contexte: str
-    limite: Optional[int] = 5
+    limite: int = Field(5, ge=1, le=LIMITE_SUGGESTIONS)
+
+class SessionRequest(BaseModel):
+    texte: Optional[str] = ""
+
+class DeltaRequest(BaseModel):
+    version: int
+    ops: List[Dict[str, Any]]
+
+class LotRequest(BaseModel):
+    textes: List[str]
+
+class CompletionRequest(BaseModel):
+    prefixe: str
+    contexte: Optional[str] = ""
+    limite: int = Field(5, ge=1, le=LIMITE_SUGGESTIONS)
 
 class AnalyseResponse(BaseModel):
     tokens: List[str]
@@ -38,10 +59,28 @@ class AnalyseResponse(BaseModel):
 
 # ===== INITIALISATION =====
 
+# Exécution hors de la boucle d'événements : threads pour les petites
+# requêtes, processus pour les documents de plus de SEUIL_PROCESSUS caractères
+THREADS_NLP = 4
+PROCESSUS_NLP = 2
+SEUIL_PROCESSUS = 20000
+
+executeur = ExecuteurNLP(
+    threads=THREADS_NLP,
+    processus=PROCESSUS_NLP,
+    seuil_processus=SEUIL_PROCESSUS
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    executeur.arreter()
+
 app = FastAPI(
     title="API NLP Malagasy",
     description="API pour l'éditeur de texte augmenté par l'IA",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS pour permettre les requêtes depuis le frontend
@@ -92,6 +131,11 @@ class NLPDemo:
     def obtenir_synonymes(self, mot):
         return ["soa", "mendrika"]
 
+def reponse_json(**fragments: str) -> Response:
+    """Construit une réponse {"success": true, ...} à partir de fragments JSON déjà sérialisés"""
+    corps = ''.join(f', "{cle}": {valeur}' for cle, valeur in fragments.items())
+    return Response(content='{"success": true' + corps + '}', media_type="application/json")
+
 # ===== ENDPOINTS =====
 
 @app.get("/")
@@ -102,14 +146,20 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "analyse_complete": "/api/analyser-texte",
+            "analyse_flux": "/api/analyser-texte/flux",
+            "analyse_incrementale": "/api/sessions",
             "correction": "/api/corriger",
+            "correction_texte": "/api/corriger-texte",
             "tokenization": "/api/tokenize",
             "lemmatisation": "/api/lemmatiser",
             "pos_tagging": "/api/pos-tag",
             "ner": "/api/entites",
             "sentiment": "/api/sentiment",
             "prediction": "/api/predire-mot",
+            "completion": "/api/completer",
             "synonymes": "/api/synonymes",
+            "lots": "/api/lot/{lemmatiser,pos-tag,sentiment}",
+            "canal_editeur": "/ws/editeur",
         }
     }
 
@@ -122,14 +172,72 @@ async def analyser_texte(request: TexteRequest):
     Retourne : tokens, lemmes, POS tags, entités, sentiment, stats
     """
     try:
-        analyse = nlp.analyser_texte_complet(request.texte)
-        return {
-            "success": True,
-            "data": analyse
-        }
+        analyse = await executeur.executer_json(
+            'nlp', 'analyser_texte_complet', request.texte,
+            taille=len(request.texte)
+        )
+        return reponse_json(data=analyse)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/analyser-texte/flux")
+async def analyser_texte_flux(request: TexteRequest):
+    """
+    Analyse NLP complète d'un long texte, envoyée au fil de l'analyse
+    Retourne du NDJSON : une ligne par phrase (debut, fin, tokens, lemmes,
+    POS tags, entités, sentiment), puis une ligne finale avec les entités,
+    le sentiment et les stats du texte entier
+    """
+    async def lignes():
+        try:
+            async for paquet in executeur.iterer_ndjson('nlp', 'analyser_texte_flux', request.texte):
+                yield paquet
+        except Exception as e:
+            # Le statut HTTP est déjà envoyé : l'erreur devient la dernière ligne
+            yield json.dumps({"erreur": str(e)}, ensure_ascii=False) + '\n'
+
+    return StreamingResponse(lignes(), media_type="application/x-ndjson")
+
+@app.post("/api/sessions")
+async def ouvrir_session(request: SessionRequest):
+    """
+    Ouvre une session d'analyse incrémentale
+    Retourne l'identifiant de session, la version et l'analyse de chaque segment
+    """
+    try:
+        # Session gardée en mémoire : jamais envoyée au pool de processus
+        session = await executeur.executer_json('sessions', 'ouvrir', request.texte)
+        return reponse_json(data=session)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/sessions/{session_id}/delta")
+async def modifier_session(session_id: str, request: DeltaRequest):
+    """
+    Applique un delta Quill au document de la session
+    Retourne uniquement les segments ré-analysés et les identifiants supprimés
+    """
+    try:
+        modifications = await executeur.executer_json(
+            'sessions', 'modifier', session_id, request.version, request.ops
+        )
+        return reponse_json(data=modifications)
+    except SessionInconnue:
+        raise HTTPException(status_code=404, detail="Session inconnue ou expirée")
+    except VersionPerimee as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/api/sessions/{session_id}")
+async def fermer_session(session_id: str):
+    """Ferme une session d'analyse incrémentale"""
+    if not await executeur.executer('sessions', 'fermer', session_id):
+        raise HTTPException(status_code=404, detail="Session inconnue ou expirée")
+    return {"success": True}
+
 # ===== MODULE 2 : CORRECTION ORTHOGRAPHIQUE =====
 
 @app.post("/api/corriger")
@@ -141,7 +249,26 @@ async def corriger_texte(request: TexteRequest):
         
         return {
             "success": True,
-            "data": corrector.verifier_mot(request.texte),
+            "data": await executeur.executer('correcteur', 'verifier_mot', request.texte),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/corriger-texte")
+async def corriger_document(request: TexteRequest):
+    """
+    Vérifie l'orthographe d'un document complet en un seul appel
+    Retourne les erreurs avec leurs positions (caractères) et suggestions
+    """
+    try:
+        erreurs = await executeur.executer(
+            'correcteur', 'corriger_texte', request.texte,
+            taille=len(request.texte)
+        )
+        return {
+            "success": True,
+            "erreurs": erreurs,
+            "nombre_erreurs": len(erreurs)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -152,7 +279,10 @@ async def corriger_texte(request: TexteRequest):
 async def tokenize(request: TexteRequest):
     """Découpe le texte en tokens"""
     try:
-        tokens = nlp.tokenize(request.texte)
+        tokens = await executeur.executer(
+            'nlp', 'tokenize', request.texte,
+            taille=len(request.texte)
+        )
         return {
             "success": True,
             "tokens": tokens,
@@ -167,7 +297,7 @@ async def tokenize(request: TexteRequest):
 async def lemmatiser(request: MotRequest):
     """Retrouve la racine d'un mot"""
     try:
-        lemme = nlp.lemmatiser(request.mot)
+        lemme = await executeur.executer('nlp', 'lemmatiser', request.mot)
         return {
             "success": True,
             "mot": request.mot,
@@ -182,8 +312,10 @@ async def lemmatiser(request: MotRequest):
 async def pos_tag(request: TexteRequest):
     """Étiquetage grammatical des mots"""
     try:
-        tokens = nlp.tokenize(request.texte)
-        pos_tags = nlp.pos_tag(tokens)
+        pos_tags = await executeur.executer(
+            'nlp', 'pos_tag_texte', request.texte,
+            taille=len(request.texte)
+        )
         
         return {
             "success": True,
@@ -199,12 +331,19 @@ async def pos_tag(request: TexteRequest):
 
 @app.post("/api/entites")
 async def extraire_entites(request: TexteRequest):
-    """Extrait les entités nommées du texte"""
+    """
+    Extrait les entités nommées du texte : mentions (positions, nom
+    canonique, catégorie) et leurs textes regroupés par catégorie
+    """
     try:
-        entites = nlp.extraire_entites(request.texte)
+        mentions = await executeur.executer(
+            'nlp', 'reperer_entites', request.texte,
+            taille=len(request.texte)
+        )
         return {
             "success": True,
-            "entites": entites
+            "entites": regrouper_entites(mentions),
+            "mentions": mentions
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -215,7 +354,10 @@ async def extraire_entites(request: TexteRequest):
 async def analyser_sentiment(request: TexteRequest):
     """Analyse le sentiment du texte"""
     try:
-        sentiment = nlp.analyser_sentiment(request.texte)
+        sentiment = await executeur.executer(
+            'nlp', 'analyser_sentiment', request.texte,
+            taille=len(request.texte)
+        )
         return {
             "success": True,
             "sentiment": sentiment
@@ -229,16 +371,38 @@ async def analyser_sentiment(request: TexteRequest):
 async def predire_mot(request: PredictionRequest):
     """Prédit le mot suivant basé sur le contexte"""
     try:
-        predictions = nlp.predire_mot_suivant(
-            request.contexte, 
+        predictions = await executeur.executer(
+            'nlp', 'predire_avec_frequences',
+            request.contexte,
             request.limite
         )
         
         return {
             "success": True,
             "predictions": [
-                {"mot": mot, "frequence": freq}
-                for mot, freq in predictions
+                {"mot": mot, "frequence": frequence, "score": round(score, 6)}
+                for mot, score, frequence in predictions
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/completer")
+async def completer_mot(request: CompletionRequest):
+    """Complète le mot en cours de frappe (préfixe), selon le contexte qui précède"""
+    try:
+        completions = await executeur.executer(
+            'nlp', 'completer_mot',
+            request.prefixe,
+            request.contexte,
+            request.limite
+        )
+        
+        return {
+            "success": True,
+            "completions": [
+                {"mot": mot, "score": round(score, 6)}
+                for mot, score in completions
             ]
         }
     except Exception as e:
@@ -259,6 +423,45 @@ async def obtenir_synonymes(mot: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ===== MODULE 10 : TRAITEMENT PAR LOTS =====
+
+async def analyser_lot(textes: List[str], champs: List[str]) -> Response:
+    """Analyse un lot de documents (découpé entre les processus s'il est gros)"""
+    try:
+        resultats = await executeur.executer_lot_json(
+            'nlp', 'analyser_lot', textes, champs,
+            taille=sum(map(len, textes))
+        )
+        return reponse_json(data=resultats, nombre_documents=str(len(textes)))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/lot/lemmatiser")
+async def lemmatiser_lot(request: LotRequest):
+    """Tokens et lemmes de chaque document, dans l'ordre"""
+    return await analyser_lot(request.textes, ['tokens', 'lemmes'])
+
+@app.post("/api/lot/pos-tag")
+async def pos_tag_lot(request: LotRequest):
+    """Étiquetage grammatical de chaque document, dans l'ordre"""
+    return await analyser_lot(request.textes, ['pos_tags'])
+
+@app.post("/api/lot/sentiment")
+async def sentiment_lot(request: LotRequest):
+    """Sentiment de chaque document, dans l'ordre"""
+    return await analyser_lot(request.textes, ['sentiment'])
+
+# ===== MODULE 11 : CANAL TEMPS RÉEL =====
+
+@app.websocket("/ws/editeur")
+async def canal_editeur(websocket: WebSocket):
+    """
+    Prédictions, complétions, corrections et sentiment sur une seule connexion
+    Les requêtes périmées par une frappe plus récente sont annulées (voir canal_editeur.py)
+    """
+    await websocket.accept()
+    await CanalEditeur(websocket, executeur).ecouter()
+
 # ===== HEALTH CHECK =====
 
 @app.get("/health")
@@ -283,7 +486,10 @@ async def obtenir_stats():
         "stats": {
             "mots_dictionnaire": 5000,  # À remplacer par len(nlp.dictionnaire)
             "corpus_size": "100k mots",
-            "modules_actifs": 9
+            "modules_actifs": 9,
+            # Caches du processus principal et des processus de travail
+            **executeur.statistiques(),
+            "canal_editeur": dict(compteurs_canal)
         }
     }
 
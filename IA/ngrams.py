@@ -0,0 +1,821 @@
+"""
+Modèle de langue n-grams (ordre 2 à 5) pour la prédiction du mot suivant
+
+Le modèle entraîné est sérialisé sur disque, associé à l'empreinte du corpus
+(et à sa taille et sa date, pour ne pas relire le corpus tant qu'elles n'ont
+pas changé), pour ne pas ré-entraîner à chaque démarrage de l'API.
+
+Entraînement hors ligne (éventuellement sur plusieurs processus) :
+    python ngrams.py cleaned_bible.txt -j 4 -n 4
+
+Perplexité sur les 10 % finaux du corpus (modèle entraîné sur le reste) :
+    python ngrams.py cleaned_bible.txt --evaluer 0.1
+"""
+
+import argparse
+import codecs
+import hashlib
+import math
+import os
+import tempfile
+import time
+import zipfile
+from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from tokeniseur import MOT, SEPARATEUR, normaliser
+
+# Version du format sérialisé (à incrémenter si la structure ou le
+# découpage en tokens change)
+VERSION_MODELE = 6
+
+# Taille (en octets) des blocs lus pendant l'entraînement
+TAILLE_BLOC = 1 << 20
+
+# Tableaux d'une TableNgrams, dans l'ordre du constructeur
+CHAMPS_TABLE = ('cles', 'debuts', 'successeurs', 'comptes', 'continuations',
+                'totaux', 'totaux_continuation')
+
+ORDRE_MAX = 5
+ORDRE_DEFAUT = 4
+# Compte minimal des n-grams d'ordre >= 3 conservés (1 : pas d'élagage)
+SEUIL_ELAGAGE_DEFAUT = 1
+
+LISSAGES = ('kneser-ney', 'stupid-backoff')
+# Facteur appliqué à chaque repli par le stupid backoff (Brants et al., 2007)
+ALPHA_REPLI = 0.4
+
+
+def empreinte_corpus(corpus_path: str) -> str:
+    """Empreinte SHA-256 du contenu du corpus"""
+    h = hashlib.sha256()
+    with open(corpus_path, 'rb') as f:
+        for bloc in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def signature_corpus(corpus_path: str) -> Tuple[int, int]:
+    """Taille et date de modification (ns) du corpus, sans le lire"""
+    etat = os.stat(corpus_path)
+    return etat.st_size, etat.st_mtime_ns
+
+
+def decouper_corpus(corpus_path: str, nombre: int) -> List[Tuple[int, int]]:
+    """
+    Découpe le corpus en `nombre` plages d'octets (debut, fin) de tailles
+    proches, alignées sur des débuts de ligne
+    """
+    taille = os.path.getsize(corpus_path)
+    bornes = [0]
+    with open(corpus_path, 'rb') as f:
+        for k in range(1, nombre):
+            f.seek(max(k * taille // nombre, bornes[-1]))
+            f.readline()
+            bornes.append(f.tell())
+    bornes.append(taille)
+    return [(debut, fin) for debut, fin in zip(bornes, bornes[1:]) if fin > debut]
+
+
+def iterer_tokens(corpus_path: str, taille_bloc: int = TAILLE_BLOC,
+                  debut: int = 0, fin: Optional[int] = None) -> Iterator[List[str]]:
+    """
+    Lit le corpus (ou la plage d'octets [debut, fin)) par blocs et produit
+    les tokens de chaque bloc
+
+    La fin d'un bloc après son dernier séparateur est reportée sur le bloc
+    suivant : un token à cheval sur deux blocs n'est jamais coupé.
+    """
+    reste = ''
+    decodeur = codecs.getincrementaldecoder('utf-8')()
+    restant = None if fin is None else fin - debut
+    with open(corpus_path, 'rb') as f:
+        f.seek(debut)
+        while True:
+            lecture = taille_bloc if restant is None else min(taille_bloc, restant)
+            octets = f.read(lecture) if lecture > 0 else b''
+            if restant is not None:
+                restant -= len(octets)
+
+            bloc = decodeur.decode(octets, final=not octets)
+            if not octets:
+                reste = normaliser(reste + bloc)
+                break
+
+            # Le reste est recollé avant la normalisation : un accent
+            # combinant en tête du bloc se compose avec la lettre qui le précède
+            texte = normaliser(reste + bloc)
+
+            # Dernier séparateur, cherché depuis la fin du bloc
+            coupure = len(texte)
+            while coupure > 0 and not SEPARATEUR.match(texte, coupure - 1):
+                coupure -= 1
+
+            if coupure == 0:
+                # Aucun séparateur : tout le bloc peut appartenir à un token
+                reste = texte
+                continue
+
+            reste = texte[coupure:]
+            yield MOT.findall(texte, 0, coupure)
+
+    if reste:
+        yield MOT.findall(reste)
+
+
+def chemin_modele(corpus_path: str) -> str:
+    """Fichier du modèle associé à un corpus"""
+    return os.path.splitext(corpus_path)[0] + '.ngrams.npz'
+
+class TableNgrams:
+    """
+    Comptes des n-grams d'un ordre k au format CSR (lignes compressées)
+
+    Une ligne par contexte (k-1 mots), identifiée par une clé entière :
+    l'identifiant du mot pour k = 2, sinon la position de l'entrée
+    (contexte[:-1], contexte[-1]) dans la table d'ordre k-1. Les lignes
+    sont triées par clé et leurs entrées par identifiant de successeur,
+    ce qui permet toutes les recherches par dichotomie.
+
+    Par entrée : successeur, compte brut et compte de continuation
+    (nombre de mots distincts qui précèdent le n-gram, pour Kneser-Ney ;
+    vide pour l'ordre le plus élevé). Par ligne : totaux avant élagage.
+    """
+
+    def __init__(self, cles: np.ndarray, debuts: np.ndarray, successeurs: np.ndarray,
+                 comptes: np.ndarray, continuations: np.ndarray,
+                 totaux: np.ndarray, totaux_continuation: np.ndarray):
+        self.cles = cles                                # int64, triées
+        self.debuts = debuts                            # int64, len(cles) + 1
+        self.successeurs = successeurs                  # int32
+        self.comptes = comptes                          # int32
+        self.continuations = continuations              # int32
+        self.totaux = totaux                            # int64, par ligne
+        self.totaux_continuation = totaux_continuation  # int64, par ligne
+
+    @classmethod
+    def vide(cls) -> 'TableNgrams':
+        return cls(np.empty(0, np.int64), np.zeros(1, np.int64), np.empty(0, np.int32),
+                   np.empty(0, np.int32), np.empty(0, np.int32),
+                   np.empty(0, np.int64), np.empty(0, np.int64))
+
+    def ligne(self, cle: int) -> Optional[int]:
+        """Indice de la ligne d'un contexte, ou None"""
+        i = int(np.searchsorted(self.cles, cle))
+        if i < len(self.cles) and self.cles[i] == cle:
+            return i
+        return None
+
+    def position(self, cle: int, mot: int) -> Optional[int]:
+        """Position de l'entrée (contexte, mot), qui sert de clé à l'ordre suivant"""
+        i = self.ligne(cle)
+        if i is None:
+            return None
+        debut, fin = self.debuts[i], self.debuts[i + 1]
+        j = debut + int(np.searchsorted(self.successeurs[debut:fin], mot))
+        if j < fin and self.successeurs[j] == mot:
+            return int(j)
+        return None
+
+    def extraire(self, valeurs: np.ndarray, i: int, mots: np.ndarray) -> np.ndarray:
+        """Valeurs des entrées (ligne i, mot) pour chacun des mots (0 si absente)"""
+        debut, fin = self.debuts[i], self.debuts[i + 1]
+        successeurs = self.successeurs[debut:fin]
+        j = np.searchsorted(successeurs, mots)
+        presents = j < len(successeurs)
+        presents[presents] = successeurs[j[presents]] == mots[presents]
+        resultat = np.zeros(len(mots), np.float64)
+        resultat[presents] = valeurs[debut + j[presents]]
+        return resultat
+
+    def cles_entrees(self, taille_vocabulaire: int) -> np.ndarray:
+        """Clé composite (clé de ligne, successeur) de chaque entrée, triée"""
+        return np.repeat(self.cles, np.diff(self.debuts)) * taille_vocabulaire + self.successeurs
+
+    def __len__(self) -> int:
+        return len(self.successeurs)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, champ).nbytes for champ in CHAMPS_TABLE)
+
+
+def remise_absolue(valeurs: np.ndarray) -> float:
+    """Remise de Kneser-Ney D = n1 / (n1 + 2 n2) (n_i : nombre de comptes égaux à i)"""
+    n1 = np.count_nonzero(valeurs == 1)
+    n2 = np.count_nonzero(valeurs == 2)
+    if n1 == 0 or n1 + 2 * n2 == 0:
+        return 0.5
+    return min(max(n1 / (n1 + 2 * n2), 0.1), 0.9)
+
+
+class ModeleNgrams:
+    """
+    Modèle de langue n-grams (ordre 2 à ORDRE_MAX) sur un vocabulaire indexé
+
+    L'entraînement remplit un Counter par ordre, puis compacter() remplace
+    chaque mot par son identifiant entier, élague les n-grams rares et
+    range les comptes dans une TableNgrams par ordre : c'est cette forme
+    qui est gardée en mémoire, sérialisée et interrogée.
+
+    Deux lissages, qui interpolent ou replient tous les ordres jusqu'aux
+    unigrammes (un contexte inconnu donne donc toujours des prédictions) :
+    - 'kneser-ney' : Kneser-Ney interpolé (probabilités normalisées)
+    - 'stupid-backoff' : fréquence relative de l'ordre le plus long qui
+      connaît le mot, multipliée par ALPHA_REPLI à chaque repli (scores)
+    """
+
+    def __init__(self, ordre: int = ORDRE_DEFAUT, seuil_elagage: int = SEUIL_ELAGAGE_DEFAUT,
+                 lissage: str = 'kneser-ney'):
+        """
+        Args:
+            ordre: longueur maximale des n-grams (2 à ORDRE_MAX)
+            seuil_elagage: compte minimal des n-grams d'ordre 3 et plus
+                conservés (1 : aucun élagage)
+            lissage: lissage par défaut de predire() (voir LISSAGES)
+        """
+        if not 2 <= ordre <= ORDRE_MAX:
+            raise ValueError(f"Ordre n-grams invalide : {ordre} (2 à {ORDRE_MAX})")
+        if lissage not in LISSAGES:
+            raise ValueError(f"Lissage inconnu : {lissage} ({', '.join(LISSAGES)})")
+
+        self.ordre = ordre
+        self.seuil_elagage = seuil_elagage
+        self.lissage = lissage
+
+        # Compteurs d'entraînement {ordre: {contexte (tuple): Counter}}, libérés par compacter()
+        self.compteurs = {k: defaultdict(Counter) for k in range(2, ordre + 1)}
+        self.comptes_unigrammes = Counter()
+        self.nombre_mots = 0
+        self.empreinte: Optional[str] = None
+        self.signature: Optional[Tuple[int, int]] = None
+
+        self.vocabulaire: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.unigrammes = np.empty(0, np.int64)
+        self.tables = {k: TableNgrams.vide() for k in range(2, ordre + 1)}
+        # Remise de Kneser-Ney par ordre (indice 0 inutilisé)
+        self.remises = np.full(ordre + 1, 0.5)
+        self._preparer()
+
+    # ----- Entraînement -----
+
+    def entrainer(self, corpus_path: str, taille_bloc: int = TAILLE_BLOC, processus: int = 1):
+        """
+        Entraîne le modèle sur un corpus texte
+
+        Le corpus est lu en flux (voir iterer_tokens) : la mémoire utilisée
+        dépend du nombre de n-grams distincts, pas de la taille du corpus.
+
+        Args:
+            processus: nombre de processus ; au-delà de 1, le corpus est
+                découpé en tranches comptées en parallèle puis fusionnées
+                (résultat identique à l'entraînement séquentiel)
+        """
+        # Relevée avant la lecture : un corpus modifié pendant l'entraînement
+        # aura une autre signature au prochain chargement
+        self.signature = signature_corpus(corpus_path)
+        if processus > 1:
+            self._entrainer_parallele(corpus_path, taille_bloc, processus)
+        else:
+            self._compter_tranche(corpus_path, taille_bloc)
+
+        self.empreinte = empreinte_corpus(corpus_path)
+        self.compacter()
+
+    def _compter_tranche(self, corpus_path: str, taille_bloc: int,
+                         debut: int = 0, fin: Optional[int] = None) -> Tuple[List[str], List[str]]:
+        """
+        Compte les n-grams d'une plage d'octets du corpus
+
+        Returns:
+            (ordre-1 premiers tokens, ordre-1 derniers tokens) de la plage,
+            pour raccorder les n-grams entre tranches
+        """
+        marge = self.ordre - 1
+        # Derniers tokens du bloc précédent, pour les n-grams à cheval
+        precedents: List[str] = []
+        premiers: List[str] = []
+
+        for tokens in iterer_tokens(corpus_path, taille_bloc, debut, fin):
+            self._compter(precedents, tokens)
+            self.comptes_unigrammes.update(tokens)
+            self.nombre_mots += len(tokens)
+            if len(premiers) < marge:
+                premiers = (premiers + tokens)[:marge]
+            precedents = (precedents + tokens)[-marge:]
+
+        return premiers, precedents
+
+    def _entrainer_parallele(self, corpus_path: str, taille_bloc: int, processus: int):
+        """Compte chaque tranche dans un processus et fusionne dans l'ordre du corpus"""
+        tranches = decouper_corpus(corpus_path, processus)
+        debuts = [debut for debut, _ in tranches]
+        fins = [fin for _, fin in tranches]
+
+        precedents: List[str] = []
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            resultats = pool.map(_compter_tranche, repeat(corpus_path), repeat(taille_bloc),
+                                 repeat(self.ordre), debuts, fins)
+            for compteurs, unigrammes, nombre_mots, premiers, derniers in resultats:
+                # Les n-grams de la jonction précèdent ceux de la tranche
+                self._compter_jonction(precedents, premiers)
+                for k, partiels in compteurs.items():
+                    self._fusionner(self.compteurs[k], partiels)
+                self.comptes_unigrammes.update(unigrammes)
+                self.nombre_mots += nombre_mots
+                precedents = (precedents + derniers)[-(self.ordre - 1):]
+
+    def _compter_jonction(self, precedents: List[str], premiers: List[str]):
+        """Ajoute les n-grams qui commencent dans `precedents` et finissent dans `premiers`"""
+        mots = precedents + premiers
+        p = len(precedents)
+
+        for k, compteurs in self.compteurs.items():
+            for i in range(max(p - k + 1, 0), min(p, len(mots) - k + 1)):
+                compteurs[tuple(mots[i:i+k-1])][mots[i+k-1]] += 1
+
+    @staticmethod
+    def _fusionner(cible: Dict, partiels: Dict):
+        """Ajoute des comptes partiels {contexte: {mot: n}} aux compteurs"""
+        for contexte, compteur in partiels.items():
+            cible[contexte].update(compteur)
+
+    def _compter(self, precedents: List[str], tokens: List[str]):
+        """
+        Ajoute les n-grams qui se terminent dans `tokens`
+
+        `precedents` (au plus ordre-1 tokens, déjà comptés) fournit le
+        contexte des premiers n-grams du bloc.
+        """
+        mots = precedents + tokens
+        p = len(precedents)
+
+        for k, compteurs in self.compteurs.items():
+            for i in range(max(p - k + 1, 0), len(mots) - k + 1):
+                compteurs[tuple(mots[i:i+k-1])][mots[i+k-1]] += 1
+
+    # ----- Compaction -----
+
+    def compacter(self):
+        """Indexe le vocabulaire, élague et convertit les compteurs en tables"""
+        self.vocabulaire = list(self.comptes_unigrammes)
+        self.ids = {mot: i for i, mot in enumerate(self.vocabulaire)}
+        self.unigrammes = np.fromiter(self.comptes_unigrammes.values(), np.int64,
+                                      len(self.vocabulaire))
+
+        # Comptes de continuation : N1+(• contexte mot), à partir de l'ordre supérieur
+        continuations = {k: defaultdict(Counter) for k in range(2, self.ordre)}
+        for k, cible in continuations.items():
+            for contexte, compteur in self.compteurs[k + 1].items():
+                suffixe = cible[contexte[1:]]
+                for mot in compteur:
+                    suffixe[mot] += 1
+
+        cles_contextes: Dict[Tuple[str, ...], int] = {}
+        for k in range(2, self.ordre + 1):
+            cles_contextes = self._compacter_ordre(k, continuations.get(k), cles_contextes)
+            self.compteurs[k] = None
+            continuations.pop(k, None)
+
+        self.compteurs = None
+        self.comptes_unigrammes = None
+        self._preparer()
+
+    def _compacter_ordre(self, k: int, continuations: Optional[Dict],
+                         cles_precedentes: Dict[Tuple[str, ...], int]) -> Dict[Tuple[str, ...], int]:
+        """
+        Construit la table d'ordre k
+
+        Returns:
+            Clé de ligne de chaque contexte conservé, pour l'ordre k+1
+        """
+        ids = self.ids
+        compteurs = self.compteurs[k]
+        contextes = list(compteurs)
+        valeurs = list(compteurs.values())
+        if not contextes:
+            return {}
+
+        # Clé de chaque contexte (-1 si son préfixe a été élagué)
+        if k == 2:
+            cles = np.fromiter((ids[c[0]] for c in contextes), np.int64, len(contextes))
+        else:
+            prefixes = np.fromiter((cles_precedentes.get(c[:-1], -1) for c in contextes),
+                                   np.int64, len(contextes))
+            derniers = np.fromiter((ids[c[-1]] for c in contextes), np.int64, len(contextes))
+            entrees = self.tables[k - 1].cles_entrees(len(ids))
+            cibles = prefixes * len(ids) + derniers
+            cles = np.searchsorted(entrees, cibles)
+            trouves = (prefixes >= 0) & (cles < len(entrees))
+            trouves[trouves] = entrees[cles[trouves]] == cibles[trouves]
+            cles[~trouves] = -1
+
+        longueurs = np.fromiter(map(len, valeurs), np.int64, len(valeurs))
+        nombre = int(longueurs.sum())
+        successeurs = np.fromiter((ids[m] for c in valeurs for m in c), np.int32, nombre)
+        comptes = np.fromiter((n for c in valeurs for n in c.values()), np.int32, nombre)
+        totaux = np.fromiter((sum(c.values()) for c in valeurs), np.int64, len(valeurs))
+
+        if continuations is None:
+            # Ordre le plus élevé : Kneser-Ney utilise les comptes bruts
+            conts = np.empty(0, np.int32)
+            totaux_cont = np.empty(0, np.int64)
+            self.remises[k] = remise_absolue(comptes)
+        else:
+            vides: Dict[str, int] = {}
+            conts = np.fromiter(
+                (continuations.get(ctx, vides).get(m, 0) for ctx, c in zip(contextes, valeurs) for m in c),
+                np.int32, nombre
+            )
+            totaux_cont = np.fromiter(
+                (sum(continuations.get(ctx, vides).values()) for ctx in contextes),
+                np.int64, len(contextes)
+            )
+            self.remises[k] = remise_absolue(conts)
+
+        # Élagage des entrées rares, puis des lignes vides
+        lignes_entrees = np.repeat(np.arange(len(contextes)), longueurs)
+        garder = cles[lignes_entrees] >= 0
+        if k >= 3 and self.seuil_elagage > 1:
+            garder &= comptes >= self.seuil_elagage
+        restants = np.bincount(lignes_entrees[garder], minlength=len(contextes))
+        lignes = np.flatnonzero(restants > 0)
+        lignes = lignes[np.argsort(cles[lignes], kind='stable')]
+
+        ordre_entrees = np.flatnonzero(garder)
+        ordre_entrees = ordre_entrees[np.lexsort((successeurs[ordre_entrees],
+                                                  cles[lignes_entrees[ordre_entrees]]))]
+        debuts = np.zeros(len(lignes) + 1, np.int64)
+        np.cumsum(restants[lignes], out=debuts[1:])
+
+        self.tables[k] = TableNgrams(
+            cles=cles[lignes],
+            debuts=debuts,
+            successeurs=successeurs[ordre_entrees],
+            comptes=comptes[ordre_entrees],
+            continuations=conts[ordre_entrees] if len(conts) else conts,
+            totaux=totaux[lignes],
+            totaux_continuation=totaux_cont[lignes] if len(totaux_cont) else totaux_cont,
+        )
+
+        cles_lignes = cles[lignes].tolist()
+        return {contextes[i]: cle for i, cle in zip(lignes.tolist(), cles_lignes)}
+
+    def _preparer(self):
+        """Calcule les valeurs dérivées des tables (non sérialisées)"""
+        taille = len(self.vocabulaire)
+
+        # Unigrammes de Kneser-Ney : continuations N1+(• mot), interpolées avec l'uniforme
+        continuations = np.bincount(self.tables[2].successeurs, minlength=taille).astype(np.float64)
+        total = continuations.sum()
+        if total > 0:
+            self.remises[1] = remise_absolue(continuations)
+            escomptes = np.maximum(continuations - self.remises[1], 0) / total
+            self.p_unigrammes = escomptes + (1 - escomptes.sum()) / taille
+        else:
+            self.p_unigrammes = np.full(taille, 1 / taille) if taille else np.empty(0)
+
+        # Poids de repli de Kneser-Ney de chaque ligne : masse retirée par la remise
+        self.replis = {}
+        for k, table in self.tables.items():
+            valeurs, totaux = self._valeurs_kneser_ney(k)
+            escomptes = np.maximum(valeurs - self.remises[k], 0).astype(np.float64)
+            sommes = np.add.reduceat(escomptes, table.debuts[:-1]) if len(escomptes) else escomptes
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.replis[k] = np.where(totaux > 0, 1 - sommes / np.maximum(totaux, 1), 1.0)
+
+        # Mots classés par score unigramme décroissant, pour compléter les candidats
+        self.classements = {
+            'kneser-ney': np.argsort(-self.p_unigrammes, kind='stable').astype(np.int32),
+            'stupid-backoff': np.argsort(-self.unigrammes, kind='stable').astype(np.int32),
+        }
+
+    def _valeurs_kneser_ney(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Comptes (par entrée) et totaux (par ligne) utilisés par Kneser-Ney à l'ordre k"""
+        table = self.tables[k]
+        if k == self.ordre:
+            return table.comptes, table.totaux
+        return table.continuations, table.totaux_continuation
+
+    # ----- Prédiction -----
+
+    def predire(self, tokens: List[str], n: int = 5, lissage: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Les n mots les plus probables après les tokens
+
+        Le classement est exact sur tout le vocabulaire : les mots absents
+        des successeurs du dernier token ne dépendent que de leur score
+        unigramme, seuls les n meilleurs d'entre eux sont évalués.
+
+        Returns:
+            (mot, score) par score décroissant
+        """
+        lissage = lissage or self.lissage
+        if n <= 0 or not self.vocabulaire:
+            return []
+
+        lignes = self._lignes(tokens)
+
+        # Successeurs connus (la ligne bigramme contient ceux des ordres supérieurs)
+        if lignes:
+            table = self.tables[2]
+            i = lignes[0][1]
+            connus = table.successeurs[table.debuts[i]:table.debuts[i + 1]]
+        else:
+            connus = np.empty(0, np.int32)
+
+        candidats = np.concatenate((connus, self._meilleurs_inconnus(lissage, connus, n)))
+        scores = self._scorer(lignes, candidats, lissage)
+
+        # n meilleurs scores, égalités départagées par identifiant de mot
+        if len(scores) > n:
+            seuil = np.partition(scores, len(scores) - n)[len(scores) - n]
+            retenus = np.flatnonzero(scores >= seuil)
+        else:
+            retenus = np.arange(len(scores))
+        meilleurs = retenus[np.lexsort((candidats[retenus], -scores[retenus]))][:n]
+
+        vocabulaire = self.vocabulaire
+        return [(vocabulaire[i], score)
+                for i, score in zip(candidats[meilleurs].tolist(), scores[meilleurs].tolist())]
+
+    def _meilleurs_inconnus(self, lissage: str, connus: np.ndarray, n: int) -> np.ndarray:
+        """Les n mots de meilleur score unigramme absents de `connus` (trié)"""
+        classement = self.classements[lissage]
+        taille = 2 * n
+        while True:
+            tete = classement[:taille]
+            j = np.searchsorted(connus, tete)
+            j[j == len(connus)] = 0
+            autres = tete[connus[j] != tete] if len(connus) else tete
+            if len(autres) >= n or taille >= len(classement):
+                return autres[:n]
+            taille *= 4
+
+    def frequences(self, tokens: List[str], mots: List[str]) -> List[int]:
+        """
+        Nombre d'occurrences de chaque mot (du vocabulaire) après le plus long
+        contexte formé par les derniers tokens qu'il suit dans le corpus, ou
+        dans tout le corpus s'il ne suit jamais le dernier token
+        """
+        candidats = np.fromiter((self.ids[mot] for mot in mots), np.int32, len(mots))
+        comptes = self.unigrammes[candidats].astype(np.float64)
+        for k, i in self._lignes(tokens):
+            table = self.tables[k]
+            c = table.extraire(table.comptes, i, candidats)
+            comptes = np.where(c > 0, c, comptes)
+        return comptes.astype(np.int64).tolist()
+
+    def probabilite(self, tokens: List[str], mot: str) -> float:
+        """P(mot | tokens) selon Kneser-Ney (0 si le mot est hors vocabulaire)"""
+        i = self.ids.get(mot)
+        if i is None:
+            return 0.0
+        return float(self._scorer(self._lignes(tokens), np.array([i], np.int32), 'kneser-ney')[0])
+
+    def _lignes(self, tokens: List[str]) -> List[Tuple[int, int]]:
+        """
+        (ordre, indice de ligne) de chaque ordre dont le contexte formé par
+        les derniers tokens est connu, par ordre croissant
+        """
+        ids = [self.ids.get(t) for t in tokens[-(self.ordre - 1):]]
+        lignes = []
+        for k in range(2, len(ids) + 2):
+            contexte = ids[-(k - 1):]
+            if None in contexte:
+                break
+            # Clé du contexte : parcours des tables d'ordre 2 à k-1
+            cle = contexte[0]
+            for j in range(2, k):
+                cle = self.tables[j].position(cle, contexte[j - 1])
+                if cle is None:
+                    break
+            i = None if cle is None else self.tables[k].ligne(cle)
+            if i is None:
+                # Un contexte plus long n'est pas connu non plus
+                break
+            lignes.append((k, i))
+        return lignes
+
+    def _scorer(self, lignes: List[Tuple[int, int]], candidats: np.ndarray, lissage: str) -> np.ndarray:
+        """Scores des candidats (identifiants de mots) après les contextes `lignes`"""
+        if lissage == 'kneser-ney':
+            p = self.p_unigrammes[candidats]
+            for k, i in lignes:
+                valeurs, totaux = self._valeurs_kneser_ney(k)
+                if totaux[i] == 0:
+                    continue
+                c = self.tables[k].extraire(valeurs, i, candidats)
+                p = np.maximum(c - self.remises[k], 0) / totaux[i] + self.replis[k][i] * p
+            return p
+
+        # Stupid backoff : l'ordre le plus long qui connaît le mot l'emporte
+        plus_long = len(lignes) + 1
+        scores = ALPHA_REPLI ** (plus_long - 1) * self.unigrammes[candidats] / max(self.nombre_mots, 1)
+        for k, i in lignes:
+            table = self.tables[k]
+            c = table.extraire(table.comptes, i, candidats)
+            scores = np.where(c > 0, ALPHA_REPLI ** (plus_long - k) * c / table.totaux[i], scores)
+        return scores
+
+    # ----- Persistance -----
+
+    def sauvegarder(self, chemin: str):
+        """Sérialise le vocabulaire et les tables (archive .npz, sans pickle)"""
+        tables = {
+            f'{k}_{champ}': getattr(table, champ)
+            for k, table in self.tables.items() for champ in CHAMPS_TABLE
+        }
+
+        # Fichier temporaire unique dans le même dossier, renommé une fois
+        # complet : deux sauvegardes simultanées ne s'écrasent pas en cours d'écriture
+        temporaire = tempfile.NamedTemporaryFile(dir=os.path.dirname(chemin) or '.', prefix='.ngrams-',
+                                                 suffix='.tmp', delete=False)
+        try:
+            with temporaire:
+                np.savez(
+                    temporaire,
+                    version=np.array(VERSION_MODELE),
+                    empreinte=np.array(self.empreinte or ''),
+                    signature=np.array(self.signature or (-1, -1), np.int64),
+                    ordre=np.array(self.ordre),
+                    seuil_elagage=np.array(self.seuil_elagage),
+                    nombre_mots=np.array(self.nombre_mots),
+                    vocabulaire=np.frombuffer('\n'.join(self.vocabulaire).encode('utf-8'), np.uint8),
+                    unigrammes=self.unigrammes,
+                    remises=self.remises,
+                    **tables
+                )
+            os.replace(temporaire.name, chemin)
+        except BaseException:
+            os.unlink(temporaire.name)
+            raise
+
+    @classmethod
+    def charger(cls, chemin: str, empreinte: Optional[str] = None, ordre: Optional[int] = None,
+                seuil_elagage: Optional[int] = None) -> Optional['ModeleNgrams']:
+        """
+        Charge un modèle sérialisé
+
+        Returns:
+            None si le fichier est absent, d'une autre version, d'un autre
+            corpus que `empreinte` ou d'autres paramètres que ceux demandés
+        """
+        try:
+            with np.load(chemin, allow_pickle=False) as donnees:
+                if int(donnees['version']) != VERSION_MODELE:
+                    return None
+                if empreinte is not None and str(donnees['empreinte']) != empreinte:
+                    return None
+                if ordre is not None and int(donnees['ordre']) != ordre:
+                    return None
+                if seuil_elagage is not None and int(donnees['seuil_elagage']) != seuil_elagage:
+                    return None
+
+                modele = cls(int(donnees['ordre']), int(donnees['seuil_elagage']))
+                modele.compteurs = None
+                modele.comptes_unigrammes = None
+                modele.empreinte = str(donnees['empreinte'])
+                modele.signature = tuple(int(x) for x in donnees['signature'])
+                modele.nombre_mots = int(donnees['nombre_mots'])
+                texte = donnees['vocabulaire'].tobytes().decode('utf-8')
+                modele.vocabulaire = texte.split('\n') if texte else []
+                modele.unigrammes = donnees['unigrammes']
+                modele.remises = donnees['remises']
+                modele.tables = {
+                    k: TableNgrams(*(donnees[f'{k}_{champ}'] for champ in CHAMPS_TABLE))
+                    for k in range(2, modele.ordre + 1)
+                }
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+
+        modele.ids = {mot: i for i, mot in enumerate(modele.vocabulaire)}
+        modele._preparer()
+        return modele
+
+    @classmethod
+    def charger_ou_entrainer(cls, corpus_path: str, ordre: int = ORDRE_DEFAUT,
+                             seuil_elagage: int = SEUIL_ELAGAGE_DEFAUT) -> 'ModeleNgrams':
+        """
+        Charge le modèle du corpus s'il est à jour, sinon l'entraîne
+        et le sauvegarde pour les prochains démarrages
+
+        Le corpus n'est relu (empreinte SHA-256) que si sa taille ou sa date
+        diffèrent de celles enregistrées avec le modèle.
+        """
+        chemin = chemin_modele(corpus_path)
+        signature = signature_corpus(corpus_path)
+        modele = cls.charger(chemin, ordre=ordre, seuil_elagage=seuil_elagage)
+        if modele is not None and modele.signature != signature:
+            if modele.empreinte == empreinte_corpus(corpus_path):
+                # Contenu inchangé (copie, touch) : signature mise à jour
+                modele.signature = signature
+                try:
+                    modele.sauvegarder(chemin)
+                except OSError as e:
+                    print(f"⚠️  Modèle n-grams non sauvegardé : {e}")
+            else:
+                modele = None
+        if modele is not None:
+            return modele
+
+        modele = cls(ordre, seuil_elagage)
+        modele.entrainer(corpus_path)
+        try:
+            modele.sauvegarder(chemin)
+        except OSError as e:
+            print(f"⚠️  Modèle n-grams non sauvegardé : {e}")
+        return modele
+
+    @property
+    def nbytes(self) -> int:
+        """Taille des tableaux du modèle (hors vocabulaire)"""
+        return self.unigrammes.nbytes + sum(table.nbytes for table in self.tables.values())
+
+
+def _compter_tranche(corpus_path: str, taille_bloc: int, ordre: int, debut: int, fin: int):
+    """Point d'entrée d'un processus de travail : comptes d'une tranche"""
+    modele = ModeleNgrams(ordre)
+    premiers, derniers = modele._compter_tranche(corpus_path, taille_bloc, debut, fin)
+    compteurs = {k: dict(c) for k, c in modele.compteurs.items()}
+    return compteurs, modele.comptes_unigrammes, modele.nombre_mots, premiers, derniers
+
+
+def evaluer(corpus_path: str, fraction: float = 0.1, ordre: int = ORDRE_DEFAUT,
+            seuil_elagage: int = SEUIL_ELAGAGE_DEFAUT, taille_bloc: int = TAILLE_BLOC) -> Dict:
+    """
+    Entraîne sur le début du corpus et évalue sur la fraction finale (lignes entières)
+
+    Returns:
+        perplexité Kneser-Ney (mots hors vocabulaire exclus), taux de mots
+        hors vocabulaire, taille du modèle et latence moyenne de predire()
+    """
+    taille = os.path.getsize(corpus_path)
+    with open(corpus_path, 'rb') as f:
+        f.seek(int(taille * (1 - fraction)))
+        f.readline()
+        borne = f.tell()
+
+    modele = ModeleNgrams(ordre, seuil_elagage)
+    modele._compter_tranche(corpus_path, taille_bloc, 0, borne)
+    modele.compacter()
+
+    tokens = [t for bloc in iterer_tokens(corpus_path, taille_bloc, borne) for t in bloc]
+    log_somme = 0.0
+    evalues = 0
+    for i, mot in enumerate(tokens):
+        p = modele.probabilite(tokens[max(i - ordre + 1, 0):i], mot)
+        if p > 0:
+            log_somme += math.log(p)
+            evalues += 1
+
+    debut = time.perf_counter()
+    for i in range(len(tokens)):
+        modele.predire(tokens[max(i - ordre + 1, 0):i], 5)
+    latence = (time.perf_counter() - debut) / max(len(tokens), 1)
+
+    return {
+        'ordre': ordre,
+        'seuil_elagage': seuil_elagage,
+        'perplexite': math.exp(-log_somme / evalues) if evalues else float('inf'),
+        'hors_vocabulaire': 1 - evalues / len(tokens) if tokens else 0.0,
+        'ngrams': sum(len(table) for table in modele.tables.values()),
+        'taille_octets': modele.nbytes,
+        'latence_ms': latence * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entraîne et sauvegarde le modèle n-grams d'un corpus")
+    parser.add_argument('corpus', help="corpus texte (UTF-8)")
+    parser.add_argument('-j', '--processus', type=int, default=1,
+                        help="nombre de processus d'entraînement (défaut : 1)")
+    parser.add_argument('-n', '--ordre', type=int, default=ORDRE_DEFAUT,
+                        help=f"ordre maximal des n-grams, 2 à {ORDRE_MAX} (défaut : {ORDRE_DEFAUT})")
+    parser.add_argument('-s', '--seuil', type=int, default=SEUIL_ELAGAGE_DEFAUT,
+                        help="compte minimal des n-grams d'ordre 3 et plus (défaut : "
+                             f"{SEUIL_ELAGAGE_DEFAUT})")
+    parser.add_argument('-o', '--sortie', help="fichier du modèle (par défaut : <corpus>.ngrams.npz)")
+    parser.add_argument('--evaluer', type=float, metavar='FRACTION',
+                        help="n'enregistre rien : entraîne sur le début du corpus et mesure la "
+                             "perplexité sur la FRACTION finale")
+    args = parser.parse_args()
+
+    if args.evaluer:
+        resultats = evaluer(args.corpus, args.evaluer, args.ordre, args.seuil)
+        print(f"📊 Ordre {resultats['ordre']}, seuil {resultats['seuil_elagage']} : "
+              f"perplexité {resultats['perplexite']:.1f} "
+              f"({resultats['hors_vocabulaire']:.1%} hors vocabulaire), "
+              f"{resultats['ngrams']} n-grams ({resultats['taille_octets'] / 1e6:.1f} Mo), "
+              f"predire {resultats['latence_ms']:.3f} ms")
+    else:
+        modele = ModeleNgrams(args.ordre, args.seuil)
+        modele.entrainer(args.corpus, processus=args.processus)
+        sortie = args.sortie or chemin_modele(args.corpus)
+        modele.sauvegarder(sortie)
+        print(f"✅ Modèle n-grams d'ordre {modele.ordre} entraîné sur {modele.nombre_mots} mots : {sortie}")
@@ -2,27 +2,55 @@
 Pipeline NLP Complet pour le Malagasy
 """
 
-import json
-import re
-from collections import defaultdict, Counter
-from typing import List, Dict, Tuple
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, List, Dict, Tuple, NamedTuple, Optional, Sequence
+from lexique import obtenir_lexique, CHEMIN_DICTIONNAIRE
+from ngrams import ModeleNgrams
+from completion import IndexCompletion
+from tokeniseur import iterer_segments, normaliser, tokeniser, tokeniser_phrases
+from lemmatiseur import LemmatiseurMalagasy
+from sentiment_analyzer import MoteurSentiment
+from entites import IndexEntites, regrouper
+
+
+# Résultats possibles de analyser_lot
+CHAMPS_LOT = ('tokens', 'lemmes', 'pos_tags', 'sentiment')
+
+# Tranches par processus de travail dans analyser_lot (équilibrage)
+TRANCHES_PAR_PROCESSUS = 4
+
+# Nombre maximal de prédictions ou de complétions par requête (API, éditeur)
+LIMITE_SUGGESTIONS = 50
+
+
+class FicheToken(NamedTuple):
+    """Résultat compact de l'analyse d'un token (une seule consultation du dictionnaire)"""
+    lemme: str
+    pos: str
+
 
 class NLPMalagasy:
     """
     Pipeline NLP complet pour le traitement du texte malagasy
     """
     
-    def __init__(self, dictionnaire_path: str, corpus_path: str = None):
+    # Seule la fin du contexte est utile pour la prédiction
+    FENETRE_CONTEXTE = 256
+    
+    def __init__(self, dictionnaire_path: str = CHEMIN_DICTIONNAIRE, corpus_path: str = None):
         """
         Initialise le pipeline NLP
         
         Args:
-            dictionnaire_path: Chemin vers le dictionnaire JSON
+            dictionnaire_path: Chemin vers le dictionnaire JSON (lexique partagé)
             corpus_path: Chemin vers un corpus de texte (optionnel, pour n-grams)
         """
-        # Charger le dictionnaire
-        with open(dictionnaire_path, 'r', encoding='utf-8') as f:
-            self.dictionnaire = json.load(f)
+        # Lexique partagé avec les autres modules
+        self.lexique = obtenir_lexique(dictionnaire_path)
+        self.dictionnaire = self.lexique.dictionnaire
         
         print(f"✅ Pipeline NLP initialisé avec {len(self.dictionnaire)} mots")
         
@@ -35,54 +63,43 @@ class NLPMalagasy:
     
     def _preparer_structures(self):
         """Prépare les index pour accès rapide"""
-        self.mots_valides = set(self.dictionnaire.keys())
-        
-        # Index par type grammatical (POS)
-        self.pos_index = defaultdict(set)
-        for mot, info in self.dictionnaire.items():
-            type_gram = info.get('type', 'inconnu')
-            self.pos_index[type_gram].add(mot)
-        
-        # Index des entités nommées (NER)
-        self.entites = {
-            'villes': set(),
-            'personnes': set(),
-            'lieux': set()
-        }
+        self.mots_valides = self.lexique.mots
+        
+        # Index par type grammatical (POS), maintenu par le lexique
+        self.pos_index = self.lexique.index_type
+        
+        # Racines des mots absents du dictionnaire
+        self.lemmatiseur = LemmatiseurMalagasy(self.lexique)
         
-        for mot, info in self.dictionnaire.items():
-            if info.get('type') == 'nom propre':
-                # Classifier les noms propres (simple heuristique)
-                definitions = ' '.join(info.get('definitions', [])).lower()
-                if 'ville' in definitions or 'capitale' in definitions:
-                    self.entites['villes'].add(mot)
-                elif 'lieu' in definitions or 'région' in definitions:
-                    self.entites['lieux'].add(mot)
-                else:
-                    self.entites['personnes'].add(mot)
+        # Sentiment pondéré (négation, intensificateurs), suit le lexique
+        self.sentiment = MoteurSentiment(self.lexique)
+        
+        # Entités nommées (NER) : noms propres du dictionnaire, suit le lexique
+        self.index_entites = IndexEntites(self.lexique)
+        
+        self.lexique.abonner(self._indexer_completion)
         
         # N-grams (initialisé vide, sera rempli par corpus)
-        self.bigrams = defaultdict(Counter)
-        self.trigrams = defaultdict(Counter)
+        self._utiliser_modele(ModeleNgrams())
+    
+    def _utiliser_modele(self, modele: ModeleNgrams):
+        """Branche un modèle n-grams (et la complétion qui en dépend) sur le pipeline"""
+        self.modele_ngrams = modele
+        self.completion = IndexCompletion(self.mots_valides, modele)
+    
+    def _indexer_completion(self, mot: str, info: Dict):
+        """Rend un mot ajouté au lexique disponible pour la complétion"""
+        self.completion.ajouter(mot)
     
     def _entrainer_ngrams(self, corpus_path: str):
-        """Entraîne les modèles n-grams sur un corpus"""
+        """
+        Charge le modèle n-grams du corpus depuis le disque s'il est à jour,
+        sinon l'entraîne (voir ngrams.py pour l'entraînement hors ligne)
+        """
         try:
-            with open(corpus_path, 'r', encoding='utf-8') as f:
-                texte = f.read().lower()
-            
-            mots = self.tokenize(texte)
-            
-            # Créer bigrammes
-            for i in range(len(mots) - 1):
-                self.bigrams[mots[i]][mots[i+1]] += 1
-            
-            # Créer trigrammes
-            for i in range(len(mots) - 2):
-                cle = (mots[i], mots[i+1])
-                self.trigrams[cle][mots[i+2]] += 1
-            
-            print(f"✅ N-grams entraînés sur {len(mots)} mots")
+            self._utiliser_modele(ModeleNgrams.charger_ou_entrainer(corpus_path))
+            print(f"✅ N-grams d'ordre {self.modele_ngrams.ordre} entraînés sur "
+                  f"{self.modele_ngrams.nombre_mots} mots")
         except FileNotFoundError:
             print("⚠️  Corpus non trouvé, n-grams non disponibles")
     
@@ -91,15 +108,9 @@ class NLPMalagasy:
     def tokenize(self, texte: str) -> List[str]:
         """
         Découpe le texte en tokens (mots)
-        Prend en compte les spécificités du malagasy
+        Les contractions (amin'ny, an'i) restent un seul token (voir tokeniseur.py)
         """
-        # Normaliser
-        texte = texte.lower()
-        
-        # Extraire les mots (lettres et apostrophes)
-        tokens = re.findall(r"\b[\w']+\b", texte)
-        
-        return tokens
+        return tokeniser(texte)
     
     # ==================== MODULE 2 : LEMMATIZATION ====================
     
@@ -114,33 +125,8 @@ class NLPMalagasy:
         if mot_lower in self.dictionnaire:
             return self.dictionnaire[mot_lower].get('Lemmatisation', mot_lower)
         
-        # Sinon, appliquer des règles morphologiques
-        return self._lemmatiser_par_regles(mot_lower)
-    
-    def _lemmatiser_par_regles(self, mot: str) -> str:
-        """Lemmatisation basée sur les règles morphologiques malagasy"""
-        # Préfixes courants
-        prefixes = ['mpan', 'mpam', 'maha', 'man', 'mam', 'mi', 'ma', 
-                   'fan', 'fam', 'fi', 'an', 'amp']
-        
-        # Suffixes courants
-        suffixes = ['ana', 'ina', 'na', 'nao', 'ko']
-        
-        racine = mot
-        
-        # Retirer préfixes
-        for prefixe in sorted(prefixes, key=len, reverse=True):
-            if racine.startswith(prefixe) and len(racine) > len(prefixe) + 2:
-                racine = racine[len(prefixe):]
-                break
-        
-        # Retirer suffixes
-        for suffixe in sorted(suffixes, key=len, reverse=True):
-            if racine.endswith(suffixe) and len(racine) > len(suffixe) + 2:
-                racine = racine[:-len(suffixe)]
-                break
-        
-        return racine
+        # Sinon, analyse morphologique (résultat mémorisé par forme)
+        return self.lemmatiseur.lemmatiser(mot_lower)
     
     # ==================== MODULE 3 : POS TAGGING ====================
     
@@ -166,6 +152,10 @@ class NLPMalagasy:
         
         return resultats
     
+    def pos_tag_texte(self, texte: str) -> List[Tuple[str, str]]:
+        """Tokenise puis étiquette un texte (un seul appel pour l'API)"""
+        return self.pos_tag(self.tokenize(texte))
+    
     def _deviner_pos(self, mot: str) -> str:
         """Devine le type grammatical avec des heuristiques"""
         # Verbes actifs commencent souvent par 'mi-', 'man-', 'ma-'
@@ -189,90 +179,69 @@ class NLPMalagasy:
         Reconnaissance d'entités nommées
         
         Returns:
-            {'villes': [...], 'personnes': [...], 'lieux': [...]}
+            {'villes': [...], 'personnes': [...], 'lieux': [...], 'autres': [...]}
+            (mentions telles qu'écrites dans le texte)
         """
-        tokens = self.tokenize(texte)
-        
-        entites_trouvees = {
-            'villes': [],
-            'personnes': [],
-            'lieux': [],
-            'autres': []
-        }
+        return regrouper(self.reperer_entites(texte))
+    
+    def reperer_entites(self, texte: str) -> List[Dict]:
+        """
+        Mentions d'entités nommées, noms de plusieurs mots compris (voir entites.py)
         
-        for token in tokens:
-            # Capitalisation = probablement nom propre
-            if token[0].isupper():
-                token_lower = token.lower()
-                
-                if token_lower in self.entites['villes']:
-                    entites_trouvees['villes'].append(token)
-                elif token_lower in self.entites['personnes']:
-                    entites_trouvees['personnes'].append(token)
-                elif token_lower in self.entites['lieux']:
-                    entites_trouvees['lieux'].append(token)
-                else:
-                    entites_trouvees['autres'].append(token)
-        
-        return entites_trouvees
+        Returns:
+            [{'debut', 'fin', 'texte', 'entite', 'categorie'}] dans l'ordre du texte
+        """
+        return self.index_entites.reperer(texte)
     
     # ==================== MODULE 5 : SENTIMENT ANALYSIS ====================
     
     def analyser_sentiment(self, texte: str) -> Dict:
         """
-        Analyse le sentiment d'un texte
-        """
-        tokens = self.tokenize(texte)
-        
-        sentiments = {'positif': 0, 'negatif': 0, 'neutre': 0}
-        mots_sentiments = {'positif': [], 'negatif': [], 'neutre': []}
-        
-        for token in tokens:
-            if token in self.dictionnaire:
-                sentiment = self.dictionnaire[token].get('sentiment', 'neutre')
-                sentiments[sentiment] += 1
-                mots_sentiments[sentiment].append(token)
-        
-        total = sum(sentiments.values())
-        if total == 0:
-            return {
-                'sentiment_dominant': 'neutre',
-                'scores': sentiments,
-                'mots': mots_sentiments
-            }
+        Analyse le sentiment d'un texte (voir MoteurSentiment)
         
-        # Trouver le sentiment dominant
-        sentiment_dominant = max(sentiments.items(), key=lambda x: x[1])[0]
-        
-        # Calculer scores en pourcentage
-        scores_pct = {k: round(v/total*100, 1) for k, v in sentiments.items()}
-        
-        return {
-            'sentiment_dominant': sentiment_dominant,
-            'scores': scores_pct,
-            'mots': mots_sentiments
-        }
+        Returns:
+            {'sentiment_dominant', 'polarite', 'scores', 'mots'}
+        """
+        return self.sentiment.analyser(*tokeniser_phrases(texte))
     
     # ==================== MODULE 6 : N-GRAMS PREDICTION ====================
     
-    def predire_mot_suivant(self, contexte: str, n: int = 5) -> List[Tuple[str, int]]:
+    def predire_mot_suivant(self, contexte: str, n: int = 5) -> List[Tuple[str, float]]:
         """
         Prédit les n mots les plus probables après le contexte
+
+        Returns:
+            (mot, score) par score décroissant (probabilité lissée par
+            Kneser-Ney, voir ngrams.py) ; un contexte inconnu se replie
+            jusqu'aux mots les plus fréquents du corpus
         """
-        tokens = self.tokenize(contexte)
-        
-        if len(tokens) >= 2:
-            # Utiliser trigrammes
-            cle = (tokens[-2], tokens[-1])
-            if cle in self.trigrams:
-                return self.trigrams[cle].most_common(n)
-        
-        if len(tokens) >= 1:
-            # Utiliser bigrammes
-            if tokens[-1] in self.bigrams:
-                return self.bigrams[tokens[-1]].most_common(n)
-        
-        return []
+        tokens = self.tokenize(contexte[-self.FENETRE_CONTEXTE:])
+        return self.modele_ngrams.predire(tokens, n)
+    
+    def predire_avec_frequences(self, contexte: str, n: int = 5) -> List[Tuple[str, float, int]]:
+        """
+        Comme predire_mot_suivant, avec la fréquence de chaque mot prédit
+
+        Returns:
+            (mot, score, frequence) : frequence est le nombre de fois où le
+            mot suit le contexte dans le corpus (voir ModeleNgrams.frequences)
+        """
+        tokens = self.tokenize(contexte[-self.FENETRE_CONTEXTE:])
+        predictions = self.modele_ngrams.predire(tokens, n)
+        frequences = self.modele_ngrams.frequences(tokens, [mot for mot, _ in predictions])
+        return [(mot, score, frequence) for (mot, score), frequence in zip(predictions, frequences)]
+    
+    def completer_mot(self, prefixe: str, contexte: str = '', n: int = 5) -> List[Tuple[str, float]]:
+        """
+        Complète le mot en cours de frappe
+
+        Args:
+            prefixe: début du mot
+            contexte: texte qui précède le mot ; ses derniers mots orientent
+                les complétions (successeurs connus dans le corpus)
+        """
+        tokens = self.tokenize(contexte[-self.FENETRE_CONTEXTE:]) if contexte else None
+        return self.completion.completer(normaliser(prefixe.strip()), n, tokens)
     
     # ==================== MODULE 7 : SYNONYM DETECTION ====================
     
@@ -290,23 +259,28 @@ class NLPMalagasy:
     def analyser_texte_complet(self, texte: str) -> Dict:
         """
         Pipeline NLP complet : analyse tous les aspects du texte
+        
+        Le texte n'est tokenisé qu'une fois et chaque mot distinct n'est
+        consulté qu'une fois dans le dictionnaire ; toutes les sorties
+        sont dérivées de ces fiches.
         """
-        # 1. Tokenization
-        tokens = self.tokenize(texte)
+        # 1. Tokenization (et début de chaque phrase, pour le sentiment) et
+        #    entités nommées (sur le texte d'origine), en un seul parcours
+        tokens, phrases, mentions = self.index_entites.tokeniser_et_reperer(texte)
         
-        # 2. Lemmatisation
-        lemmes = [self.lemmatiser(token) for token in tokens]
+        # 2. Passe unique : lemme, POS par token
+        fiches = self._analyser_tokens(tokens)
         
-        # 3. POS Tagging
-        pos_tags = self.pos_tag(tokens)
+        lemmes = [fiche.lemme for fiche in fiches]
+        pos_tags = [(token, fiche.pos) for token, fiche in zip(tokens, fiches)]
         
-        # 4. NER
-        entites = self.extraire_entites(texte)
+        # 3. NER
+        entites = regrouper(mentions)
         
-        # 5. Sentiment
-        sentiment = self.analyser_sentiment(texte)
+        # 4. Sentiment
+        sentiment = self.sentiment.analyser(tokens, phrases)
         
-        # 6. Statistiques
+        # 5. Statistiques
         stats = {
             'nombre_mots': len(tokens),
             'mots_uniques': len(set(tokens)),
@@ -322,11 +296,189 @@ class NLPMalagasy:
             'statistiques': stats
         }
     
+    def _annoter(self, tokens: List[str], fiches: List[FicheToken], sentiment: Dict,
+                 mentions: List[Dict]) -> Dict:
+        """Annotations d'un segment de texte (mêmes champs que analyser_texte_complet)"""
+        return {
+            'tokens': tokens,
+            'lemmes': [fiche.lemme for fiche in fiches],
+            'pos_tags': [(token, fiche.pos) for token, fiche in zip(tokens, fiches)],
+            'entites': regrouper(mentions),
+            'sentiment': sentiment
+        }
+    
+    def _analyser_tokens(self, tokens: List[str],
+                         cache: Optional[Dict[str, FicheToken]] = None) -> List[FicheToken]:
+        """
+        Produit une fiche par token, en ne calculant qu'une fois chaque mot distinct
+        (dans les tokens, ou dans tous les appels qui partagent `cache`)
+        """
+        if cache is None:
+            cache = {}
+        fiches = []
+        for token in tokens:
+            fiche = cache.get(token)
+            if fiche is None:
+                fiche = self._fiche_token(token)
+                cache[token] = fiche
+            fiches.append(fiche)
+        return fiches
+    
+    def _fiche_token(self, token: str) -> FicheToken:
+        """Analyse un token (déjà en minuscules) avec une seule consultation du dictionnaire"""
+        info = self.dictionnaire.get(token)
+        
+        if info is None:
+            return FicheToken(
+                lemme=self.lemmatiseur.lemmatiser(token),
+                pos=self._deviner_pos(token)
+            )
+        
+        return FicheToken(
+            lemme=info.get('Lemmatisation', token),
+            pos=info.get('type', 'inconnu')
+        )
+    
     def _compter_pos(self, pos_tags: List[Tuple[str, str]]) -> Dict[str, int]:
         """Compte la distribution des types grammaticaux"""
         compteur = Counter(tag for _, tag in pos_tags)
         return dict(compteur)
+    
+    # ==================== MODULE 9 : TRAITEMENT PAR LOTS ====================
+    
+    def analyser_lot(self, textes: List[str], champs: Sequence[str] = CHAMPS_LOT,
+                     processus: int = 0) -> List[Dict]:
+        """
+        Analyse une liste de documents en un seul appel
+        
+        Chaque mot distinct du lot n'est analysé qu'une fois, quel que soit
+        le nombre de documents où il apparaît.
+        
+        Args:
+            champs: résultats voulus, parmi CHAMPS_LOT
+            processus: nombre de processus de travail (0 : dans ce processus) ;
+                le lot est découpé en tranches contiguës, chacune dédupliquée
+                séparément (processus créés par fork : pour les traitements
+                hors ligne, l'API passe par ExecuteurNLP)
+        
+        Returns:
+            Un dict par document, dans l'ordre des textes, avec les champs demandés
+        """
+        inconnus = set(champs) - set(CHAMPS_LOT)
+        if inconnus:
+            raise ValueError(f"Champs inconnus : {sorted(inconnus)}")
+        
+        if processus > 0 and len(textes) > 1:
+            return self._analyser_lot_parallele(textes, champs, processus)
+        
+        fiches_lot: Dict[str, FicheToken] = {}
+        documents = []
+        resultats = []
+        for texte in textes:
+            if 'sentiment' in champs:
+                tokens, phrases = tokeniser_phrases(texte)
+                documents.append((tokens, phrases))
+            else:
+                tokens = self.tokenize(texte)
+            
+            resultat = {}
+            if 'tokens' in champs:
+                resultat['tokens'] = tokens
+            if 'lemmes' in champs or 'pos_tags' in champs:
+                fiches = self._analyser_tokens(tokens, fiches_lot)
+                if 'lemmes' in champs:
+                    resultat['lemmes'] = [fiche.lemme for fiche in fiches]
+                if 'pos_tags' in champs:
+                    resultat['pos_tags'] = [(token, fiche.pos) for token, fiche in zip(tokens, fiches)]
+            resultats.append(resultat)
+        
+        # Sentiment de tout le lot en un seul calcul vectorisé
+        if 'sentiment' in champs:
+            for resultat, sentiment in zip(resultats, self.sentiment.analyser_lot(documents)):
+                resultat['sentiment'] = sentiment
+        
+        return resultats
+    
+    # ==================== MODULE 10 : ANALYSE EN FLUX ====================
+    
+    def analyser_texte_flux(self, texte: str) -> Iterator[Dict]:
+        """
+        Analyse un long texte segment par segment (phrase ou ligne)
+        
+        Seuls les agrégats du document sont gardés d'un segment à l'autre :
+        la mémoire ne dépend pas de la longueur du texte, et le premier
+        résultat est disponible dès la première phrase analysée.
+        
+        Yields:
+            Un dict par segment contenant des mots : {'debut', 'fin'}
+            (positions dans le texte) et les champs de analyser_texte_complet
+            pour ce segment ; puis un dernier dict {'entites', 'sentiment',
+            'statistiques'} identique à celui de analyser_texte_complet
+            pour le texte entier
+        """
+        fiches_texte: Dict[str, FicheToken] = {}
+        occurrences = Counter()
+        distribution_pos = Counter()
+        entites = regrouper([])
+        # Les masses de sentiment des phrases s'additionnent (négation
+        # et intensificateurs ne traversent pas une fin de phrase)
+        masses = [0.0, 0.0, 0.0]
+        sentiments = {'positif': [], 'negatif': [], 'neutre': []}
+        
+        for debut, fin in iterer_segments(texte):
+            tokens, _, mentions = self.index_entites.tokeniser_et_reperer(texte, debut, fin)
+            if not tokens:
+                continue
+            fiches = self._analyser_tokens(tokens, fiches_texte)
+            masses_segment, mots_segment = self.sentiment.evaluer_lot([(tokens, (0,))])
+            
+            occurrences.update(tokens)
+            distribution_pos.update(fiche.pos for fiche in fiches)
+            for mention in mentions:
+                entites[mention['categorie']].append(mention['texte'])
+            masses = [total + m for total, m in zip(masses, masses_segment[0].tolist())]
+            for sentiment, mots in mots_segment[0].items():
+                sentiments[sentiment].extend(mots)
+            
+            sentiment = self.sentiment.resumer(masses_segment[0], mots_segment[0])
+            yield {'debut': debut, 'fin': fin, **self._annoter(tokens, fiches, sentiment, mentions)}
+        
+        yield {
+            'entites': entites,
+            'sentiment': self.sentiment.resumer(masses, sentiments),
+            'statistiques': {
+                'nombre_mots': sum(occurrences.values()),
+                'mots_uniques': len(occurrences),
+                'distribution_pos': dict(distribution_pos)
+            }
+        }
+    
+    def _analyser_lot_parallele(self, textes: List[str], champs: Sequence[str],
+                                processus: int) -> List[Dict]:
+        """Analyse des tranches du lot dans des processus et les remet bout à bout"""
+        global _pipeline_lot
+        _pipeline_lot = self
+        
+        nombre = min(len(textes), processus * TRANCHES_PAR_PROCESSUS)
+        bornes = [len(textes) * k // nombre for k in range(nombre + 1)]
+        tranches = [textes[bornes[k]:bornes[k + 1]] for k in range(nombre)]
+        
+        resultats = []
+        with ProcessPoolExecutor(max_workers=processus,
+                                 mp_context=multiprocessing.get_context('fork')) as pool:
+            for partiels in pool.map(_analyser_tranche, tranches, repeat(tuple(champs))):
+                resultats.extend(partiels)
+        return resultats
+
+
+# Pipeline hérité par les processus de travail de analyser_lot
+_pipeline_lot: Optional[NLPMalagasy] = None
+
+
+def _analyser_tranche(textes: List[str], champs: Tuple[str, ...]) -> List[Dict]:
+    """Point d'entrée d'un processus de travail de analyser_lot"""
+    return _pipeline_lot.analyser_lot(textes, champs)
 
 
 # Initialiser le pipeline
-nlp = NLPMalagasy('dico_nlp_test.json', 'cleaned_bible.txt')
+nlp = NLPMalagasy(CHEMIN_DICTIONNAIRE, 'cleaned_bible.txt')
@@ -1,35 +1,270 @@
 """
 Analyseur de Sentiment pour le Malagasy
 Utilise le champ 'sentiment' du nouveau format du dictionnaire
+
+MoteurSentiment est le seul calcul de sentiment du projet (pipeline NLP,
+analyse incrémentale, lots, AnalyseurSentiment) :
+- chaque mot du dictionnaire a un poids de polarité (POIDS_SENTIMENT selon
+  son champ 'sentiment', ou son champ facultatif 'polarite')
+- "tsy" (et "tsy misy") inverse et atténue les mots qui le suivent dans la
+  même phrase, sur FENETRE_NEGATION mots
+- "loatra", "tokoa" (après le mot) et "tena" (avant) le renforcent
+- les tokens sont convertis en identifiants entiers et tout le calcul est
+  vectorisé avec NumPy, pour un texte comme pour un lot de documents
 """
 
-import json
-import re
-from typing import Dict, List
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lexique import obtenir_lexique, CHEMIN_DICTIONNAIRE, Lexique
+from tokeniseur import tokeniser_phrases
+
+SENTIMENTS = ('positif', 'negatif', 'neutre')
+
+# Poids d'un mot selon le champ 'sentiment' du dictionnaire
+POIDS_SENTIMENT = {'positif': 1.0, 'negatif': -1.0, 'neutre': 0.0}
+
+# Négation : "tsy", prolongée par "misy" (et ses formes "nisy", "hisy")
+NEGATION = 'tsy'
+EXISTENCE = ('misy', 'nisy', 'hisy')
+
+# Mots touchés par une négation, après elle et dans la même phrase
+FENETRE_NEGATION = 3
+
+# Une négation inverse la polarité en l'atténuant : "tsy tsara" est moins
+# fort que "ratsy"
+FACTEUR_NEGATION = -0.8
+
+# Intensificateurs : placés après le mot ("tsara loatra", "faly tokoa") ou
+# avant ("tena tsara"). Sous une négation ils atténuent au lieu de renforcer
+# ("tsy tsara loatra" : pas très bon)
+INTENSIFICATEURS_APRES = {'loatra': 1.5, 'tokoa': 1.3}
+INTENSIFICATEURS_AVANT = {'tena': 1.5}
+
+# Classe de chaque token dans le résultat ('mots') : indice dans SENTIMENTS + 1
+_CLASSE_AUCUNE, _CLASSE_POSITIF, _CLASSE_NEGATIF, _CLASSE_NEUTRE = range(4)
+
+
+class MoteurSentiment:
+    """
+    Score de sentiment pondéré, avec négation et intensificateurs
+
+    Vocabulaire : mot -> identifiant (0 pour un mot inconnu) ; les tableaux
+    de poids sont indexés par identifiant et suivent les ajouts au lexique.
+    """
+
+    # Tableaux indexés par identifiant, et leur valeur pour un mot inconnu (0)
+    _COLONNES = ('polarites', 'neutres', 'apres', 'avant', 'existences', 'modificateurs')
+    _INCONNU = (0.0, 0.0, 1.0, 1.0, False, False)
+
+    def __init__(self, lexique: Lexique):
+        mots = list(lexique.dictionnaire.items())
+        mots += [(mot, None) for mot in dict.fromkeys(
+            (NEGATION, *EXISTENCE, *INTENSIFICATEURS_APRES, *INTENSIFICATEURS_AVANT))
+            if mot not in lexique.dictionnaire]
+
+        # Tableaux construits en une passe ; les mots ajoutés ensuite au
+        # lexique les agrandissent par doublement (voir _ajouter)
+        self.identifiants: Dict[str, int] = {mot: i for i, (mot, _) in enumerate(mots, 1)}
+        colonnes = [np.array(colonne) for colonne in
+                    zip(self._INCONNU, *(self._valeurs(mot, info) for mot, info in mots))]
+        self.polarites = colonnes[0]
+        self.neutres = colonnes[1]        # 1.0 pour un mot connu de polarité nulle
+        self.apres = colonnes[2]          # intensité donnée au mot précédent
+        self.avant = colonnes[3]          # intensité donnée au mot suivant
+        self.existences = colonnes[4]     # "misy" et ses formes
+        self.modificateurs = colonnes[5]  # négation, existence, intensificateurs
+        # Nombre d'identifiants donnés (les tableaux peuvent être plus longs)
+        self.taille = len(mots) + 1
+        lexique.abonner(self._ajouter)
+
+        self.id_negation = self.identifiants[NEGATION]
+
+    @staticmethod
+    def _valeurs(mot: str, info: Optional[Dict]) -> Tuple[float, float, float, float, bool, bool]:
+        """Valeurs d'un mot dans chaque colonne (info : None hors du dictionnaire)"""
+        modificateur = mot == NEGATION or mot in EXISTENCE \
+            or mot in INTENSIFICATEURS_APRES or mot in INTENSIFICATEURS_AVANT
+        if info is None or modificateur:
+            polarite, neutre = 0.0, float(info is not None)
+        else:
+            polarite = float(info.get('polarite', POIDS_SENTIMENT.get(info.get('sentiment'), 0.0)))
+            neutre = float(polarite == 0.0)
+        return (polarite, neutre, INTENSIFICATEURS_APRES.get(mot, 1.0), INTENSIFICATEURS_AVANT.get(mot, 1.0),
+                mot in EXISTENCE, modificateur)
+
+    def _ajouter(self, mot: str, info: Optional[Dict]):
+        """Donne un identifiant à un mot ajouté au lexique (ou met à jour ses poids)"""
+        valeurs = self._valeurs(mot, info)
+        identifiant = self.identifiants.get(mot)
+        if identifiant is not None:
+            self.polarites[identifiant], self.neutres[identifiant] = valeurs[:2]
+            return
+
+        identifiant = self.taille
+        if identifiant == len(self.polarites):
+            # Capacité doublée : les lectures en cours gardent les anciens tableaux,
+            # qui contiennent tous les identifiants déjà publiés
+            for nom in self._COLONNES:
+                ancien = getattr(self, nom)
+                nouveau = np.empty(2 * len(ancien), ancien.dtype)
+                nouveau[:len(ancien)] = ancien
+                setattr(self, nom, nouveau)
+        # Valeurs écrites au-delà des identifiants publiés, l'identifiant en dernier
+        for nom, valeur in zip(self._COLONNES, valeurs):
+            getattr(self, nom)[identifiant] = valeur
+        self.taille += 1
+        self.identifiants[mot] = identifiant
+
+    # ----- Calcul vectorisé -----
+
+    def _poids(self, ids: np.ndarray, coupures: np.ndarray) -> np.ndarray:
+        """
+        Poids de chaque token d'une suite
+
+        Args:
+            ids: identifiants des tokens
+            coupures: True sur le premier token de chaque phrase (ou document) ;
+                négation et intensificateurs ne traversent pas une coupure
+        """
+        poids = self.polarites[ids]
+        # Cas courant : aucun modificateur, chaque mot garde son poids
+        if not self.modificateurs[ids].any():
+            return poids
+
+        n = len(ids)
+        positions = np.arange(n)
+        debut_phrase = np.maximum.accumulate(np.where(coupures, positions, 0))
+
+        # Fin de chaque négation : "tsy", ou le "misy" qui le prolonge
+        negation = ids == self.id_negation
+        existence = np.zeros(n, bool)
+        existence[1:] = negation[:-1] & self.existences[ids[1:]] & ~coupures[1:]
+        negation[:-1] &= ~existence[1:]
+        negation |= existence
+
+        # Nombre de négations dans la fenêtre qui précède chaque token
+        cumul = np.concatenate(([0], np.cumsum(negation)))
+        debut_fenetre = np.maximum(positions - FENETRE_NEGATION, debut_phrase)
+        nie = (cumul[positions] - cumul[debut_fenetre]) % 2 == 1
+
+        intensite = np.ones(n)
+        meme_phrase = ~coupures[1:]
+        intensite[:-1] *= np.where(meme_phrase, self.apres[ids[1:]], 1.0)
+        intensite[1:] *= np.where(meme_phrase, self.avant[ids[:-1]], 1.0)
+
+        return poids * np.where(nie, FACTEUR_NEGATION / intensite, intensite)
+
+    def _identifiants(self, tokens: Sequence[str]) -> np.ndarray:
+        return np.fromiter(map(self.identifiants.get, tokens, repeat(0)), np.intp, len(tokens))
+
+    def evaluer_lot(self, documents: Sequence[Tuple[Sequence[str], Sequence[int]]]
+                    ) -> Tuple[np.ndarray, List[Dict[str, List[str]]]]:
+        """
+        Masses de sentiment de plusieurs documents en un seul calcul
+
+        Args:
+            documents: (tokens, indices des tokens qui commencent une phrase)
+                par document
+
+        Returns:
+            (masses positive, négative et neutre : tableau (documents, 3),
+             mots de chaque document classés selon leur polarité effective :
+             'tsara' dans "tsy tsara" est négatif)
+        """
+        tokens = []
+        coupures_docs = []
+        longueurs = []
+        for tokens_doc, phrases in documents:
+            if tokens_doc:
+                coupures_docs.append(len(tokens))
+                coupures_docs.extend(len(tokens) + phrase for phrase in phrases if 0 < phrase < len(tokens_doc))
+            tokens.extend(tokens_doc)
+            longueurs.append(len(tokens_doc))
+
+        ids = self._identifiants(tokens)
+        coupures = np.zeros(len(ids), bool)
+        coupures[np.array(coupures_docs, np.intp)] = True
+        poids = self._poids(ids, coupures)
+        neutres = self.neutres[ids]
+
+        document = np.repeat(np.arange(len(documents)), longueurs)
+        masses = np.empty((len(documents), 3))
+        masses[:, 0] = np.bincount(document, np.maximum(poids, 0), len(documents))
+        masses[:, 1] = np.bincount(document, np.maximum(-poids, 0), len(documents))
+        masses[:, 2] = np.bincount(document, neutres, len(documents))
+
+        classes = np.where(poids > 0, _CLASSE_POSITIF, np.where(
+            poids < 0, _CLASSE_NEGATIF, np.where(neutres > 0, _CLASSE_NEUTRE, _CLASSE_AUCUNE)))
+        mots = [{sentiment: [] for sentiment in SENTIMENTS} for _ in documents]
+        indices = np.flatnonzero(classes)
+        for i, k, classe in zip(indices.tolist(), document[indices].tolist(), classes[indices].tolist()):
+            mots[k][SENTIMENTS[classe - 1]].append(tokens[i])
+
+        return masses, mots
+
+    def analyser_lot(self, documents: Sequence[Tuple[Sequence[str], Sequence[int]]]) -> List[Dict]:
+        """Sentiment de plusieurs documents (voir evaluer_lot et resumer)"""
+        masses, mots = self.evaluer_lot(documents)
+        return [self.resumer(m, mots_doc) for m, mots_doc in zip(masses.tolist(), mots)]
+
+    def analyser(self, tokens: Sequence[str], phrases: Sequence[int] = (0,)) -> Dict:
+        """Sentiment d'un texte (tokens, indices des tokens qui commencent une phrase)"""
+        return self.analyser_lot([(tokens, phrases)])[0]
+
+    # ----- Résultats -----
+
+    @staticmethod
+    def resumer(masses: Sequence[float], mots: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """
+        Résultat à partir des masses (positive, négative, neutre) d'un texte
+
+        Les masses de plusieurs phrases s'additionnent : le résultat d'un
+        document est celui de la somme des masses de ses phrases.
+
+        Returns:
+            {'sentiment_dominant': signe de la polarité,
+             'polarite': (positif - négatif) / total, entre -1 et 1,
+             'scores': part de chaque masse en %, 'mots': si fournis}
+        """
+        # Arrondi : des masses ajoutées puis retirées (analyse incrémentale)
+        # ne laissent pas de résidu
+        positif, negatif, neutre = (round(float(m), 9) for m in masses)
+        total = positif + negatif + neutre
+        resultat = {}
+        if total == 0:
+            resultat['sentiment_dominant'] = 'neutre'
+            resultat['polarite'] = 0.0
+            resultat['scores'] = {sentiment: 0 for sentiment in SENTIMENTS}
+        else:
+            polarite = (positif - negatif) / total
+            resultat['sentiment_dominant'] = 'positif' if polarite > 0 else 'negatif' if polarite < 0 else 'neutre'
+            resultat['polarite'] = round(polarite, 4)
+            resultat['scores'] = {sentiment: round(m / total * 100, 1)
+                                  for sentiment, m in zip(SENTIMENTS, (positif, negatif, neutre))}
+        if mots is not None:
+            resultat['mots'] = mots
+        return resultat
+
 
 class AnalyseurSentiment:
-    def __init__(self, dictionnaire_path: str):
+    def __init__(self, dictionnaire_path: str = CHEMIN_DICTIONNAIRE):
         """
-        Charge le dictionnaire avec les sentiments
+        Utilise le lexique partagé (dictionnaire avec les sentiments)
         
         Format: {"mot": {"sentiment": "positif|negatif|neutre", ...}}
         """
-        with open(dictionnaire_path, 'r', encoding='utf-8') as f:
-            self.dictionnaire = json.load(f)
+        self.lexique = obtenir_lexique(dictionnaire_path)
+        self.dictionnaire = self.lexique.dictionnaire
         
-        # Créer des index par sentiment pour recherche rapide
-        self.mots_positifs = set()
-        self.mots_negatifs = set()
-        self.mots_neutres = set()
+        # Index par sentiment, maintenus par le lexique
+        self.mots_positifs = self.lexique.index_sentiment['positif']
+        self.mots_negatifs = self.lexique.index_sentiment['negatif']
+        self.mots_neutres = self.lexique.index_sentiment['neutre']
         
-        for mot, info in self.dictionnaire.items():
-            sentiment = info.get('sentiment', 'neutre')
-            if sentiment == 'positif':
-                self.mots_positifs.add(mot.lower())
-            elif sentiment == 'negatif':
-                self.mots_negatifs.add(mot.lower())
-            else:
-                self.mots_neutres.add(mot.lower())
+        self.moteur = MoteurSentiment(self.lexique)
         
         print(f"✅ Analyseur initialisé:")
         print(f"   - Mots positifs: {len(self.mots_positifs)}")
@@ -54,84 +289,46 @@ class AnalyseurSentiment:
     
     def analyser_texte(self, texte: str) -> Dict:
         """
-        Analyse le sentiment d'un texte complet
+        Analyse le sentiment d'un texte complet (calcul de MoteurSentiment)
+        
+        Les scores sont des parts de la masse de sentiment des mots connus
+        du dictionnaire, comme dans le pipeline NLP.
         
         Returns:
             {
                 'sentiment_global': str,
+                'polarite': float,
                 'score_positif': float,
                 'score_negatif': float,
                 'score_neutre': float,
                 'mots_positifs': List[str],
                 'mots_negatifs': List[str],
+                'total_mots': int,
                 'details': List[Dict]
             }
         """
-        # Tokeniser le texte
-        mots = re.findall(r'\b\w+\b', texte.lower())
-        
-        # Compter les sentiments
-        count_positif = 0
-        count_negatif = 0
-        count_neutre = 0
+        mots, phrases = tokeniser_phrases(texte)
+        sentiment = self.moteur.analyser(mots, phrases)
         
-        mots_positifs_trouves = []
-        mots_negatifs_trouves = []
+        # Ajouter les détails pour chaque mot reconnu
         details = []
-        
         for mot in mots:
-            sentiment = self.analyser_mot(mot)
-            
-            if sentiment == 'positif':
-                count_positif += 1
-                mots_positifs_trouves.append(mot)
-            elif sentiment == 'negatif':
-                count_negatif += 1
-                mots_negatifs_trouves.append(mot)
-            else:
-                count_neutre += 1
-            
-            # Ajouter les détails pour chaque mot reconnu
             if mot in self.dictionnaire:
                 details.append({
                     'mot': mot,
-                    'sentiment': sentiment,
+                    'sentiment': self.analyser_mot(mot),
                     'definitions': self.dictionnaire[mot].get('definitions', [])[:1]
                 })
         
-        # Calculer les scores (pourcentages)
-        total = len(mots)
-        if total == 0:
-            return {
-                'sentiment_global': 'neutre',
-                'score_positif': 0.0,
-                'score_negatif': 0.0,
-                'score_neutre': 0.0,
-                'mots_positifs': [],
-                'mots_negatifs': [],
-                'details': []
-            }
-        
-        score_positif = count_positif / total
-        score_negatif = count_negatif / total
-        score_neutre = count_neutre / total
-        
-        # Déterminer le sentiment global
-        if score_positif > score_negatif:
-            sentiment_global = 'positif'
-        elif score_negatif > score_positif:
-            sentiment_global = 'negatif'
-        else:
-            sentiment_global = 'neutre'
-        
         return {
-            'sentiment_global': sentiment_global,
-            'score_positif': round(score_positif * 100, 2),
-            'score_negatif': round(score_negatif * 100, 2),
-            'score_neutre': round(score_neutre * 100, 2),
-            'mots_positifs': mots_positifs_trouves,
-            'mots_negatifs': mots_negatifs_trouves,
-            'total_mots': total,
+            'sentiment_global': sentiment['sentiment_dominant'],
+            'polarite': sentiment['polarite'],
+            'score_positif': sentiment['scores']['positif'],
+            'score_negatif': sentiment['scores']['negatif'],
+            'score_neutre': sentiment['scores']['neutre'],
+            'mots_positifs': sentiment['mots']['positif'],
+            'mots_negatifs': sentiment['mots']['negatif'],
+            'total_mots': len(mots),
             'details': details
         }
     
@@ -157,4 +354,3 @@ class AnalyseurSentiment:
                 })
         
         return resultat
-
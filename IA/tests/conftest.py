@@ -0,0 +1,29 @@
+"""
+Configuration commune des tests (lancer `python -m pytest` depuis IA/)
+
+Les modules du backend s'importent à plat et chargent leurs fichiers
+(dictionary.json, cleaned_bible.txt) depuis le dossier IA/.
+"""
+
+import os
+import sys
+
+import pytest
+
+DOSSIER_IA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, DOSSIER_IA)
+os.chdir(DOSSIER_IA)
+
+
+@pytest.fixture(scope='session')
+def client():
+    """
+    Client de l'API, partagé par tous les tests : l'arrêt de l'application
+    (lifespan) arrête les pools de l'exécuteur, qui ne peuvent pas redémarrer
+    """
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
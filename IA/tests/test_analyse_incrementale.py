@@ -0,0 +1,147 @@
+"""Analyse incrémentale : deltas Quill aléatoires contre ré-analyse complète"""
+
+import random
+
+import pytest
+
+import analyse_incrementale
+from analyse_incrementale import (DocumentAnalyse, SessionInconnue, decouper_segments,
+                                  longueur_utf16, sessions)
+from nlp_malagasy import nlp
+
+ALPHABET = list("abdefghijklmnoprstvyz ") + ['.', '!', '\n', ' ', "'", '. ', '\n\n', '?!', 'A', 'R',
+                                             'ô', '😀', '👍🏽']
+
+
+@pytest.fixture(scope='module')
+def texte_initial():
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        return f.read(4000)
+
+
+def delta_aleatoire(aleatoire, texte):
+    """
+    Delta Quill de 1 à 3 opérations, et le texte attendu après application
+
+    Les positions sont tirées en points de code, puis converties en
+    unités UTF-16 comme les compte Quill.
+    """
+    ops = []
+    position = 0
+    for _ in range(aleatoire.randint(1, 3)):
+        garde = aleatoire.randint(0, len(texte) - position)
+        if garde:
+            ops.append({'retain': longueur_utf16(texte[position:position + garde])})
+            position += garde
+        if aleatoire.random() < 0.6:
+            if aleatoire.random() < 0.05:
+                ops.append({'insert': {'image': 'x.png'}})
+                insertion = analyse_incrementale.OBJET_INTEGRE
+            else:
+                insertion = ''.join(aleatoire.choice(ALPHABET) for _ in range(aleatoire.randint(1, 6)))
+                ops.append({'insert': insertion, 'attributes': {'bold': True}})
+            texte = texte[:position] + insertion + texte[position:]
+            position += len(insertion)
+        else:
+            longueur = min(aleatoire.randint(1, 8), len(texte) - position)
+            if longueur:
+                ops.append({'delete': longueur_utf16(texte[position:position + longueur])})
+                texte = texte[:position] + texte[position + longueur:]
+    return ops, texte
+
+
+@pytest.mark.parametrize('graine', range(20))
+def test_deltas_identiques_a_une_reanalyse_complete(texte_initial, graine):
+    aleatoire = random.Random(graine)
+    document = DocumentAnalyse(nlp, texte_initial[:aleatoire.randint(0, len(texte_initial))])
+    texte = document.texte
+    # Vue du client : segments reconstruits à partir des seules réponses
+    vue_client = {a['id']: a for a in document.annotations()}
+
+    for _ in range(15):
+        ops, texte = delta_aleatoire(aleatoire, texte)
+        resultat = document.appliquer_delta(ops)
+
+        assert document.texte == texte
+        assert [s.texte for s in document.segments] == decouper_segments(texte)
+        for identifiant in resultat['supprimes']:
+            del vue_client[identifiant]
+        for annotation in resultat['modifies']:
+            vue_client[annotation['id']] = annotation
+
+        reference = DocumentAnalyse(nlp, texte)
+        assert document.statistiques() == reference.statistiques()
+        attendues = reference.annotations()
+        courantes = document.annotations()
+        assert [{**a, 'id': None} for a in courantes] == [{**a, 'id': None} for a in attendues]
+        # Les segments non renvoyés n'ont pas changé (hors positions, décalées par le client)
+        assert set(vue_client) == {a['id'] for a in courantes}
+        for annotation in courantes:
+            ancienne = vue_client[annotation['id']]
+            assert {**ancienne, 'debut': None, 'fin': None} == {**annotation, 'debut': None, 'fin': None}
+
+
+def test_positions_en_unites_utf16():
+    """Un emoji compte pour deux unités, comme dans Quill"""
+    document = DocumentAnalyse(nlp, "Tsara 😀 ny andro. Faly aho.")
+    document.appliquer_delta([{'retain': 9}, {'insert': 'tokoa '}])
+    assert document.texte == "Tsara 😀 tokoa ny andro. Faly aho."
+    document.appliquer_delta([{'retain': 30}, {'delete': 3}, {'insert': 'izy'}])
+    assert document.texte == "Tsara 😀 tokoa ny andro. Faly izy."
+
+    annotations = document.annotations()
+    assert [(a['debut'], a['fin']) for a in annotations] == [(0, 25), (25, 34)]
+    attendues = DocumentAnalyse(nlp, document.texte).annotations()
+    assert [{**a, 'id': None} for a in annotations] == [{**a, 'id': None} for a in attendues]
+
+
+def test_retain_d_objet_integre():
+    document = DocumentAnalyse(nlp, "")
+    document.appliquer_delta([{'insert': {'image': 'x.png'}}, {'insert': 'Tsara 😀.'}])
+    document.appliquer_delta([{'retain': {'image': 'x.png'}, 'attributes': {'width': '50'}},
+                              {'retain': 8}, {'insert': '!'}])
+    assert document.texte == analyse_incrementale.OBJET_INTEGRE + "Tsara 😀!."
+
+
+@pytest.mark.parametrize('ops', [
+    [{'retain': 7}, {'insert': 'x'}],
+    [{'retain': 5}, {'delete': 2}],
+    [{'retain': 6}, {'delete': 1}],
+    [{'insert': 'x'}, {'retain': 7}, {'delete': 1}],
+    [{'insert': '\ud83d'}],
+    [{'retain': 'x'}],
+])
+def test_delta_invalide_ne_modifie_rien(ops):
+    document = DocumentAnalyse(nlp, "Tsara 😀 ny andro.")
+    annotations = document.annotations()
+    with pytest.raises(ValueError):
+        document.appliquer_delta(ops)
+    assert document.texte == "Tsara 😀 ny andro."
+    assert document.annotations() == annotations and document.version == 0
+
+
+def test_session_inconnue():
+    with pytest.raises(SessionInconnue):
+        sessions.modifier('inexistante', 0, [])
+    assert not issubclass(SessionInconnue, KeyError)
+
+
+def test_api_sessions(client, monkeypatch):
+    reponse = client.post('/api/sessions/inexistante/delta', json={'version': 0, 'ops': []})
+    assert reponse.status_code == 404
+
+    ouverture = client.post('/api/sessions', json={'texte': 'Tsara ny andro.'}).json()['data']
+    session, version = ouverture['session'], ouverture['version']
+    reponse = client.post(f'/api/sessions/{session}/delta',
+                          json={'version': version + 1, 'ops': [{'insert': 'A'}]})
+    assert reponse.status_code == 409
+    reponse = client.post(f'/api/sessions/{session}/delta',
+                          json={'version': version, 'ops': [{'retain': 1000}]})
+    assert reponse.status_code == 400
+
+    # Une KeyError interne est une erreur du serveur, pas une session inconnue
+    def defaillant(*args):
+        raise KeyError('cle_interne')
+    monkeypatch.setattr(sessions, 'modifier', defaillant)
+    reponse = client.post(f'/api/sessions/{session}/delta', json={'version': version, 'ops': []})
+    assert reponse.status_code == 500
@@ -0,0 +1,143 @@
+"""Annotation hors ligne : sorties JSONL et Parquet, reprise et erreurs par fichier"""
+
+import json
+import os
+
+import pytest
+
+import annoter
+from annoter import SortieJsonl, annoter_corpus, annoter_fichier, lister_fichiers
+from nlp_malagasy import nlp
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Dossier de 12 fichiers de tailles différentes tirés du corpus"""
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        texte = f.read(60_000)
+    dossier = tmp_path / 'corpus'
+    (dossier / 'sous-dossier').mkdir(parents=True)
+    for i in range(12):
+        sous_dossier = dossier / 'sous-dossier' if i % 3 == 0 else dossier
+        (sous_dossier / f'texte-{i:02d}.txt').write_text(texte[i * 4000:i * 4000 + 500 * (i + 1)],
+                                                          encoding='utf-8')
+    (dossier / 'ignore.md').write_text('Tsy raisina', encoding='utf-8')
+    return lister_fichiers([str(dossier)])
+
+
+def lire_jsonl(chemin):
+    with open(chemin, encoding='utf-8') as f:
+        return {e['fichier']: e for e in map(json.loads, f)}
+
+
+def attendus(fichiers):
+    return {f: json.loads(json.dumps(annoter_fichier(f), ensure_ascii=False)) for f in fichiers}
+
+
+def test_lister_fichiers(corpus):
+    assert len(corpus) == 12
+    assert all(f.endswith('.txt') for f in corpus)
+    tailles = [os.path.getsize(f) for f in corpus]
+    assert tailles == sorted(tailles, reverse=True)
+
+
+@pytest.mark.parametrize('processus', [0, 2])
+def test_jsonl(tmp_path, corpus, processus):
+    sortie = str(tmp_path / 'annotations.jsonl')
+    termines = list(annoter_corpus(corpus, SortieJsonl(sortie), processus))
+
+    assert sorted(termines) == sorted((f, None) for f in corpus)
+    assert lire_jsonl(sortie) == attendus(corpus)
+
+
+def test_reprise_jsonl(tmp_path, corpus):
+    sortie = str(tmp_path / 'annotations.jsonl')
+    progression = annoter_corpus(corpus, SortieJsonl(sortie))
+    premiers = [next(progression)[0] for _ in range(5)]
+    progression.close()
+    # Interruption pendant l'écriture d'une ligne
+    with open(sortie, 'a', encoding='utf-8') as f:
+        f.write('{"fichier": "' + corpus[7] + '", "tokens": ["ary", "h')
+
+    assert SortieJsonl(sortie).deja_annotes() == set(premiers)
+    reprise = [chemin for chemin, _ in annoter_corpus(corpus, SortieJsonl(sortie), 2)]
+    assert sorted(reprise) == sorted(set(corpus) - set(premiers))
+    assert lire_jsonl(sortie) == attendus(corpus)
+    # Tout est déjà annoté : rien à refaire
+    assert list(annoter_corpus(corpus, SortieJsonl(sortie), 2)) == []
+
+
+@pytest.mark.parametrize('processus', [0, 2])
+def test_erreurs_par_fichier(tmp_path, corpus, monkeypatch, processus):
+    """Une erreur sur un fichier (lecture ou analyse) n'arrête pas les autres"""
+    defaillant = corpus[3]
+    with open(defaillant, 'a', encoding='utf-8') as f:
+        f.write(' PANNE')
+    analyser = nlp.analyser_texte_complet
+
+    def analyser_ou_echouer(texte):
+        if texte.endswith('PANNE'):
+            raise KeyError('cle_interne')
+        return analyser(texte)
+
+    monkeypatch.setattr(nlp, 'analyser_texte_complet', analyser_ou_echouer)
+    manquant = str(tmp_path / 'absent.txt')
+    sortie = str(tmp_path / 'annotations.jsonl')
+    erreurs = {chemin: erreur for chemin, erreur in
+               annoter_corpus(corpus + [manquant], SortieJsonl(sortie), processus) if erreur}
+
+    assert erreurs.keys() == {defaillant, manquant}
+    assert erreurs[defaillant] == "KeyError : 'cle_interne'"
+    assert erreurs[manquant].startswith('FileNotFoundError : ')
+    assert lire_jsonl(sortie).keys() == set(corpus) - {defaillant}
+
+
+def test_parquet(tmp_path, corpus):
+    pq = pytest.importorskip('pyarrow.parquet')
+    dossier = str(tmp_path / 'annotations')
+
+    sortie = annoter.SortieParquet(dossier, taille_partie=5)
+    progression = annoter_corpus(corpus, sortie, format='parquet')
+    premiers = [next(progression)[0] for _ in range(7)]
+    progression.close()
+    # Une partie complète de 5 fichiers, plus la partie des 2 suivants écrite à la fermeture
+    assert sorted(os.listdir(dossier)) == ['part-00000.parquet', 'part-00001.parquet']
+
+    # Reste d'une écriture interrompue : supprimé à la reprise, pas pris pour une partie
+    temporaire = os.path.join(dossier, annoter.PREFIXE_TEMPORAIRE + 'interrompu.tmp')
+    with open(temporaire, 'wb') as f:
+        f.write(b'PAR1')
+    sortie = annoter.SortieParquet(dossier, taille_partie=5)
+    assert sortie.deja_annotes() == set(premiers)
+    assert not os.path.exists(temporaire)
+    reprise = [chemin for chemin, _ in annoter_corpus(corpus, sortie, 2, format='parquet')]
+    assert sorted(reprise) == sorted(set(corpus) - set(premiers))
+
+    parties = sorted(os.listdir(dossier))
+    assert parties == [f'part-{i:05d}.parquet' for i in range(3)]
+    lignes = [ligne for partie in parties for ligne in pq.read_table(os.path.join(dossier, partie)).to_pylist()]
+    assert len(lignes) == len(corpus)
+    for ligne in lignes:
+        attendu = annoter_fichier(ligne['fichier'])
+        assert ligne['tokens'] == attendu['tokens']
+        assert ligne['lemmes'] == attendu['lemmes']
+        assert ligne['pos_tags'] == [pos for _, pos in attendu['pos_tags']]
+        assert ligne['entites'] == attendu['entites']
+        assert ligne['sentiment'] == attendu['sentiment']
+        assert dict(ligne['statistiques']['distribution_pos']) == attendu['statistiques']['distribution_pos']
+
+
+def test_parquet_echec_d_ecriture(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    dossier = str(tmp_path / 'annotations')
+    sortie = annoter.SortieParquet(dossier, taille_partie=1)
+
+    def echouer(table, fichier):
+        fichier.write(b'PAR1')
+        raise OSError('disque plein')
+
+    monkeypatch.setattr(sortie.pq, 'write_table', echouer)
+    with pytest.raises(OSError):
+        sortie.ecrire(annoter._ligne_parquet({'fichier': 'a.txt', **nlp.analyser_texte_complet('Tsara')}))
+    # Ni partie incomplète, ni temporaire laissé dans le dossier
+    assert os.listdir(dossier) == []
@@ -0,0 +1,35 @@
+"""API HTTP : formats de réponse et validation des requêtes"""
+
+import pytest
+
+from nlp_malagasy import nlp, LIMITE_SUGGESTIONS
+
+
+def test_predire_mot_suivant_frequence_et_score(client):
+    reponse = client.post('/api/predire-mot-suivant', json={'contexte': 'Ary hoy'})
+    assert reponse.status_code == 200
+    predictions = reponse.json()['predictions']
+
+    attendu = nlp.predire_avec_frequences('Ary hoy', 5)
+    assert [p['mot'] for p in predictions] == [mot for mot, _, _ in attendu]
+    for prediction, (_, score, frequence) in zip(predictions, attendu):
+        assert isinstance(prediction['frequence'], int)
+        assert prediction['frequence'] == frequence > 0
+        assert prediction['score'] == round(score, 6)
+
+
+@pytest.mark.parametrize('route, corps', [
+    ('/api/predire-mot-suivant', {'contexte': 'ary'}),
+    ('/api/completer', {'prefixe': 'ta', 'contexte': 'ary'}),
+])
+@pytest.mark.parametrize('limite', [None, 0, -1, LIMITE_SUGGESTIONS + 1, 'cinq'])
+def test_limite_invalide_refusee(client, route, corps, limite):
+    reponse = client.post(route, json={**corps, 'limite': limite})
+    assert reponse.status_code == 422
+
+
+@pytest.mark.parametrize('limite', [1, LIMITE_SUGGESTIONS])
+def test_limite_valide(client, limite):
+    reponse = client.post('/api/predire-mot-suivant', json={'contexte': 'ary', 'limite': limite})
+    assert reponse.status_code == 200
+    assert len(reponse.json()['predictions']) == limite
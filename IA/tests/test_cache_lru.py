@@ -0,0 +1,72 @@
+"""Cache LRU : ordre d'éviction, taille bornée et compteurs"""
+
+import pytest
+
+from cache_lru import ABSENT, CacheLRU, fusionner_statistiques
+
+
+def test_eviction_de_la_moins_recemment_utilisee():
+    cache = CacheLRU(3)
+    for cle in 'abc':
+        cache.ajouter(cle, cle.upper())
+    assert cache.obtenir('a') == 'A'      # 'a' redevient la plus récente
+    cache.ajouter('d', 'D')               # 'b' est évincée
+    assert cache.obtenir('b') is None
+    cache.ajouter('c', 'C2')              # remplacement : pas d'éviction, 'c' la plus récente
+    cache.ajouter('e', 'E')               # 'a' est évincée
+    assert list(cache._entrees) == ['d', 'c', 'e']
+    assert cache.obtenir('c') == 'C2'
+    assert cache.evictions == 2
+
+
+def test_taille_bornee():
+    cache = CacheLRU(100)
+    for i in range(1000):
+        cache.ajouter(i, i * i)
+        assert len(cache) <= 100
+    assert len(cache) == 100
+    assert cache.evictions == 900
+    assert [cache.obtenir(i) for i in (899, 900, 999)] == [None, 810000, 998001]
+
+
+def test_capacite_invalide():
+    with pytest.raises(ValueError):
+        CacheLRU(0)
+
+
+def test_valeur_none_en_cache():
+    cache = CacheLRU(2)
+    cache.ajouter('vide', None)
+    assert cache.obtenir('vide', ABSENT) is None
+    assert cache.obtenir('absente', ABSENT) is ABSENT
+    assert cache.obtenir('absente') is None
+    assert (cache.succes, cache.echecs) == (1, 2)
+
+
+def test_compteurs_et_vider():
+    cache = CacheLRU(2)
+    cache.ajouter('a', 1)
+    cache.obtenir('a')
+    cache.obtenir('a')
+    cache.obtenir('b')
+    cache.ajouter('b', 2)
+    cache.ajouter('c', 3)
+    assert cache.retirer('c') == 3 and cache.retirer('c') is None
+    cache.vider()
+    assert cache.obtenir('b') is None
+    assert cache.statistiques() == {'capacite': 2, 'taille': 0, 'succes': 2, 'echecs': 2,
+                                    'evictions': 1, 'taux_succes': 0.5}
+
+
+def test_fusionner_statistiques():
+    premier, second = CacheLRU(2), CacheLRU(3)
+    premier.ajouter('a', 1)
+    premier.obtenir('a')
+    for cle in 'abcd':
+        second.ajouter(cle, cle)
+    second.obtenir('z')
+    second.obtenir('z')
+    total = fusionner_statistiques([premier.statistiques(), second.statistiques()])
+    assert total == {'capacite': 5, 'taille': 4, 'succes': 1, 'echecs': 2, 'evictions': 1,
+                     'taux_succes': round(1 / 3, 4)}
+    assert fusionner_statistiques([])['taux_succes'] == 0.0
@@ -0,0 +1,207 @@
+"""Canal WebSocket de l'éditeur : protocole, format des réponses et annulations"""
+
+import asyncio
+import json
+
+import pytest
+
+import canal_editeur
+from canal_editeur import CanalEditeur
+from corrector import corrector
+from nlp_malagasy import nlp, LIMITE_SUGGESTIONS
+
+
+def echanger(ws, message):
+    ws.send_text(message if isinstance(message, str) else json.dumps(message))
+    return ws.receive_json()
+
+
+def test_prediction_frequence_et_score(client):
+    with client.websocket_connect('/ws/editeur') as ws:
+        reponse = echanger(ws, {'id': 1, 'type': 'prediction', 'contexte': 'Ary hoy'})
+
+    assert reponse['id'] == 1 and reponse['type'] == 'prediction'
+    attendu = nlp.predire_avec_frequences('Ary hoy', 5)
+    assert reponse['resultat'] == [{'mot': mot, 'frequence': frequence, 'score': round(score, 6)}
+                                   for mot, score, frequence in attendu]
+    # Même format que l'API HTTP
+    http = client.post('/api/predire-mot-suivant', json={'contexte': 'Ary hoy'}).json()['predictions']
+    assert reponse['resultat'] == http
+
+
+def test_completion_et_correction(client):
+    with client.websocket_connect('/ws/editeur') as ws:
+        completion = echanger(ws, {'id': 1, 'type': 'completion', 'prefixe': 'an', 'contexte': 'ary'})
+        correction = echanger(ws, {'id': 2, 'type': 'correction', 'texte': 'tsra'})
+
+    assert completion['resultat'] == [{'mot': mot, 'score': round(score, 6)}
+                                      for mot, score in nlp.completer_mot('an', 'ary', 5)]
+    assert correction['resultat'] == corrector.verifier_mot('tsra')
+
+
+@pytest.mark.parametrize('limite', [0, -1, LIMITE_SUGGESTIONS + 1, 10 ** 9, 'cinq', True])
+def test_limite_invalide_refusee(client, limite):
+    with client.websocket_connect('/ws/editeur') as ws:
+        for type_requete, corps in (('prediction', {'contexte': 'ary'}),
+                                    ('completion', {'prefixe': 'ta', 'contexte': 'ary'})):
+            reponse = echanger(ws, {'id': 1, 'type': type_requete, 'limite': limite, **corps})
+            assert 'resultat' not in reponse
+            assert 'limite' in reponse['erreur']
+
+
+def test_limite_maximale(client):
+    with client.websocket_connect('/ws/editeur') as ws:
+        reponse = echanger(ws, {'id': 1, 'type': 'prediction', 'contexte': 'ary',
+                                'limite': LIMITE_SUGGESTIONS})
+    assert len(reponse['resultat']) == LIMITE_SUGGESTIONS
+
+
+def test_messages_invalides(client):
+    with client.websocket_connect('/ws/editeur') as ws:
+        assert 'erreur' in echanger(ws, 'pas du json')
+        assert 'erreur' in echanger(ws, '[1, 2]')
+        assert 'inconnu' in echanger(ws, {'id': 1, 'type': 'inconnu'})['erreur']
+        assert echanger(ws, {'id': 2, 'type': 'prediction'})['erreur'] == "Paramètre manquant : contexte"
+
+        # Une trame binaire est refusée sans fermer la connexion
+        ws.send_bytes(json.dumps({'id': 3, 'type': 'prediction', 'contexte': 'ary'}).encode())
+        assert 'binaire' in ws.receive_json()['erreur']
+        assert 'resultat' in echanger(ws, {'id': 4, 'type': 'prediction', 'contexte': 'ary'})
+
+
+@pytest.mark.parametrize('canal', [[1], {'a': 1}, True, 1.5])
+def test_canal_invalide_refuse(client, canal):
+    with client.websocket_connect('/ws/editeur') as ws:
+        reponse = echanger(ws, {'id': 1, 'type': 'prediction', 'contexte': 'ary', 'canal': canal})
+        assert reponse == {'id': 1, 'type': 'prediction', 'erreur': "Paramètre invalide : canal"}
+        # La connexion reste ouverte
+        for canal_valide in ('marge', 3):
+            reponse = echanger(ws, {'id': 2, 'type': 'prediction', 'contexte': 'ary', 'canal': canal_valide})
+            assert 'resultat' in reponse
+
+
+class FauxWebSocket:
+    def __init__(self):
+        self.envoyes = []
+
+    async def send_text(self, texte):
+        self.envoyes.append(json.loads(texte))
+
+
+class ExecuteurBloque:
+    """Exécuteur dont les calculs attendent d'être libérés par le test"""
+
+    def __init__(self):
+        self.libere = asyncio.Event()
+        self.appels = []
+        self.tailles = []
+
+    async def executer(self, cible, methode, *arguments, taille=0):
+        self.appels.append(arguments[0])
+        self.tailles.append(taille)
+        await self.libere.wait()
+        return [(arguments[0], 1.0, 1)]
+
+
+def scenario(etapes):
+    """Exécute `etapes(canal, executeur)` et renvoie les réponses du canal"""
+    async def executer():
+        canal = CanalEditeur(FauxWebSocket(), ExecuteurBloque())
+        await etapes(canal, canal.executeur)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        for voie in canal.voies.values():
+            voie.tache.cancel()
+        return canal.websocket.envoyes, canal.executeur.appels
+    return asyncio.run(executer())
+
+
+async def recevoir(canal, identifiant, contexte='ary'):
+    await canal._recevoir(json.dumps({'id': identifiant, 'type': 'prediction', 'contexte': contexte}))
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_annulation_requete_en_cours(monkeypatch):
+    monkeypatch.setattr(canal_editeur, 'compteurs', canal_editeur.Counter())
+
+    async def etapes(canal, executeur):
+        await recevoir(canal, 1)
+        assert executeur.appels == ['ary']
+        await canal._recevoir(json.dumps({'id': 1, 'type': 'annuler'}))
+        # Réponse immédiate, sans attendre la fin du calcul
+        assert canal.websocket.envoyes == [{'id': 1, 'type': 'prediction', 'annule': True}]
+        executeur.libere.set()
+
+    envoyes, appels = scenario(etapes)
+    assert envoyes == [{'id': 1, 'type': 'prediction', 'annule': True}]
+    assert canal_editeur.compteurs == {'recues': 1, 'annulees': 1}
+
+
+def test_annulation_requete_en_attente(monkeypatch):
+    monkeypatch.setattr(canal_editeur, 'compteurs', canal_editeur.Counter())
+
+    async def etapes(canal, executeur):
+        await recevoir(canal, 1, 'a')
+        await recevoir(canal, 2, 'b')
+        await canal._recevoir(json.dumps({'id': 2, 'type': 'annuler'}))
+        # Identifiant inconnu : ignoré
+        await canal._recevoir(json.dumps({'id': 99, 'type': 'annuler'}))
+        executeur.libere.set()
+
+    envoyes, appels = scenario(etapes)
+    # La requête 1, périmée par la 2, reste sans réponse : la 2 n'est jamais calculée
+    assert appels == ['a']
+    assert envoyes == [{'id': 2, 'type': 'prediction', 'annule': True}]
+    assert canal_editeur.compteurs == {'recues': 2, 'annulees': 2}
+
+
+def test_rafale_seule_la_derniere_requete_repond(monkeypatch):
+    monkeypatch.setattr(canal_editeur, 'compteurs', canal_editeur.Counter())
+
+    async def etapes(canal, executeur):
+        for identifiant, contexte in enumerate(['a', 'ab', 'abc', 'abcd'], 1):
+            await recevoir(canal, identifiant, contexte)
+        executeur.libere.set()
+
+    envoyes, appels = scenario(etapes)
+    # La première est calculée puis ignorée, les deux suivantes jamais calculées
+    assert appels == ['a', 'abcd']
+    assert envoyes == [{'id': 4, 'type': 'prediction',
+                        'resultat': [{'mot': 'abcd', 'frequence': 1, 'score': 1.0}]}]
+    assert canal_editeur.compteurs == {'recues': 4, 'annulees': 3, 'traitees': 1}
+
+
+def test_nombre_de_voies_borne(monkeypatch):
+    monkeypatch.setattr(canal_editeur, 'compteurs', canal_editeur.Counter())
+    monkeypatch.setattr(canal_editeur, 'VOIES_MAX', 2)
+
+    async def etapes(canal, executeur):
+        for identifiant, nom in enumerate(['a', 'b', 'c'], 1):
+            await canal._recevoir(json.dumps({'id': identifiant, 'type': 'prediction',
+                                              'contexte': nom, 'canal': nom}))
+        # Une voie déjà ouverte accepte toujours des requêtes
+        await canal._recevoir(json.dumps({'id': 4, 'type': 'prediction', 'contexte': 'ab', 'canal': 'a'}))
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert len(canal.voies) == 2
+
+    envoyes, appels = scenario(etapes)
+    assert envoyes == [{'id': 3, 'type': 'prediction', 'erreur': "Trop de voies ouvertes (au plus 2)"}]
+    # La requête 4 a remplacé la 1, qui attendait encore
+    assert appels == ['ab', 'b']
+    assert canal_editeur.compteurs == {'recues': 3, 'annulees': 1}
+
+
+def test_taille_du_texte_transmise():
+    """Les textes longs vont au pool de processus, comme dans l'API HTTP"""
+    tailles = []
+
+    async def etapes(canal, executeur):
+        for type_requete in ('correction_texte', 'sentiment', 'correction'):
+            await canal._recevoir(json.dumps({'id': 1, 'type': type_requete, 'texte': 'x' * 5000}))
+        await recevoir(canal, 2)
+        tailles.extend(executeur.tailles)
+
+    scenario(etapes)
+    assert tailles == [5000, 5000, 0, 0]
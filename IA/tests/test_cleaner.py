@@ -0,0 +1,150 @@
+"""Extraction des PDF : nettoyage des pages et écriture du corpus"""
+
+import os
+import textwrap
+
+import pytest
+
+fitz = pytest.importorskip('fitz')
+
+import cleaner
+from cleaner import extraire, nettoyer_texte
+
+
+@pytest.fixture(scope='module')
+def versets():
+    """Lignes du corpus sans chiffres (les chiffres sont retirés comme numéros de versets)"""
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        lignes = [ligne.strip() for ligne in f.read(200_000).splitlines()]
+    return [ligne for ligne in lignes
+            if ligne.isascii() and len(ligne) > 20 and ligne[0].isalpha()
+            and not any(c.isdigit() for c in ligne) and 'Chapitre' not in ligne
+            and not ligne.startswith(('Accueil', 'Accès', 'http'))]
+
+
+def generer_pdf(chemin, titre, versets, pages):
+    """
+    PDF imitant l'impression d'une page du site : en-tête (date, titre),
+    pied de page (adresse, numéro de page), fil d'Ariane et liste des
+    chapitres sur la première page, « Chapitre N » et numéros de versets
+
+    Returns:
+        versets écrits, dans l'ordre
+    """
+    doc = fitz.open()
+    ecrits = []
+    chapitre, verset = 1, 1
+    for numero in range(1, pages + 1):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((30, 22), "12/18/25, 10:41 AM", fontsize=8)
+        page.insert_text((290, 22), titre, fontsize=8)
+        page.insert_text((30, 780), "https://nybaiboly.net/Bible/BibleMalagasyHtm-at01-Genese.htm", fontsize=8)
+        page.insert_text((560, 780), f"{numero}/{pages}", fontsize=8)
+
+        lignes, tete = [], ''
+        if numero == 1:
+            lignes += [f"Accueil / Bible / {titre}", titre,
+                       "Accès direct aux chapitres : " + ", ".join(map(str, range(1, 36))) + ","]
+            tete = ", ".join(map(str, range(36, 51))) + f" Chapitre {chapitre} "
+        while len(lignes) < 50:
+            if verset > 12:
+                chapitre, verset, tete = chapitre + 1, 1, f"Chapitre {chapitre + 1} "
+                lignes.append("*")
+            texte = versets[len(ecrits) % len(versets)]
+            ecrits.append(texte)
+            lignes += textwrap.wrap(f"{tete}{verset} {texte}", 100, break_on_hyphens=False)
+            tete, verset = '', verset + 1
+        for i, ligne in enumerate(lignes):
+            page.insert_text((30, 50 + i * 13), ligne, fontsize=9)
+    doc.save(chemin)
+    return ecrits
+
+
+@pytest.fixture(scope='module')
+def pdfs(tmp_path_factory, versets):
+    """Deux PDF (40 et 3 pages) et le texte attendu de chacun"""
+    dossier = tmp_path_factory.mktemp('pdf')
+    resultat = []
+    for nom, pages, decalage in (('Genesisy', 40, 0), ('Eksodosy', 3, 500)):
+        chemin = str(dossier / f'{nom}.pdf')
+        ecrits = generer_pdf(chemin, nom, versets[decalage:] + versets[:decalage], pages)
+        resultat.append((chemin, ' '.join([nom] + ecrits)))
+    return resultat
+
+
+def mots(texte):
+    return ' '.join(texte.split())
+
+
+@pytest.mark.parametrize('page, attendu', [
+    ("Accueil / Bible / Genesisy\nGenesisy\n", "Genesisy\n"),
+    ("Accès direct aux chapitres : 1, 2, 3,\n36, 37, 50 Chapitre 1 1 Tamin'ny voalohany\n",
+     "Tamin'ny voalohany\n"),
+    ("12 Ary hoy Andriamanitra\nfanahy\n*\nChapitre 2 1 Ary vita\n",
+     "Ary hoy Andriamanitra\nfanahy\nAry vita\n"),
+    ("12/18/25, 10:41 AM Genesisy\nTsara\n3/40\nhttps://nybaiboly.net/x.htm\n \n", "Tsara\n"),
+    ("7\nNy andro 3 faha\n", "Ny andro faha\n"),
+])
+def test_nettoyer_texte(page, attendu):
+    assert nettoyer_texte(page) == attendu
+
+
+def test_extraire(tmp_path, pdfs):
+    sortie = str(tmp_path / 'corpus.txt')
+    pages = extraire([chemin for chemin, _ in pdfs], sortie)
+
+    assert pages == 43
+    with open(sortie, encoding='utf-8') as f:
+        texte = f.read()
+    # En-têtes, pieds de page, navigation et numéros retirés ; versets conservés
+    assert mots(texte) == mots(' '.join(attendu for _, attendu in pdfs))
+    for reste in ('http', '10:41', 'Accueil', 'Accès', 'Chapitre', '/40', '*'):
+        assert reste not in texte
+    assert not any(c.isdigit() for c in texte)
+    assert texte.startswith('Genesisy\n') and '\n\n' not in texte
+
+
+def test_extraire_en_processus_identique(tmp_path, pdfs):
+    chemins = [chemin for chemin, _ in pdfs]
+    extraire(chemins, str(tmp_path / 'sequentiel.txt'), processus=0)
+    assert extraire(chemins, str(tmp_path / 'parallele.txt'), processus=2) == 43
+    with open(tmp_path / 'sequentiel.txt', encoding='utf-8') as f, \
+            open(tmp_path / 'parallele.txt', encoding='utf-8') as g:
+        assert f.read() == g.read()
+
+
+@pytest.mark.parametrize('processus', [0, 2])
+def test_extraire_dossier(tmp_path, pdfs, processus):
+    chemins = [chemin for chemin, _ in pdfs]
+    extraire(chemins, str(tmp_path / 'corpus.txt'))
+    dossier = str(tmp_path / 'textes')
+
+    assert extraire(chemins, dossier=dossier, processus=processus) == 43
+    assert sorted(os.listdir(dossier)) == ['Eksodosy.txt', 'Genesisy.txt']
+    contenus = []
+    for chemin, attendu in pdfs:
+        nom = os.path.splitext(os.path.basename(chemin))[0] + '.txt'
+        with open(os.path.join(dossier, nom), encoding='utf-8') as f:
+            contenus.append(f.read())
+        assert mots(contenus[-1]) == mots(attendu)
+    with open(tmp_path / 'corpus.txt', encoding='utf-8') as f:
+        assert ''.join(contenus) == f.read()
+
+
+def test_extraire_sans_destination(pdfs):
+    with pytest.raises(ValueError):
+        extraire([pdfs[0][0]])
+    with pytest.raises(ValueError):
+        extraire([pdfs[0][0]], 'corpus.txt', 'textes')
+
+
+def test_marges_de_page(tmp_path):
+    chemin = str(tmp_path / 'marges.pdf')
+    doc = fitz.open()
+    page = doc.new_page(width=612, height=792)
+    page.insert_text((30, 22), "Lohateny", fontsize=8)
+    page.insert_text((30, 400), "Votoatiny", fontsize=9)
+    page.insert_text((30, 780), "Farany", fontsize=8)
+    doc.save(chemin)
+    with fitz.open(chemin) as doc:
+        assert cleaner.texte_page(doc[0]) == "Votoatiny\n"
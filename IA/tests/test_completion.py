@@ -0,0 +1,88 @@
+"""Complétion : index de préfixes contre un parcours complet du vocabulaire"""
+
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from completion import IndexCompletion
+from nlp_malagasy import nlp
+
+
+def completer_parcours(index, prefixe, n, tokens=None):
+    """Référence : tous les mots du préfixe, classés un par un"""
+    modele = index.modele
+    mots = [mot for mot in index.mots if mot.startswith(prefixe)]
+    ids = np.array([modele.ids.get(mot, -1) for mot in mots], np.int64)
+    frequences = np.array([modele.unigrammes[i] / modele.nombre_mots if i >= 0 else 0.0 for i in ids])
+    lignes = modele._lignes(tokens) if tokens else []
+    if not lignes:
+        scores = frequences
+    else:
+        scores = np.zeros(len(mots))
+        scores[ids >= 0] = modele._scorer(lignes, ids[ids >= 0], 'kneser-ney')
+    ordre = np.lexsort((np.arange(len(mots)), -frequences, -scores))[:n]
+    return [(mots[i], scores[i]) for i in ordre.tolist()]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return IndexCompletion(nlp.mots_valides, nlp.modele_ngrams)
+
+
+@pytest.fixture(scope='module')
+def requetes(index):
+    """Préfixes de 0 à 4 caractères de mots du corpus, avec ou sans contexte"""
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        tokens = nlp.tokenize(f.read(200_000))
+    hasard = random.Random(7)
+    resultat = []
+    for _ in range(300):
+        i = hasard.randrange(3, len(tokens))
+        prefixe = tokens[i][:hasard.randint(0, 4)]
+        contexte = tokens[i - hasard.randint(1, 3):i] if hasard.random() < 0.5 else None
+        resultat.append((prefixe, contexte, hasard.choice((1, 5, 10, 30))))
+    return resultat + [('zzzq', None, 5), ('a', ['mot-tsy-fantatra'], 5), ('', None, 5)]
+
+
+def test_identique_au_parcours(index, requetes):
+    for prefixe, contexte, n in requetes:
+        assert index.completer(prefixe, n, contexte) == completer_parcours(index, prefixe, n, contexte)
+
+
+def test_mots_ajoutes(requetes):
+    index = IndexCompletion(nlp.mots_valides, nlp.modele_ngrams)
+    for mot in ('aaaaaza', 'ankizy-vaovao', 'zzzqa', 'ny', 'mivavaka-be'):
+        index.ajouter(mot)
+    assert 'zzzqa' in index.mots and index.mots == sorted(index.mots)
+    assert index.completer('zzzq', 5) == [('zzzqa', 0.0)]
+    for prefixe, contexte, n in requetes:
+        assert index.completer(prefixe, n, contexte) == completer_parcours(index, prefixe, n, contexte)
+
+
+def test_ajouts_pendant_les_completions():
+    """Chaque complétion lit un état cohérent : le score est la fréquence du mot rendu"""
+    index = IndexCompletion(nlp.mots_valides, nlp.modele_ngrams)
+    modele = index.modele
+    frequence = {mot: modele.unigrammes[i] / modele.nombre_mots for mot, i in modele.ids.items()}
+    erreurs = []
+    fin = threading.Event()
+
+    def completer():
+        while not fin.is_set():
+            for prefixe in ('', 'a', 'ma', 'n', 'zz'):
+                for mot, score in index.completer(prefixe, 30):
+                    if not mot.startswith(prefixe) or score != frequence.get(mot, 0.0):
+                        erreurs.append((prefixe, mot, score))
+
+    lecteurs = [threading.Thread(target=completer) for _ in range(3)]
+    for lecteur in lecteurs:
+        lecteur.start()
+    for k in range(300):
+        index.ajouter(f"{'aamnz'[k % 5]}{k:04d}")
+    fin.set()
+    for lecteur in lecteurs:
+        lecteur.join()
+    assert not erreurs
+    assert len(index) == len(IndexCompletion(nlp.mots_valides, nlp.modele_ngrams)) + 300
@@ -0,0 +1,160 @@
+"""Correcteur : suggestions avec index de candidats contre balayage complet"""
+
+import json
+import random
+
+import pytest
+from rapidfuzz import fuzz, process
+
+from corrector import CorrecteurMalagasy, NOMBRE_SUGGESTIONS, SIMILARITE_MIN
+from index_candidats import COMPTE_MAX, IndexComptes
+
+ALPHABET = 'abdefghijklmnoprstvyz'
+
+
+def mot_aleatoire(aleatoire, longueur_min=2, longueur_max=14):
+    return ''.join(aleatoire.choice(ALPHABET)
+                   for _ in range(aleatoire.randint(longueur_min, longueur_max)))
+
+
+def deformer(aleatoire, mot, modifications):
+    """Applique des substitutions, insertions et suppressions aléatoires"""
+    for _ in range(modifications):
+        i = aleatoire.randrange(len(mot) + 1)
+        operation = aleatoire.choice(('substitution', 'insertion', 'suppression'))
+        if operation == 'insertion' or len(mot) <= 1:
+            mot = mot[:i] + aleatoire.choice(ALPHABET) + mot[i:]
+        elif operation == 'suppression':
+            i = min(i, len(mot) - 1)
+            mot = mot[:i] + mot[i + 1:]
+        else:
+            i = min(i, len(mot) - 1)
+            mot = mot[:i] + aleatoire.choice(ALPHABET) + mot[i + 1:]
+    return mot
+
+
+def balayage_complet(mot, mots):
+    """Référence : fuzz.ratio sur tout le dictionnaire (égalités par ordre alphabétique)"""
+    trouves = process.extract(mot, mots, scorer=fuzz.ratio, limit=None, score_cutoff=SIMILARITE_MIN)
+    trouves.sort(key=lambda s: (-s[1], s[0]))
+    return [(m, score) for m, score, _ in trouves[:NOMBRE_SUGGESTIONS]]
+
+
+@pytest.fixture(scope='module')
+def dictionnaire_synthetique(tmp_path_factory):
+    aleatoire = random.Random(3)
+    mots = set()
+    while len(mots) < 3000:
+        mots.add(mot_aleatoire(aleatoire))
+    chemin = tmp_path_factory.mktemp('dico') / 'synthetique.json'
+    chemin.write_text(json.dumps({mot: {'type': 'nom'} for mot in sorted(mots)}), encoding='utf-8')
+    return str(chemin), sorted(mots)
+
+
+@pytest.mark.parametrize('index', ['comptes', None])
+def test_suggestions_identiques_au_balayage_complet(dictionnaire_synthetique, index):
+    chemin, mots = dictionnaire_synthetique
+    correcteur = CorrecteurMalagasy(chemin, index_candidats=index)
+    aleatoire = random.Random(4)
+
+    for _ in range(400):
+        requete = deformer(aleatoire, aleatoire.choice(mots), aleatoire.randint(1, 5))
+        if requete in correcteur.mots_valides:
+            continue
+        attendu = balayage_complet(requete, correcteur.mots_valides)
+        assert correcteur._chercher_similaires(requete) == attendu
+
+        # Mêmes scores que l'ancien balayage (process.extract sur tout le dictionnaire)
+        ancien = process.extract(requete, correcteur.mots_valides, scorer=fuzz.ratio,
+                                 limit=NOMBRE_SUGGESTIONS, score_cutoff=SIMILARITE_MIN)
+        assert [score for _, score in attendu] == [score for _, score, _ in ancien]
+
+        rapport = correcteur.verifier_mot(requete)
+        assert rapport['suggestions'] == [m for m, _ in attendu]
+
+
+def test_borne_des_comptes(dictionnaire_synthetique):
+    """Aucun mot écarté par l'index n'atteint le seuil de fuzz.ratio"""
+    _, mots = dictionnaire_synthetique
+    index = IndexComptes(mots)
+    aleatoire = random.Random(5)
+    for _ in range(100):
+        requete = deformer(aleatoire, aleatoire.choice(mots), aleatoire.randint(1, 6))
+        for seuil in (SIMILARITE_MIN, 75):
+            candidats = set(index.candidats(requete, seuil))
+            assert len(candidats) < len(mots)
+            for mot in mots:
+                if mot not in candidats:
+                    assert fuzz.ratio(requete, mot) < seuil
+
+
+def test_index_ajouts_et_caracteres_nouveaux():
+    index = IndexComptes(['tsara', 'ratsy'])
+    mots = ['tsara', 'ratsy']
+    # Au-delà de la capacité initiale, et avec des caractères absents jusque-là
+    for i in range(40):
+        mot = 'fahasambarana'[:4 + i % 9] + 'çéô'[i % 3] * (i // 10)
+        index.ajouter(mot)
+        mots.append(mot)
+    assert len(index) == len(mots)
+    for requete in ('fahasambaran', 'fahaçç', 'tsar', 'éééé'):
+        attendu = sorted(m for m in mots if fuzz.ratio(requete, m) >= SIMILARITE_MIN)
+        obtenu = sorted(index.candidats(requete, SIMILARITE_MIN))
+        assert set(attendu) <= set(obtenu)
+        assert [m for m in obtenu if fuzz.ratio(requete, m) >= SIMILARITE_MIN] == attendu
+
+
+def test_index_comptes_tronques():
+    mot = 'a' * (COMPTE_MAX + 10)
+    index = IndexComptes([mot, 'b'])
+    assert index.candidats('a' * (COMPTE_MAX + 5), SIMILARITE_MIN) == [mot, 'b']
+    assert index.candidats('a' * 200, SIMILARITE_MIN) == [mot]
+
+
+def test_ajout_mot_visible_dans_les_suggestions(tmp_path):
+    chemin = tmp_path / 'petit.json'
+    chemin.write_text(json.dumps({'tsara': {}, 'ratsy': {}}), encoding='utf-8')
+    correcteur = CorrecteurMalagasy(str(chemin))
+    assert 'fahasambarana' not in correcteur.verifier_mot('fahasambaran')['suggestions']
+
+    correcteur.ajouter_mot('fahasambarana', {'type': 'nom'})
+    assert correcteur.verifier_mot('fahasambaran')['suggestions'] == ['fahasambarana']
+
+
+@pytest.fixture
+def petit_correcteur(tmp_path):
+    chemin = tmp_path / 'accents.json'
+    mots = ['tsara', 'andro', 'été', 'fahasambarana', "amin'ny", 'ankizy', 'ny', 'koa']
+    chemin.write_text(json.dumps({mot: {'type': 'nom'} for mot in mots}), encoding='utf-8')
+    return CorrecteurMalagasy(str(chemin))
+
+
+def test_corriger_texte_positions(petit_correcteur):
+    texte = "Été 🌞 tsra, ny àndro tsara\nTSRA amin’ny fahasambarna tsra koa"
+    erreurs = petit_correcteur.corriger_texte(texte)
+
+    attendu = [(1, 'tsra'), (3, 'àndro'), (5, 'TSRA'), (7, 'fahasambarna'), (8, 'tsra')]
+    assert [(e['position'], e['mot_original']) for e in erreurs] == attendu
+    for erreur in erreurs:
+        assert texte[erreur['debut']:erreur['fin']] == erreur['mot_original']
+    # Mots répétés : chaque occurrence garde ses propres positions
+    debuts = [e['debut'] for e in erreurs if e['mot_original'].lower() == 'tsra']
+    assert debuts == [texte.index('tsra'), texte.index('TSRA'), texte.rindex('tsra')]
+    assert erreurs[0]['suggestions'][0] == 'tsara'
+    assert erreurs[1]['suggestions'][0] == 'andro'
+    assert erreurs[3]['suggestions'] == ['fahasambarana']
+
+
+def test_corriger_texte_verifie_chaque_mot_une_fois(petit_correcteur, monkeypatch):
+    appels = []
+    verifier_mot = petit_correcteur.verifier_mot
+    monkeypatch.setattr(petit_correcteur, 'verifier_mot', lambda mot: appels.append(mot) or verifier_mot(mot))
+
+    texte = "tsra tsra TSRA ny tsra andro Tsra ny fahasambarna fahasambarna"
+    erreurs = petit_correcteur.corriger_texte(texte)
+
+    assert sorted(appels) == sorted({'tsra', 'ny', 'andro', 'fahasambarna'})
+    assert [e['mot_original'] for e in erreurs] == \
+        ['tsra', 'tsra', 'TSRA', 'tsra', 'Tsra', 'fahasambarna', 'fahasambarna']
+    assert len({tuple(e['suggestions']) for e in erreurs if e['mot_original'].lower() == 'tsra'}) == 1
+    assert petit_correcteur.corriger_texte("") == []
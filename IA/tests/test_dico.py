@@ -0,0 +1,90 @@
+"""Recherches du dictionnaire : index du lexique contre parcours de toutes les entrées"""
+
+import json
+import random
+import re
+
+import pytest
+
+from dico import DictionnaireMalagasy
+
+MOTS_DEFINITION = ['riz', 'rizière', 'eau', 'maison', 'personne', 'bon', 'bonheur',
+                   'mauvais', 'grand', 'petit', "l'enfant", 'mère', 'ancêtre', 'terre']
+TYPES = ['nom', 'verbe', 'adjectif', 'nom propre']
+SENTIMENTS = ['positif', 'negatif', 'neutre']
+
+
+def rechercher_definition_parcours(dictionnaire, terme):
+    """Référence : recherche du terme dans chaque définition (version sans index)"""
+    terme_lower = terme.lower()
+    return [mot for mot, info in dictionnaire.dictionnaire.items()
+            if any(terme_lower in d.lower() for d in info.get('definitions', []))]
+
+
+@pytest.fixture(scope='module')
+def dictionnaire(tmp_path_factory):
+    aleatoire = random.Random(6)
+    entrees = {}
+    for i in range(1500):
+        definitions = [' '.join(aleatoire.choice(MOTS_DEFINITION) for _ in range(aleatoire.randint(1, 5))).capitalize()
+                       for _ in range(aleatoire.randint(0, 2))]
+        entrees[f'mot{i}'] = {
+            'definitions': definitions,
+            'type': aleatoire.choice(TYPES),
+            'Lemmatisation': f'racine{i % 40}',
+            'sentiment': aleatoire.choice(SENTIMENTS),
+        }
+    chemin = tmp_path_factory.mktemp('dico') / 'dico.json'
+    chemin.write_text(json.dumps(entrees, ensure_ascii=False), encoding='utf-8')
+    return DictionnaireMalagasy(str(chemin))
+
+
+def termes_de_recherche(aleatoire, dictionnaire, nombre):
+    """Extraits de définitions (mots entiers, morceaux de mots, à cheval sur deux mots)"""
+    definitions = [d for info in dictionnaire.dictionnaire.values() for d in info['definitions']]
+    termes = ['riz', 'RIZ', 'rizière', 'ière', 'on', 'bon h', "l'", "'enfant", 'x', '', ' ', '.']
+    for _ in range(nombre):
+        definition = aleatoire.choice(definitions)
+        debut = aleatoire.randrange(len(definition))
+        termes.append(definition[debut:debut + aleatoire.randint(1, 12)])
+    return termes
+
+
+def test_recherche_par_sous_chaine(dictionnaire):
+    resultats = dictionnaire.rechercher_definition('riz')
+    assert resultats == rechercher_definition_parcours(dictionnaire, 'riz')
+
+    # 'riz' trouve aussi les définitions qui ne contiennent que 'rizière'
+    seulement_riziere = [m for m in dictionnaire.rechercher_definition('rizière')
+                         if not re.search(r'\briz\b', ' '.join(dictionnaire.obtenir_definitions(m)).lower())]
+    assert seulement_riziere
+    assert set(seulement_riziere) <= set(resultats)
+
+
+def test_recherche_definition_identique_au_parcours(dictionnaire):
+    for terme in termes_de_recherche(random.Random(7), dictionnaire, 300):
+        assert dictionnaire.rechercher_definition(terme) == rechercher_definition_parcours(dictionnaire, terme)
+
+
+def test_recherches_par_attribut_identiques_au_parcours(dictionnaire):
+    entrees = dictionnaire.dictionnaire.items()
+    for type_gram in TYPES + ['inconnu']:
+        assert dictionnaire.rechercher_par_type(type_gram) == \
+            [m for m, info in entrees if info.get('type') == type_gram]
+    for sentiment in SENTIMENTS:
+        assert dictionnaire.rechercher_par_sentiment(sentiment) == \
+            [m for m, info in entrees if info.get('sentiment') == sentiment]
+    for lemme in ('racine3', 'RACINE3', 'absent'):
+        assert dictionnaire.rechercher_par_lemme(lemme) == \
+            [m for m, info in entrees if info.get('Lemmatisation') == lemme.lower()]
+
+
+def test_mot_ajoute_trouve_par_les_index(dictionnaire):
+    dictionnaire.rechercher_definition('riz')
+    dictionnaire.ajouter_mot('tanimbary', ['Rizière en terrasse'], 'nom', [], 'tany', [], 'positif')
+
+    assert 'tanimbary' in dictionnaire.rechercher_definition('terrass')
+    assert 'tanimbary' in dictionnaire.rechercher_definition('riz')
+    assert 'tanimbary' in dictionnaire.rechercher_par_lemme('tany')
+    assert dictionnaire.rechercher_par_type('nom')[-1] == 'tanimbary'
+    assert dictionnaire.rechercher_par_sentiment('positif')[-1] == 'tanimbary'
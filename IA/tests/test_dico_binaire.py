@@ -0,0 +1,104 @@
+"""Dictionnaire binaire : aller-retour depuis le JSON et choix de la source par le lexique"""
+
+import json
+import os
+
+import pytest
+
+import dico_binaire
+from dico_binaire import CHAMPS_LISTE, CHAMPS_TEXTE, DictionnaireBinaire, compiler
+from lexique import Lexique, _choisir_source
+
+
+def attendu(info):
+    """Champs du format standard, seuls conservés par le binaire"""
+    return {nom: valeur for nom, valeur in info.items() if nom in CHAMPS_TEXTE + CHAMPS_LISTE}
+
+
+@pytest.fixture(scope='module')
+def binaire(tmp_path_factory):
+    chemin = str(tmp_path_factory.mktemp('bin') / 'dictionary.bin')
+    compiler('dictionary.json', chemin)
+    dictionnaire = DictionnaireBinaire(chemin)
+    yield dictionnaire
+    dictionnaire.fermer()
+
+
+def test_aller_retour_dictionary_json(binaire):
+    with open('dictionary.json', 'r', encoding='utf-8') as f:
+        source = {mot.lower(): info for mot, info in json.load(f).items()}
+
+    assert len(binaire) == len(source)
+    assert sorted(binaire) == sorted(source)
+    for mot, info in source.items():
+        assert binaire[mot] == attendu(info)
+        assert binaire.obtenir_info(mot.upper()) == attendu(info)
+        assert binaire.mot_existe(mot.capitalize())
+    assert [(m, t, s) for m, t, s in binaire.attributs()] == \
+        [(m, source[m].get('type'), source[m].get('sentiment')) for m in binaire]
+    assert 'tsy-ao-anaty-dikisionera' not in binaire
+    assert binaire.obtenir_info('tsy-ao-anaty-dikisionera') is None
+
+
+def test_lexique_binaire_identique_au_json(binaire):
+    json_, bin_ = Lexique('dictionary.json'), Lexique(binaire.chemin)
+    assert bin_.mots == json_.mots
+    assert {k: list(v) for k, v in bin_.index_type.items()} == \
+        {k: sorted(v) for k, v in json_.index_type.items()}
+    assert {k: list(v) for k, v in bin_.index_sentiment.items()} == \
+        {k: sorted(v) for k, v in json_.index_sentiment.items()}
+    for mot in json_.mots:
+        assert bin_.obtenir_info(mot) == attendu(json_.obtenir_info(mot))
+
+
+def test_cles_fusionnees_comme_le_json(tmp_path):
+    source = tmp_path / 'doublons.json'
+    source.write_text(json.dumps({'Tana': {'type': 'nom propre'}, 'tsara': {'sentiment': 'positif'},
+                                  'tana': {'type': 'nom', 'synonymes': ['Antananarivo']}}),
+                      encoding='utf-8')
+    chemin = str(tmp_path / 'doublons.bin')
+    assert compiler(str(source), chemin) == 2
+
+    dictionnaire = DictionnaireBinaire(chemin)
+    assert list(dictionnaire) == ['tana', 'tsara']
+    assert dictionnaire['tana'] == Lexique(str(source)).obtenir_info('tana')
+    dictionnaire.fermer()
+
+
+def test_compilation_interrompue(tmp_path, monkeypatch):
+    chemin = tmp_path / 'dictionary.bin'
+    compiler('dictionary.json', str(chemin))
+    contenu = chemin.read_bytes()
+
+    def echec(*args):
+        raise OSError("disque plein")
+
+    monkeypatch.setattr(dico_binaire.os, 'replace', echec)
+    with pytest.raises(OSError):
+        compiler('dictionary.json', str(chemin))
+    # L'ancien fichier reste intact, le fichier temporaire est supprimé
+    assert os.listdir(tmp_path) == ['dictionary.bin']
+    assert chemin.read_bytes() == contenu
+
+
+def test_source_choisie_selon_les_dates(tmp_path):
+    source = tmp_path / 'dico.json'
+    source.write_text(json.dumps({'tsara': {'sentiment': 'positif'}}), encoding='utf-8')
+    json_, bin_ = str(source), str(tmp_path / 'dico.bin')
+    assert _choisir_source(json_) == json_             # pas encore compilé
+
+    compiler(json_, bin_)
+    os.utime(bin_, (0, os.path.getmtime(json_) + 1))
+    assert _choisir_source(json_) == bin_              # binaire à jour
+    assert Lexique(_choisir_source(json_)).obtenir_info('tsara') == {'sentiment': 'positif'}
+
+    os.utime(json_, (0, os.path.getmtime(bin_) + 1))   # JSON modifié depuis
+    assert _choisir_source(json_) == json_
+    assert _choisir_source(bin_) == bin_
+
+
+def test_format_invalide(tmp_path):
+    chemin = tmp_path / 'faux.bin'
+    chemin.write_bytes(b'JSON' + bytes(32))
+    with pytest.raises(ValueError):
+        DictionnaireBinaire(str(chemin))
@@ -0,0 +1,124 @@
+"""Entités nommées : automate d'Aho-Corasick contre une recherche naïve"""
+
+import random
+
+import pytest
+
+from entites import IndexEntites, _sans_chevauchement, classer_nom_propre, regrouper
+from lexique import obtenir_lexique
+from tokeniseur import iterer_segments, iterer_tokens, tokeniser_phrases
+
+# Noms de l'index de test : (nom, catégorie, nom canonique)
+NOMS = (
+    ("Antananarivo", 'villes', None),
+    ("Antananarivo Renivohitra", 'villes', None),
+    ("Renivohitra Atsimo", 'lieux', None),
+    ("Tana", 'villes', "Antananarivo"),
+    ("Rakoto", 'personnes', None),
+    ("Andriamatoa Rakoto Be", 'personnes', None),
+    ("Nosy Be", 'lieux', None),
+    ("Ambohitr'Imerina", 'lieux', None),
+)
+
+
+@pytest.fixture(scope='module')
+def index():
+    index = IndexEntites()
+    for nom, categorie, canonique in NOMS:
+        index.ajouter(nom, categorie, canonique)
+    return index
+
+
+def reperer_naif(index, texte):
+    """Référence : à chaque mot, tous les noms possibles y sont cherchés un par un"""
+    longueur_max = max(map(len, index.noms), default=0)
+    candidats = []
+    for debut, fin in iterer_segments(texte):
+        tokens = list(iterer_tokens(texte, debut, fin))
+        mots = [mot for _, _, mot in tokens]
+        for i in range(len(tokens)):
+            for longueur in range(1, min(longueur_max, len(tokens) - i) + 1):
+                entite = index.noms.get(tuple(mots[i:i + longueur]))
+                if entite is not None and texte[tokens[i][0]].isupper():
+                    candidats.append((tokens[i][0], tokens[i + longueur - 1][1], entite))
+    return [
+        {'debut': d, 'fin': f, 'texte': texte[d:f], 'entite': entite[0], 'categorie': entite[1]}
+        for d, f, entite in _sans_chevauchement(candidats)
+    ]
+
+
+# (texte, mentions attendues : (texte, nom canonique))
+@pytest.mark.parametrize('texte, attendu', [
+    ("Monina any Antananarivo aho", [("Antananarivo", "Antananarivo")]),
+    ("Any Antananarivo  Renivohitra izy", [("Antananarivo  Renivohitra", "Antananarivo Renivohitra")]),
+    ("Antananarivo Renivohitra Atsimo", [("Antananarivo Renivohitra", "Antananarivo Renivohitra")]),  # le plus à gauche
+    ("Renivohitra Atsimo", [("Renivohitra Atsimo", "Renivohitra Atsimo")]),
+    ("antananarivo sy tana", []),                                        # pas de majuscule
+    ("Mankany Tana", [("Tana", "Antananarivo")]),                       # synonyme
+    ("Antananarivo. Renivohitra", [("Antananarivo", "Antananarivo")]),  # fin de phrase
+    ("Antananarivo\nRenivohitra Atsimo", [("Antananarivo", "Antananarivo"),
+                                          ("Renivohitra Atsimo", "Renivohitra Atsimo")]),
+    ("Andriamatoa Rakoto sy Andriamatoa Rakoto Be", [("Rakoto", "Rakoto"),          # repli
+                                                     ("Andriamatoa Rakoto Be", "Andriamatoa Rakoto Be")]),
+    ("an'i Rakoto", [("Rakoto", "Rakoto")]),
+    ("Any Nosy Be sy Nosy", [("Nosy Be", "Nosy Be")]),
+    ("Any Ambohitr’Imerina", [("Ambohitr’Imerina", "Ambohitr'Imerina")]),  # apostrophe typographique
+    ("Rakotobe sy ARakoto", []),                                         # mots entiers seulement
+])
+def test_exemples(index, texte, attendu):
+    mentions = index.reperer(texte)
+    assert [(m['texte'], m['entite']) for m in mentions] == attendu
+    assert all(texte[m['debut']:m['fin']] == m['texte'] for m in mentions)
+
+
+def test_identique_a_la_recherche_naive(index):
+    """Tokens comme tokeniser_phrases et mentions comme la recherche naïve, sur des textes au hasard"""
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        mots = f.read(100_000).split()
+    morceaux = [nom for nom, _, _ in NOMS] + [nom.lower() for nom, _, _ in NOMS] \
+        + ['Antananarivo', 'Renivohitra', 'Rakoto', 'Andriamatoa', 'Nosy', 'Be', '.', '\n', ',']
+    hasard = random.Random(0)
+    for _ in range(2000):
+        texte = ' '.join(hasard.choice(morceaux) if hasard.random() < 0.4 else hasard.choice(mots)
+                         for _ in range(hasard.randint(1, 30)))
+        assert index.tokeniser_et_reperer(texte) == (*tokeniser_phrases(texte), reperer_naif(index, texte))
+
+
+def test_reperer_une_partie_du_texte(index):
+    texte = "Rakoto sy Tana. Any Nosy Be"
+    debut = texte.index('Tana')
+    mentions = index.reperer(texte, debut, len(texte) - 3)
+    assert [(m['debut'], m['texte']) for m in mentions] == [(debut, 'Tana')]
+
+
+def test_ajout_apres_compilation():
+    index = IndexEntites()
+    index.ajouter("Toamasina", 'villes')
+    assert [m['texte'] for m in index.reperer("Any Toamasina sy Mahajanga")] == ['Toamasina']
+    # L'automate est recompilé à la recherche suivante
+    index.ajouter("Mahajanga", 'villes')
+    index.ajouter("Rainilaiarivony", 'inconnue')
+    mentions = index.reperer("Any Toamasina sy Mahajanga, hoy Rainilaiarivony")
+    assert [(m['texte'], m['categorie']) for m in mentions] == [
+        ('Toamasina', 'villes'), ('Mahajanga', 'villes'), ('Rainilaiarivony', 'autres')]
+
+
+def test_noms_du_dictionnaire():
+    lexique = obtenir_lexique()
+    index = IndexEntites(lexique)
+    noms_propres = {mot: info for mot, info in lexique.dictionnaire.items() if info.get('type') == 'nom propre'}
+    assert noms_propres and len(index) >= len(noms_propres)
+    for mot, info in noms_propres.items():
+        nom = info.get('Lemmatisation') if (info.get('Lemmatisation') or '').lower() == mot else mot.title()
+        mentions = index.reperer(f"Tonga tany {nom} izahay")
+        assert [(m['texte'], m['entite'], m['categorie']) for m in mentions] == \
+               [(nom, nom, classer_nom_propre(info))]
+
+
+def test_charger(tmp_path):
+    chemin = tmp_path / 'noms.tsv'
+    chemin.write_text("Fianarantsoa\tvilles\nRatsimandrava\n\n", encoding='utf-8')
+    index = IndexEntites()
+    assert index.charger(str(chemin)) == 2
+    assert regrouper(index.reperer("Ratsimandrava tany Fianarantsoa")) == {
+        'villes': ['Fianarantsoa'], 'personnes': [], 'lieux': [], 'autres': ['Ratsimandrava']}
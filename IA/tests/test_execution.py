@@ -0,0 +1,80 @@
+"""Couche d'exécution : pools de threads et de processus sous charge concurrente"""
+
+import asyncio
+import json
+
+import pytest
+
+from corrector import corrector
+from execution import ExecuteurNLP
+from nlp_malagasy import nlp
+
+TEXTES = [
+    "Tsara ny andro. Faly aho!",
+    "Tamin'ny voalohany Andriamanitra nahary ny lanitra sy ny tany.",
+    "Tsy misy fahafahana eto. Tena ratsy loatra ny toetr'andro",
+]
+
+
+@pytest.fixture(scope='module')
+def executeur():
+    # Seuil bas : les textes de plus de 40 caractères partent dans le processus de travail
+    executeur = ExecuteurNLP(threads=2, processus=1, seuil_processus=40)
+    yield executeur
+    executeur.arreter()
+
+
+def test_appels_concurrents_identiques_aux_appels_directs(executeur):
+    async def charge():
+        appels = []
+        for _ in range(10):
+            for texte in TEXTES:
+                appels.append(executeur.executer_json('nlp', 'analyser_texte_complet', texte,
+                                                      taille=len(texte)))
+                appels.append(executeur.executer('nlp', 'predire_mot_suivant', texte, 3))
+                appels.append(executeur.executer('correcteur', 'corriger_texte', texte,
+                                                 taille=len(texte)))
+        return await asyncio.gather(*appels)
+
+    resultats = asyncio.run(charge())
+    attendus = []
+    for _ in range(10):
+        for texte in TEXTES:
+            attendus.append(json.loads(json.dumps(nlp.analyser_texte_complet(texte), ensure_ascii=False)))
+            attendus.append(nlp.predire_mot_suivant(texte, 3))
+            attendus.append(corrector.corriger_texte(texte))
+
+    for resultat, attendu in zip(resultats, attendus):
+        if isinstance(resultat, str):
+            resultat = json.loads(resultat)
+        assert resultat == attendu
+
+
+def test_lot_reparti_sur_les_processus(executeur):
+    textes = TEXTES * 5
+    taille = sum(map(len, textes))
+    resultat = asyncio.run(executeur.executer_lot_json('nlp', 'analyser_lot', textes, taille=taille))
+    assert json.loads(resultat) == json.loads(json.dumps(nlp.analyser_lot(textes), ensure_ascii=False))
+
+
+def test_statistiques_des_caches_tous_processus(executeur):
+    mot = 'tsaraaa'
+    texte = f"{mot} {mot} ary {mot} indray, ho an'ny rehetra"
+    assert len(texte) >= executeur.seuil_processus
+
+    async def verifier():
+        # Deux fois dans le processus de travail : un échec puis un succès de son cache
+        await executeur.executer('correcteur', 'verifier_mot', texte, taille=len(texte))
+        await executeur.executer('correcteur', 'verifier_mot', texte, taille=len(texte))
+
+    asyncio.run(verifier())
+    assert executeur.statistiques_processus
+
+    local = corrector.cache_suggestions.statistiques()
+    distants = [s['cache_correcteur'] for s in executeur.statistiques_processus.values()]
+    total = executeur.statistiques()['cache_correcteur']
+
+    assert total['processus'] == 1 + len(distants)
+    assert total['succes'] == local['succes'] + sum(s['succes'] for s in distants)
+    assert total['echecs'] == local['echecs'] + sum(s['echecs'] for s in distants)
+    assert sum(s['succes'] for s in distants) >= 1
@@ -0,0 +1,115 @@
+"""Lemmatiseur : racines comparées au champ 'Lemmatisation' du dictionnaire"""
+
+import pytest
+
+from lemmatiseur import LemmatiseurMalagasy, sans_redoublement
+from lexique import obtenir_lexique
+
+
+@pytest.fixture(scope='module')
+def lexique():
+    return obtenir_lexique()
+
+
+@pytest.fixture
+def lemmatiseur(lexique):
+    return LemmatiseurMalagasy(lexique)
+
+
+def references(lexique):
+    """Mot -> lemme attendu, pour les mots dont la Lemmatisation diffère du mot"""
+    return {mot: lemme for lemme, mots in lexique.index_lemme.items() for mot in mots
+            if lemme and lemme != mot}
+
+
+def analyser_comme_inconnu(lemmatiseur, mot, oublier_lemme=False):
+    """Analyse du mot comme s'il était absent du dictionnaire (et son lemme aussi)"""
+    lemme = lemmatiseur.racines.pop(mot)
+    if oublier_lemme:
+        lemmatiseur.racines.pop(lemme, None)
+    return lemmatiseur.analyser(mot)
+
+
+def test_mots_du_dictionnaire(lexique, lemmatiseur):
+    for lemme, mots in lexique.index_lemme.items():
+        for mot in mots:
+            assert lemmatiseur.lemmatiser(mot) == (lemme or mot)
+
+
+def test_exactitude_racines_connues(lexique):
+    attendus = references(lexique)
+    erreurs = []
+    for mot, attendu in attendus.items():
+        obtenu = analyser_comme_inconnu(LemmatiseurMalagasy(lexique), mot)
+        if obtenu != attendu:
+            erreurs.append((mot, attendu, obtenu))
+    # Les erreurs restantes viennent d'entrées irrégulières (faharoa -> aritra)
+    assert len(erreurs) <= 0.15 * len(attendus), erreurs
+
+
+@pytest.mark.parametrize('mot, racine', [
+    ('manosika', 'tosika'),          # mutation nasale t -> n
+    ('mandeha', 'deha'),             # racine conservée après man-
+    ('mihinana', 'hinana'),
+    ('mipetraka', 'petraka'),
+    ('fahatsarana', 'tsara'),        # circonfixe faha-...-ana
+    ('fahavelomana', 'velona'),      # alternance de fin de racine
+    ('fahaterahana', 'teraka'),
+    ('fahaverezana', 'very'),
+    ('fahalalana', 'lala'),
+    ('mampalahelo', 'alahelo'),      # élision de la voyelle initiale
+])
+def test_racines_connues(lexique, lemmatiseur, mot, racine):
+    assert mot in lexique.index_lemme[racine]      # cas tiré du champ Lemmatisation
+    assert analyser_comme_inconnu(lemmatiseur, mot) == racine
+
+
+@pytest.mark.parametrize('mot, racine', [
+    ('mamono', 'vono'),
+    ('mamono', 'pono'),
+    ('mamafa', 'fafa'),
+    ('mangataka', 'hataka'),
+    ('mangataka', 'kataka'),
+    ('manoratra', 'soratra'),
+    ('manoratra', 'oratra'),
+])
+def test_mutation_nasale(lemmatiseur, mot, racine):
+    # La racine connue départage les mutations possibles
+    lemmatiseur.racines[racine] = racine
+    assert lemmatiseur.analyser(mot) == racine
+
+
+@pytest.mark.parametrize('mot, racine', [
+    ('tsaratsara', 'tsara'),
+    ('fotsifotsy', 'fotsy'),
+    ('mandehandeha', 'deha'),
+])
+def test_redoublement(lemmatiseur, mot, racine):
+    assert lemmatiseur.lemmatiser(mot) == racine
+
+
+def test_sans_redoublement():
+    assert sans_redoublement('tsaratsara') == ['tsara']
+    assert sans_redoublement('fotsifotsy') == ['fotsy']
+    # Moitiés trop courtes : pas un redoublement
+    assert sans_redoublement('lalana') == []
+
+
+@pytest.mark.parametrize('mot, attendu', [
+    ('xyzw', 'xyzw'),                # aucun affixe
+    ('mandainga', 'lainga'),         # règles seules : mutation la plus courante
+    ('velomana', 'velona'),
+    ('manosika', 'osika'),           # racine oubliée : l'analyse se trompe sans elle
+])
+def test_mots_inconnus(lexique, mot, attendu):
+    lemmatiseur = LemmatiseurMalagasy(lexique)
+    if mot in lemmatiseur.racines:
+        assert analyser_comme_inconnu(lemmatiseur, mot, oublier_lemme=True) == attendu
+    else:
+        assert lemmatiseur.lemmatiser(mot) == attendu
+
+
+def test_ajout_de_racine_invalide_le_cache(lemmatiseur):
+    assert lemmatiseur.lemmatiser('mangataka') == 'kataka'
+    lemmatiseur._sur_ajout_mot('hataka', {})
+    assert lemmatiseur.lemmatiser('mangataka') == 'hataka'
@@ -0,0 +1,65 @@
+"""Traitement par lots : mêmes résultats que l'analyse document par document"""
+
+import pytest
+
+from nlp_malagasy import nlp, CHAMPS_LOT
+
+CAS_LIMITES = ['', '   ', '...', 'Tsy tsara loatra ilay izy!', 'Tena ratsy. Tsara kosa ny andro.',
+               "Nandeha tany Antananarivo i Rabe sy Rasoa.", 'tsaratsara fahatsarana fahatsarana']
+
+
+@pytest.fixture(scope='module')
+def documents():
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        lignes = [ligne for ligne in f.read(300_000).splitlines() if ligne.strip()]
+    # Les mêmes documents reviennent : la déduplication du lot est sollicitée
+    return CAS_LIMITES + lignes[:600] + lignes[:50]
+
+
+def analyse_par_document(texte):
+    tokens = nlp.tokenize(texte)
+    return {
+        'tokens': tokens,
+        'lemmes': [nlp.lemmatiser(token) for token in tokens],
+        'pos_tags': nlp.pos_tag(tokens),
+        'sentiment': nlp.analyser_sentiment(texte),
+    }
+
+
+@pytest.mark.parametrize('champs', [CHAMPS_LOT, ('tokens', 'lemmes'), ('pos_tags',), ('sentiment',)])
+def test_lot_identique_aux_documents(documents, champs):
+    attendus = [{champ: analyse[champ] for champ in champs}
+                for analyse in map(analyse_par_document, documents)]
+    assert nlp.analyser_lot(documents, champs) == attendus
+
+
+def test_lot_en_processus(documents):
+    assert nlp.analyser_lot(documents, CHAMPS_LOT, processus=2) == nlp.analyser_lot(documents)
+
+
+def test_lot_vide_et_champ_inconnu():
+    assert nlp.analyser_lot([]) == []
+    with pytest.raises(ValueError):
+        nlp.analyser_lot(['tsara'], ['inconnu'])
+
+
+def test_api_lot(client, documents):
+    # Plus de 20 000 caractères : le lot est découpé entre les processus
+    assert sum(map(len, documents)) > 20_000
+
+    reponse = client.post('/api/lot/sentiment', json={'textes': documents})
+    assert reponse.status_code == 200
+    sentiments = [d['sentiment'] for d in reponse.json()['data']]
+    assert reponse.json()['nombre_documents'] == len(documents)
+    for texte, sentiment in zip(documents[:40], sentiments):
+        assert sentiment == client.post('/api/sentiment', json={'texte': texte}).json()['sentiment']
+    assert sentiments == [nlp.analyser_sentiment(texte) for texte in documents]
+
+    pos_tags = [d['pos_tags'] for d in client.post('/api/lot/pos-tag', json={'textes': documents}).json()['data']]
+    for texte, tags in zip(documents[:40], pos_tags):
+        par_document = client.post('/api/pos-tag', json={'texte': texte}).json()['pos_tags']
+        assert [{'mot': mot, 'type': tag} for mot, tag in tags] == par_document
+
+    lemmes = client.post('/api/lot/lemmatiser', json={'textes': documents}).json()['data']
+    assert lemmes == [{'tokens': a['tokens'], 'lemmes': a['lemmes']}
+                      for a in map(analyse_par_document, documents)]
@@ -0,0 +1,276 @@
+"""Modèle n-grams : prédiction, entraînement et persistance"""
+
+import os
+import random
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import ngrams
+from ngrams import CHAMPS_TABLE, ModeleNgrams, iterer_tokens
+from nlp_malagasy import nlp
+from tokeniseur import MOT, normaliser, tokeniser
+
+LISSAGES = ('kneser-ney', 'stupid-backoff')
+
+
+@pytest.fixture(scope='module')
+def modele():
+    return nlp.modele_ngrams
+
+
+@pytest.fixture(scope='module')
+def tokens_corpus():
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        return tokeniser(f.read())
+
+
+def predire_exhaustif(modele, tokens, n, lissage):
+    """Référence : score de tout le vocabulaire, puis tri complet"""
+    candidats = np.arange(len(modele.vocabulaire), dtype=np.int32)
+    scores = modele._scorer(modele._lignes(tokens), candidats, lissage)
+    meilleurs = np.lexsort((candidats, -scores))[:n]
+    return [(modele.vocabulaire[i], float(scores[i])) for i in meilleurs]
+
+
+@pytest.mark.parametrize('lissage', LISSAGES)
+def test_predire_identique_au_tri_complet(modele, tokens_corpus, lissage):
+    aleatoire = random.Random(2)
+    for _ in range(300):
+        i = aleatoire.randrange(len(tokens_corpus))
+        contexte = tokens_corpus[max(0, i - 3):i]
+        for n in (1, 5, 20):
+            assert modele.predire(contexte, n, lissage) == predire_exhaustif(modele, contexte, n, lissage)
+
+
+@pytest.mark.parametrize('contexte', [[], ['mot_absent_du_corpus'], ['ny', 'mot_absent_du_corpus']])
+def test_predire_contexte_inconnu(modele, contexte):
+    predictions = modele.predire(contexte, 5)
+    assert predictions == predire_exhaustif(modele, contexte, 5, modele.lissage)
+    assert len(predictions) == 5
+
+
+def test_predire_sans_resultat(modele):
+    assert modele.predire(['ny'], 0) == []
+
+
+@pytest.fixture(scope='module')
+def petit_modele(tmp_path_factory):
+    chemin = tmp_path_factory.mktemp('corpus') / 'corpus.txt'
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        chemin.write_text(f.read(30_000), encoding='utf-8')
+    modele = ModeleNgrams(3)
+    modele.entrainer(str(chemin))
+    return modele
+
+
+def test_sauvegarder_puis_charger(petit_modele, tmp_path):
+    chemin = str(tmp_path / 'modele.npz')
+    petit_modele.sauvegarder(chemin)
+    charge = ModeleNgrams.charger(chemin, petit_modele.empreinte)
+
+    assert charge is not None
+    assert charge.vocabulaire == petit_modele.vocabulaire
+    for contexte in (['ny'], ['ary', 'hoy'], []):
+        assert charge.predire(contexte, 10) == petit_modele.predire(contexte, 10)
+    assert os.listdir(tmp_path) == ['modele.npz']
+
+
+def test_sauvegardes_simultanees(petit_modele, tmp_path):
+    chemin = str(tmp_path / 'modele.npz')
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: petit_modele.sauvegarder(chemin), range(16)))
+
+    # Aucun fichier temporaire restant, et le dernier renommage est un modèle complet
+    assert os.listdir(tmp_path) == ['modele.npz']
+    assert ModeleNgrams.charger(chemin, petit_modele.empreinte) is not None
+
+
+def test_sauvegarde_echouee_sans_fichier_temporaire(petit_modele, tmp_path):
+    chemin = tmp_path / 'dossier_cible'
+    chemin.mkdir()
+    (chemin / 'occupe').write_text('')
+    # Renommage impossible : la cible est un dossier non vide
+    with pytest.raises(OSError):
+        petit_modele.sauvegarder(str(chemin))
+    assert sorted(os.listdir(tmp_path)) == ['dossier_cible']
+
+
+def test_charger_ou_entrainer_sans_relire_le_corpus(tmp_path, monkeypatch):
+    corpus = tmp_path / 'corpus.txt'
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        corpus.write_text(f.read(20_000), encoding='utf-8')
+    lectures = []
+    empreinte_corpus = ngrams.empreinte_corpus
+    monkeypatch.setattr(ngrams, 'empreinte_corpus', lambda chemin: lectures.append(chemin) or empreinte_corpus(chemin))
+
+    modele = ModeleNgrams.charger_ou_entrainer(str(corpus), 3)
+    assert len(lectures) == 1                         # entraînement
+    charge = ModeleNgrams.charger_ou_entrainer(str(corpus), 3)
+    assert len(lectures) == 1                         # taille et date inchangées : pas de relecture
+    assert charge.vocabulaire == modele.vocabulaire and charge.compteurs is None
+
+    # Date changée, contenu identique : relu une fois, pas ré-entraîné
+    os.utime(corpus, ns=(0, modele.signature[1] + 10**9))
+    charge = ModeleNgrams.charger_ou_entrainer(str(corpus), 3)
+    assert len(lectures) == 2 and charge.compteurs is None
+    assert charge.signature == ngrams.signature_corpus(str(corpus))
+    ModeleNgrams.charger_ou_entrainer(str(corpus), 3)
+    assert len(lectures) == 2
+
+    # Contenu changé, même taille : ré-entraîné
+    corpus.write_text(corpus.read_text(encoding='utf-8').replace('Andriamanitra', 'Andriamanitry'),
+                      encoding='utf-8')
+    os.utime(corpus, ns=(0, modele.signature[1] + 2 * 10**9))
+    reentraine = ModeleNgrams.charger_ou_entrainer(str(corpus), 3)
+    assert 'andriamanitry' in reentraine.vocabulaire and 'andriamanitra' not in reentraine.vocabulaire
+    assert reentraine.empreinte != modele.empreinte
+    assert sorted(os.listdir(tmp_path)) == ['corpus.ngrams.npz', 'corpus.txt']
+
+
+@pytest.mark.parametrize('taille_bloc', [1, 2, 3, 7, 50, 1000, 1 << 20])
+def test_lecture_par_blocs_identique_a_la_lecture_complete(tmp_path, taille_bloc):
+    texte = ("Tamin'ny voalohany Andriamanitra nahary ny lanitra sy ny tany.\n"
+             "Ary ny tany dia tsy nisy endrika, ka foana ; ary aizina no tambonin'ny lalina.\n"
+             "Éfa nàndeha izy — ka hoy Izy: Misy mazava! ") * 3
+    chemin = tmp_path / 'corpus.txt'
+    chemin.write_text(texte, encoding='utf-8')
+
+    tokens = MOT.findall(normaliser(texte))
+    assert [t for bloc in iterer_tokens(str(chemin), taille_bloc) for t in bloc] == tokens
+
+    modele = ModeleNgrams(3)
+    modele.entrainer(str(chemin), taille_bloc=taille_bloc)
+    # Référence : tout le corpus compté d'un coup
+    reference = ModeleNgrams(3)
+    reference._compter([], tokens)
+    reference.comptes_unigrammes.update(tokens)
+    reference.nombre_mots = len(tokens)
+    reference.compacter()
+    assert modele.vocabulaire == reference.vocabulaire
+    for k in (2, 3):
+        for champ in CHAMPS_TABLE:
+            assert np.array_equal(getattr(modele.tables[k], champ), getattr(reference.tables[k], champ))
+
+
+@pytest.fixture(scope='module')
+def corpus_phrases_coupees(tmp_path_factory):
+    """Petit corpus dont les phrases continuent d'une ligne à l'autre"""
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        mots = f.read(40_000).split()
+    aleatoire = random.Random(8)
+    lignes = []
+    i = 0
+    while i < len(mots):
+        n = aleatoire.randint(1, 9)
+        lignes.append(' '.join(mots[i:i + n]))
+        i += n
+    chemin = tmp_path_factory.mktemp('corpus') / 'phrases.txt'
+    chemin.write_text('\n'.join(lignes), encoding='utf-8')
+    return str(chemin)
+
+
+@pytest.mark.parametrize('processus', [2, 3, 5])
+def test_entrainement_parallele_identique(corpus_phrases_coupees, processus):
+    # Les tranches commencent en début de ligne, donc au milieu d'une phrase
+    tranches = ngrams.decouper_corpus(corpus_phrases_coupees, processus)
+    with open(corpus_phrases_coupees, 'rb') as f:
+        texte = f.read()
+    assert len(tranches) == processus
+    assert all(not texte[:debut].rstrip().endswith((b'.', b'!', b'?')) for debut, _ in tranches[1:])
+
+    sequentiel = ModeleNgrams(4)
+    sequentiel.entrainer(corpus_phrases_coupees, taille_bloc=64, processus=1)
+    parallele = ModeleNgrams(4)
+    parallele.entrainer(corpus_phrases_coupees, taille_bloc=64, processus=processus)
+
+    assert parallele.nombre_mots == sequentiel.nombre_mots
+    assert parallele.vocabulaire == sequentiel.vocabulaire
+    assert np.array_equal(parallele.unigrammes, sequentiel.unigrammes)
+    for k in range(2, 5):
+        for champ in CHAMPS_TABLE:
+            assert np.array_equal(getattr(parallele.tables[k], champ), getattr(sequentiel.tables[k], champ))
+
+    tokens = tokeniser(texte.decode('utf-8'))
+    aleatoire = random.Random(processus)
+    for _ in range(200):
+        i = aleatoire.randrange(len(tokens))
+        contexte = tokens[max(0, i - aleatoire.randint(0, 3)):i]
+        for lissage in LISSAGES:
+            assert parallele.predire(contexte, 10, lissage) == sequentiel.predire(contexte, 10, lissage)
+
+
+def compter_sans_compacter(corpus, ordre):
+    """Compteurs d'entraînement (dictionnaires de mots) avant compacter()"""
+    modele = ModeleNgrams(ordre)
+    modele._compter_tranche(corpus, ngrams.TAILLE_BLOC)
+    compteurs = {k: {ctx: dict(c) for ctx, c in compteurs.items()} for k, compteurs in modele.compteurs.items()}
+    return modele, compteurs
+
+
+def ligne_contexte(modele, contexte):
+    """Clé et indice de ligne d'un contexte (tuple de mots) dans sa table"""
+    ids = [modele.ids[mot] for mot in contexte]
+    cle = ids[0]
+    for j in range(2, len(ids) + 1):
+        cle = modele.tables[j].position(cle, ids[j - 1])
+    return cle, modele.tables[len(ids) + 1].ligne(cle)
+
+
+@pytest.mark.parametrize('seuil_elagage', [1, 2])
+def test_tables_identiques_aux_compteurs(corpus_phrases_coupees, seuil_elagage):
+    modele, compteurs = compter_sans_compacter(corpus_phrases_coupees, 4)
+    modele.seuil_elagage = seuil_elagage
+    modele.compacter()
+
+    # Mots distincts qui précèdent chaque (contexte, mot), d'après l'ordre supérieur
+    precedents = defaultdict(set)
+    for k in range(3, modele.ordre + 1):
+        for contexte, successeurs in compteurs[k].items():
+            for mot in successeurs:
+                precedents[contexte[1:], mot].add(contexte[0])
+
+    for k, par_contexte in compteurs.items():
+        table = modele.tables[k]
+        valeurs, _ = modele._valeurs_kneser_ney(k)
+        conservees = 0
+        for contexte, successeurs in par_contexte.items():
+            gardes = {m: n for m, n in successeurs.items() if k < 3 or n >= seuil_elagage}
+            prefixe_garde = k < 4 or all(
+                compteurs[j][contexte[:j - 1]].get(contexte[j - 1], 0) >= seuil_elagage
+                for j in range(3, k))
+            if not gardes or not prefixe_garde:
+                continue
+            cle, i = ligne_contexte(modele, contexte)
+            assert i is not None
+            assert table.totaux[i] == sum(successeurs.values())
+            for mot, n in gardes.items():
+                j = table.position(cle, modele.ids[mot])
+                assert table.comptes[j] == n
+                if k < modele.ordre:
+                    assert valeurs[j] == len(precedents[contexte, mot])
+            conservees += len(gardes)
+        assert len(table) == conservees
+
+
+def test_frequences_apres_le_plus_long_contexte(petit_modele):
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        tokens = tokeniser(f.read(30_000))
+    ngrammes = Counter(tuple(tokens[i:i + k]) for k in range(1, 4) for i in range(len(tokens) - k + 1))
+
+    aleatoire = random.Random(9)
+    for _ in range(100):
+        i = aleatoire.randrange(2, len(tokens))
+        contexte = tokens[i - 2:i]
+        mots = [m for m, _ in petit_modele.predire(contexte, 10)] + aleatoire.sample(petit_modele.vocabulaire, 5)
+        attendu = []
+        for mot in mots:
+            # Le plus long contexte suivi du mot, jusqu'au mot seul
+            for debut in range(len(contexte) + 1):
+                n = ngrammes[(*contexte[debut:], mot)]
+                if n:
+                    attendu.append(n)
+                    break
+        assert petit_modele.frequences(contexte, mots) == attendu
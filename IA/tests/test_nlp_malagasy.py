@@ -0,0 +1,82 @@
+"""Pipeline complet : analyse complète et analyse en flux contre les méthodes de chaque module"""
+
+import json
+
+import pytest
+
+from nlp_malagasy import nlp
+
+TEXTES = [
+    "",
+    "Tsara ny andro. Faly aho!",
+    "Tamin'ny voalohany Andriamanitra nahary ny lanitra sy ny tany.",
+    "Nandeha tany Antananarivo i Rakoto ary tsy tsara ny lalana.",
+    "Tsy misy fahafahana eto. Tena ratsy loatra ny toetr'andro",
+]
+
+
+@pytest.mark.parametrize('texte', TEXTES)
+def test_analyse_complete_identique_aux_modules(texte):
+    resultat = nlp.analyser_texte_complet(texte)
+    tokens = nlp.tokenize(texte)
+
+    assert resultat['tokens'] == tokens
+    assert resultat['lemmes'] == [nlp.lemmatiser(token) for token in tokens]
+    assert resultat['pos_tags'] == nlp.pos_tag(tokens)
+    assert resultat['entites'] == nlp.extraire_entites(texte)
+    assert resultat['sentiment'] == nlp.analyser_sentiment(texte)
+    assert resultat['statistiques']['nombre_mots'] == len(tokens)
+    assert resultat['statistiques']['mots_uniques'] == len(set(tokens))
+
+
+def test_analyse_complete_corpus():
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        corpus = f.read(50_000)
+    for debut in range(0, len(corpus), 5000):
+        texte = corpus[debut:debut + 5000]
+        resultat = nlp.analyser_texte_complet(texte)
+        assert resultat['lemmes'] == [nlp.lemmatiser(t) for t in resultat['tokens']]
+        assert resultat['sentiment'] == nlp.analyser_sentiment(texte)
+
+
+def verifier_flux(texte, lignes):
+    """Lignes du flux (déjà passées par JSON ou non) contre analyser_texte_complet"""
+    *segments, final = lignes
+    complet = json.loads(json.dumps(nlp.analyser_texte_complet(texte)))
+
+    for champ in ('tokens', 'lemmes', 'pos_tags'):
+        assert [valeur for segment in segments for valeur in segment[champ]] == complet[champ]
+    assert final == {champ: complet[champ] for champ in ('entites', 'sentiment', 'statistiques')}
+
+    # Chaque segment est analysé comme le texte entre ses positions
+    fin_precedente = 0
+    for segment in segments:
+        assert fin_precedente <= segment['debut'] < segment['fin'] <= len(texte)
+        fin_precedente = segment['fin']
+        attendu = json.loads(json.dumps(nlp.analyser_texte_complet(texte[segment['debut']:segment['fin']])))
+        del attendu['statistiques']
+        assert {k: v for k, v in segment.items() if k not in ('debut', 'fin')} == attendu
+
+
+@pytest.mark.parametrize('texte', TEXTES + ["\n\n. !", "Tsara.\n\nRatsy!!! Tsy tsara loatra... Ary"])
+def test_analyse_flux_identique_a_l_analyse_complete(texte):
+    verifier_flux(texte, json.loads(json.dumps(list(nlp.analyser_texte_flux(texte)))))
+
+
+def test_analyse_flux_corpus():
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        texte = f.read(100_000)
+    verifier_flux(texte, json.loads(json.dumps(list(nlp.analyser_texte_flux(texte)))))
+
+
+def test_api_analyse_flux(client):
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        texte = f.read(100_000)
+    reponse = client.post('/api/analyser-texte/flux', json={'texte': texte})
+    assert reponse.status_code == 200
+    assert reponse.headers['content-type'].startswith('application/x-ndjson')
+    lignes = [json.loads(ligne) for ligne in reponse.text.splitlines()]
+    verifier_flux(texte, lignes)
+
+    complet = client.post('/api/analyser-texte', json={'texte': texte}).json()['data']
+    assert lignes[-1] == {champ: complet[champ] for champ in ('entites', 'sentiment', 'statistiques')}
@@ -0,0 +1,111 @@
+"""Moteur de sentiment : négation, intensificateurs et calcul par lot"""
+
+import numpy as np
+import pytest
+
+from lexique import obtenir_lexique
+from sentiment_analyzer import FENETRE_NEGATION, MoteurSentiment
+from tokeniseur import tokeniser_phrases
+
+
+@pytest.fixture(scope='module')
+def moteur():
+    return MoteurSentiment(obtenir_lexique())
+
+
+def polarite(moteur, texte):
+    return moteur.analyser(*tokeniser_phrases(texte))['polarite']
+
+
+# (texte, texte de référence, relation attendue entre leurs polarités).
+# Les mots viennent de dictionary.json ; la phrase "Soa." donne une masse de
+# référence, la polarité seule étant une proportion.
+@pytest.mark.parametrize('texte, reference, relation', [
+    ("tsy tsara", "", '<'),                                     # négation
+    ("tsy tsara. Soa.", "ratsy. Soa.", '>'),                    # ... atténuée
+    ("tsy misy fahafahana", "fahafahana", '<'),                 # "tsy misy"
+    ("tsy misy fahoriana", "", '>'),
+    ("tsara tokoa sy ratsy", "tsara sy ratsy", '>'),            # intensificateurs
+    ("tena ratsy sy tsara", "ratsy sy tsara", '<'),
+    ("tsy tsara loatra. Soa.", "tsy tsara. Soa.", '>'),         # pas très bon : moins négatif
+    ("tsy tsara. ratsy", "tsy tsara ratsy", '<'),               # la négation s'arrête à la phrase
+    ("tsy mandeha any an-tsena ka tsara", "mandeha any an-tsena ka tsara", '='),  # hors fenêtre
+])
+def test_negation_et_intensificateurs(moteur, texte, reference, relation):
+    obtenu, attendu = polarite(moteur, texte), polarite(moteur, reference)
+    assert {'<': obtenu < attendu, '>': obtenu > attendu, '=': obtenu == attendu}[relation]
+
+
+def test_mots_classes_selon_leur_polarite_effective(moteur):
+    resultat = moteur.analyser(*tokeniser_phrases("tsy tsara ny andro. Ratsy ihany."))
+    assert resultat['mots']['negatif'] == ['tsara', 'ratsy']
+    assert resultat['mots']['positif'] == []
+    assert resultat['sentiment_dominant'] == 'negatif'
+
+
+def test_fenetre_de_negation(moteur):
+    # Le mot juste au bord de la fenêtre est inversé, le suivant ne l'est plus
+    bouche_trous = ' '.join(['any'] * (FENETRE_NEGATION - 1))
+    assert polarite(moteur, f"tsy {bouche_trous} tsara") < 0
+    assert polarite(moteur, f"tsy {bouche_trous} any tsara") > 0
+
+
+def test_texte_vide(moteur):
+    resultat = moteur.analyser(*tokeniser_phrases(""))
+    assert resultat['polarite'] == 0
+    assert resultat['mots'] == {'positif': [], 'negatif': [], 'neutre': []}
+
+
+@pytest.fixture(scope='module')
+def documents():
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        lignes = [ligne for ligne in f.read(300_000).splitlines() if ligne.strip()]
+    # La négation de fin d'un document ne doit pas toucher le suivant
+    textes = ['', 'tsy', 'tsara', 'tena', 'ratsy loatra', 'tsy misy', 'fahafahana tokoa',
+              'tsy tsara. Soa.'] + lignes[:800]
+    return [tokeniser_phrases(texte) for texte in textes]
+
+
+def test_analyser_lot_identique_aux_documents(moteur, documents):
+    assert moteur.analyser_lot(documents) == [moteur.analyser(*document) for document in documents]
+    assert moteur.analyser_lot([]) == []
+
+
+def test_evaluer_lot_identique_aux_documents(moteur, documents):
+    masses, mots = moteur.evaluer_lot(documents)
+    assert masses.shape == (len(documents), 3)
+    for document, masses_lot, mots_lot in zip(documents, masses, mots):
+        masses_seul, mots_seul = moteur.evaluer_lot([document])
+        np.testing.assert_array_equal(masses_lot, masses_seul[0])
+        assert mots_lot == mots_seul[0]
+
+
+class FauxLexique:
+    def __init__(self, dictionnaire):
+        self.dictionnaire = dictionnaire
+        self.abonnes = []
+
+    def abonner(self, rappel):
+        self.abonnes.append(rappel)
+
+
+def test_mots_ajoutes_apres_la_construction(moteur, documents):
+    """Moteur construit mot par mot (tableaux agrandis par doublement) : même calcul qu'en une passe"""
+    dictionnaire = obtenir_lexique().dictionnaire
+    mots = list(dictionnaire)
+    lexique = FauxLexique({mot: dictionnaire[mot] for mot in mots[:3]})
+    incremental = MoteurSentiment(lexique)
+    for mot in mots[3:]:
+        lexique.abonnes[0](mot, dictionnaire[mot])
+    assert incremental.taille == moteur.taille and len(incremental.polarites) >= incremental.taille
+
+    for mot, identifiant in moteur.identifiants.items():
+        autre = incremental.identifiants[mot]
+        for nom in MoteurSentiment._COLONNES:
+            assert getattr(incremental, nom)[autre] == getattr(moteur, nom)[identifiant]
+    assert incremental.analyser_lot(documents) == moteur.analyser_lot(documents)
+
+    # Un mot déjà connu garde son identifiant, avec ses nouveaux poids
+    identifiant = incremental.identifiants['tsara']
+    incremental._ajouter('tsara', {'sentiment': 'negatif'})
+    assert incremental.identifiants['tsara'] == identifiant and incremental.polarites[identifiant] == -1.0
@@ -0,0 +1,109 @@
+"""Tokeniseur partagé : mots, formes normalisées, segments, et anciens découpages"""
+
+import random
+import re
+import unicodedata
+
+import pytest
+
+from tokeniseur import (MOT, MOT_OU_FIN, SEGMENT, SEPARATEUR, iterer_segments, iterer_tokens,
+                        normaliser, tokeniser, tokeniser_phrases)
+
+# Découpages remplacés par le tokeniseur partagé
+ANCIEN_NLP = re.compile(r"\b[\w']+\b")   # NLPMalagasy.tokenize et n-grams
+ANCIEN_MOT = re.compile(r'\b\w+\b')      # correcteur et sentiment
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    with open('cleaned_bible.txt', 'r', encoding='utf-8') as f:
+        return f.read(300_000)
+
+
+@pytest.mark.parametrize('texte, attendus', [
+    ("Amin'ny maraina", ["amin'ny", 'maraina']),
+    ("zanak’i Davida sy an‘i Jehovah", ["zanak'i", 'davida', 'sy', "an'i", 'jehovah']),
+    ("tonga tamʼizao", ['tonga', "tam'izao"]),
+    ("l'' ary 'ny teny'", ['l', 'ary', 'ny', 'teny']),
+    ("ankizy-vaovao - tsara", ['ankizy', 'vaovao', 'tsara']),
+    ("Tôkana TSARA 12 fo_fo", ['tôkana', 'tsara', '12', 'fo_fo']),
+    ("  .!? \n", []),
+])
+def test_mots(texte, attendus):
+    assert tokeniser(texte) == attendus
+    assert [forme for _, _, forme in iterer_tokens(texte)] == attendus
+
+
+def test_accents_combinants_forme_nfc():
+    compose = "Fanantenàna amin'ny Ankizy tôkana"
+    decompose = unicodedata.normalize('NFD', compose)
+    assert decompose != compose
+    assert tokeniser(decompose) == tokeniser(compose) == ['fanantenàna', "amin'ny", 'ankizy', 'tôkana']
+    # Positions dans le texte d'origine, en forme NFD
+    for debut, fin, forme in iterer_tokens(decompose):
+        assert unicodedata.normalize('NFC', decompose[debut:fin]).lower() == forme
+    assert SEPARATEUR.match(decompose, decompose.index('\u0300')) is None
+
+
+def test_normaliser():
+    assert normaliser("Amin’NY") == "amin'ny"
+    assert normaliser(unicodedata.normalize('NFD', 'Tôkana')) == 'tôkana'
+    mot = 'tsara'
+    assert normaliser(mot) is mot
+
+
+def test_iterer_tokens_positions(corpus):
+    tokens = list(iterer_tokens(corpus))
+    assert [forme for _, _, forme in tokens] == tokeniser(corpus)
+    for debut, fin, forme in tokens[:5000]:
+        assert normaliser(corpus[debut:fin]) == forme
+    # Une tranche ne rend que les mots entièrement compris dedans
+    debut, fin = tokens[10][0], tokens[20][1]
+    assert list(iterer_tokens(corpus, debut, fin)) == tokens[10:21]
+
+
+def test_identique_aux_anciens_decoupages(corpus):
+    """Mêmes tokens que l'ancien tokeniseur, une fois les apostrophes typographiques redressées"""
+    texte = normaliser(corpus)
+    assert tokeniser(corpus) == ANCIEN_NLP.findall(texte)
+    # Le correcteur et le sentiment coupaient les contractions en deux mots
+    assert [partie for mot in tokeniser(corpus) for partie in mot.split("'")] == ANCIEN_MOT.findall(texte)
+
+
+def texte_aleatoire(hasard, longueur):
+    morceaux = ['ny', 'Tsara', 'amin', "'", '’', '-', ' ', ' ', '.', '!', '?', '\n', '...', 'ô', 'à', '12']
+    return ''.join(hasard.choice(morceaux) for _ in range(longueur))
+
+
+@pytest.mark.parametrize('graine', range(20))
+def test_segments(graine):
+    texte = texte_aleatoire(random.Random(graine), 200)
+    segments = list(iterer_segments(texte))
+    # Segments contigus, qui redonnent le texte
+    assert ''.join(texte[debut:fin] for debut, fin in segments) == texte
+    assert all(fin > debut for debut, fin in segments)
+    assert [texte[d:f] for d, f in segments] == [m.group() for m in SEGMENT.finditer(texte) if m.group()]
+
+    # Aucun mot ne traverse une fin de segment
+    fins = {fin for _, fin in segments}
+    for match in MOT.finditer(texte):
+        assert not any(match.start() < fin < match.end() for fin in fins)
+
+    # tokeniser_phrases : même découpage, en une seule recherche
+    tokens, phrases = tokeniser_phrases(texte)
+    attendus, premiers = [], []
+    for debut, fin in segments:
+        mots = tokeniser(texte[debut:fin])
+        if mots:
+            premiers.append(len(attendus))
+        attendus.extend(mots)
+    assert (tokens, phrases) == (attendus, premiers)
+    assert [m.group(1) for m in MOT_OU_FIN.finditer(texte) if m.group(1)] == MOT.findall(texte)
+
+
+def test_fins_de_segment():
+    texte = "Tsara ve? Eny! Mandeha izy...  Avy\nIzao.\n\nFarany"
+    segments = [texte[debut:fin] for debut, fin in iterer_segments(texte)]
+    assert segments == ['Tsara ve? ', 'Eny! ', 'Mandeha izy...  ', 'Avy\n', 'Izao.\n', '\n', 'Farany']
+    assert tokeniser_phrases(texte) == (['tsara', 've', 'eny', 'mandeha', 'izy', 'avy', 'izao', 'farany'],
+                                        [0, 2, 3, 5, 6, 7])
@@ -0,0 +1,98 @@
+"""
+Découpage en mots partagé par tous les modules NLP
+
+Un mot est une suite de lettres ou de chiffres ; une apostrophe entre deux
+lettres le prolonge, de sorte que les contractions malagasy (amin'ny,
+an'i, zanak'i) restent un seul token partout : analyse, correction,
+sentiment et n-grams. La forme normalisée d'un token est en minuscules, en
+forme NFC (un accent saisi comme caractère combinant fait partie du mot),
+et ses apostrophes typographiques (’ ‘ ʼ) sont remplacées par l'apostrophe
+droite.
+
+Le texte se découpe aussi en segments (phrases ou lignes) qu'aucun mot ne
+traverse : analyse incrémentale et analyse en flux.
+"""
+
+import re
+import unicodedata
+from typing import Iterator, List, Optional, Tuple
+
+# Lettres et chiffres, avec leurs accents combinants (texte en forme NFD)
+_LETTRES = r"\w[\w\u0300-\u036f]*"
+
+MOT = re.compile(rf"{_LETTRES}(?:['’‘ʼ]{_LETTRES})*")
+
+# Caractère qui ne peut pas appartenir à un mot (coupure sûre d'un texte en blocs)
+SEPARATEUR = re.compile(r"[^\w'’‘ʼ\u0300-\u036f]")
+
+# Un segment s'arrête après sa ponctuation finale (et les espaces qui la
+# suivent) ou après un retour à la ligne
+SEGMENT = re.compile(r'[^.!?\n]*(?:[.!?]+[ \t]*)?\n?')
+
+# Un mot (groupe 1), ou un caractère qui termine un segment
+MOT_OU_FIN = re.compile(rf"({MOT.pattern})|[.!?\n]")
+
+APOSTROPHES_TYPOGRAPHIQUES = ('’', '‘', 'ʼ')
+
+# Token : (début, fin, forme normalisée), positions dans le texte d'origine
+Token = Tuple[int, int, str]
+
+
+def normaliser(texte: str) -> str:
+    """Minuscules, forme NFC et apostrophes droites (un mot ou un texte entier)"""
+    if not texte.isascii():
+        for apostrophe in APOSTROPHES_TYPOGRAPHIQUES:
+            texte = texte.replace(apostrophe, "'")
+        texte = unicodedata.normalize('NFC', texte)
+    # La plupart des mots sont déjà en minuscules : pas de copie
+    return texte if texte.islower() else texte.lower()
+
+
+def iterer_tokens(texte: str, debut: int = 0, fin: Optional[int] = None) -> Iterator[Token]:
+    """
+    Tokens du texte (ou de texte[debut:fin]) avec leurs positions
+
+    Le texte n'est pas copié : seules les formes des tokens sont créées.
+    """
+    for match in MOT.finditer(texte, debut, len(texte) if fin is None else fin):
+        mot = match.group()
+        # normaliser() en ligne pour le cas courant (mot ASCII)
+        if not mot.isascii():
+            mot = normaliser(mot)
+        elif not mot.islower():
+            mot = mot.lower()
+        yield match.start(), match.end(), mot
+
+
+def tokeniser(texte: str) -> List[str]:
+    """Formes normalisées des tokens du texte"""
+    return [mot if mot.isascii() and mot.islower() else normaliser(mot) for mot in MOT.findall(texte)]
+
+
+def iterer_segments(texte: str) -> Iterator[Tuple[int, int]]:
+    """Positions (début, fin) des segments contigus du texte, sans les copier"""
+    for match in SEGMENT.finditer(texte):
+        debut, fin = match.span()
+        if fin > debut:
+            yield debut, fin
+
+
+def tokeniser_phrases(texte: str) -> Tuple[List[str], List[int]]:
+    """
+    Formes normalisées des tokens du texte, et indice du premier token de
+    chaque segment (les segments sans token ne sont pas comptés)
+
+    Même découpage que iterer_segments, en une seule recherche sur le texte.
+    """
+    tokens: List[str] = []
+    phrases: List[int] = []
+    nouveau_segment = True
+    for mot in MOT_OU_FIN.findall(texte):
+        if not mot:
+            nouveau_segment = True
+            continue
+        if nouveau_segment:
+            phrases.append(len(tokens))
+            nouveau_segment = False
+        tokens.append(mot if mot.isascii() and mot.islower() else normaliser(mot))
+    return tokens, phrases